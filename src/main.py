@@ -6,7 +6,13 @@ from utils.config import Config
 from utils.plots.prep_data import SimData
 from utils.plots.plot2d import CompareSol, Plot2DSol, Plot2DProjectile, CompareProjectiles
 from utils.plots.animation3d import animation_3d
+from utils.plots.downsample import DownsampleMode, PLOT_POINTS, \
+    downsample_mode
 from utils.utils import setup_folders
+from utils.checkpoint import latest_checkpoint
+from utils.trajectory import convert_all, encode_all
+from utils.codec import Codec, compression, precision, prediction
+from datetime import datetime
 import click
 
 
@@ -44,36 +50,139 @@ def sim(sim, config_file: str, plot: bool, animate: bool, output: str | None):
     click.echo('Simulation complete.')
 
 
+@cli.command('resume')
+@option('--sim', '-s', default='sol', help='Simulation to resume.')
+@option('--config_file', '-c', default='config.json', help='Configuration file.')
+@option('--plot', '-p', is_flag=True, help='Plot the simulation.')
+@option('--animate', '-a', is_flag=True, help='Animate the simulation.')
+@option('--output', '-o', help='Output file of the run, the latest if not given.')
+def resume(sim, config_file: str, plot: bool, animate: bool,
+           output: str | None):
+    """Resume a simulation from its latest checkpoint."""
+    config = Config(config_file)
+
+    match sim.lower():
+        case 'sol':
+            if config.solar_system.adaptive:
+                raise ValueError('Adaptive runs cannot be resumed')
+            checkpoint = latest_checkpoint('solarsystem', output)
+            title, data = SolarSystemSim(config.solar_system,
+                                         checkpoint=checkpoint).run()
+            if plot:
+                plot_sol(title, animation=animate, data=data)
+        case 'proj':
+            checkpoint = latest_checkpoint('projectile', output)
+            title, data = ProjectileSim(config.projectile,
+                                        checkpoint=checkpoint).run()
+            if plot:
+                plot_projectile(title, animation=animate, data=data)
+        case 'orbit':
+            if config.earth_orbit.adaptive:
+                raise ValueError('Adaptive runs cannot be resumed')
+            checkpoint = latest_checkpoint('earth_orbit', output)
+            title, data = EarthOrbit(config.earth_orbit,
+                                     checkpoint=checkpoint).run()
+            if plot:
+                plot_sol(title, animation=animate, data=data)
+        case _:
+            raise ValueError(f'Invalid simulation: {sim}')
+
+    click.echo('Simulation complete.')
+
+
+@cli.command('convert')
+@option('--folder', '-f', default='data/sims', help='Folder of json runs.')
+@option('--remove', '-r', is_flag=True, help='Delete the json once converted.')
+@option('--objects', '-o', default=None,
+        help='list of bodies to keep, all by default.')
+@option('--fields', '-q', default=None,
+        help='list of quantities to keep, all by default.')
+def convert(folder: str, remove: bool, objects: str | None,
+            fields: str | None):
+    """Convert json runs to binary trajectories."""
+    paths = convert_all(folder, remove,
+                        None if objects is None else objects.split(' '),
+                        None if fields is None else fields.split(' '))
+    click.echo(f'Converted {len(paths)} runs.')
+
+
+@cli.command('encode')
+@option('--folder', '-f', default='data/sims', help='Folder of trajectories.')
+@option('--precision', '-p', 'precision_name', default='float64',
+        help='float64, float32 or quantized.')
+@option('--tolerance', '-t', default=1e-9,
+        help='Error of quantized values, relative to the largest of each.')
+@option('--prediction', '-P', 'prediction_name', default='linear',
+        help='none, delta or linear.')
+@option('--compression', '-c', 'compression_name', default='zlib',
+        help='none, zlib or lzma.')
+@option('--decode', '-d', is_flag=True, help='Decode back into npy files.')
+@option('--output', '-o', default=None,
+        help='Folder to write the encoded runs to, beside the originals.')
+@option('--replace', is_flag=True,
+        help='Replace the runs with lossy encodings of them.')
+def encode(folder: str, precision_name: str, tolerance: float,
+           prediction_name: str, compression_name: str, decode: bool,
+           output: str | None, replace: bool):
+    """Re-encode saved trajectories and report the ratio and error."""
+    codec = None if decode else Codec(
+        precision(precision_name), prediction(prediction_name),
+        compression(compression_name), tolerance)
+    reports = encode_all(folder, codec, output, replace)
+    for path, report in reports.items():
+        click.echo(path)
+        for key, (ratio, error) in report.items():
+            click.echo(f'    {key:<14} {ratio:8.2f}x    max error {error:.3e}')
+    click.echo(f'Encoded {len(reports)} runs.')
+
+
 @cli.command('plot')
 @option('--data', '-d', help='Filename of the data file.')
 @option('--animation', '-a', is_flag=True, help='Animate the simulation.')
 @option('--sim', '-s', default='sol', help='Simulation type.')
-def plot(data: str, animation: bool, sim: str):
+@option('--points', '-n', default=PLOT_POINTS,
+        help='Most points of each line, 0 for all.')
+@option('--mode', '-m', default='lttb', help='Downsampling, lttb or min_max.')
+@option('--start', type=click.DateTime(), default=None,
+        help='First date to plot.')
+@option('--end', type=click.DateTime(), default=None,
+        help='Last date to plot.')
+def plot(data: str, animation: bool, sim: str, points: int, mode: str,
+         start: datetime | None, end: datetime | None):
     """Plot a simulation."""
+    window = (None if start is None else start.timestamp(),
+              None if end is None else end.timestamp())
     match sim.lower():
         case 'sol':
-            plot_sol(data, animation)
+            plot_sol(data, animation, points=points or None,
+                     mode=downsample_mode(mode), window=window)
         case 'proj':
-            plot_projectile(data, animation)
+            plot_projectile(data, animation, points=points or None,
+                            mode=downsample_mode(mode))
 
 
 @cli.command('compare')
 @option('--files', '-f', default='euler euler_cromer verlet',
         help='list of files to compare.')
 @option('--sim', '-s', default='sol', help='Simulation type.')
-def compare(files: str, sim: str):
+@option('--points', '-n', default=PLOT_POINTS,
+        help='Most points of each line, 0 for all.')
+@option('--mode', '-m', default='lttb', help='Downsampling, lttb or min_max.')
+def compare(files: str, sim: str, points: int, mode: str):
     """Compare two simulations."""
     file_list = files.split(' ')
     match sim.lower():
         case 'sol':
-            compare_sol(file_list)
+            compare_sol(file_list, points or None, downsample_mode(mode))
         case 'proj':
-            compare_projectile(file_list)
+            compare_projectile(file_list, points or None,
+                               downsample_mode(mode))
         case 'orbit':
-            compare_orbit(file_list)
+            compare_orbit(file_list, points or None, downsample_mode(mode))
 
 
-def compare_orbit(files: list[str]) -> None:
+def compare_orbit(files: list[str], points: int | None = PLOT_POINTS,
+                  mode: DownsampleMode = DownsampleMode.LTTB) -> None:
     datas = []
     for file in files:
         file_name = file.split('/')[-1].split('.json')[0]
@@ -81,7 +190,7 @@ def compare_orbit(files: list[str]) -> None:
         sim_data = SimData(file_dir)
         datas.append(sim_data)
 
-    compare = CompareSol(datas)
+    compare = CompareSol(datas, points=points, mode=mode)
     compare.plot_momentum()
     compare.plot_energy()
     compare.plot_pos()
@@ -89,7 +198,8 @@ def compare_orbit(files: list[str]) -> None:
     print('Plotting 2d plots...')
 
 
-def compare_projectile(files: list[str]) -> None:
+def compare_projectile(files: list[str], points: int | None = PLOT_POINTS,
+                       mode: DownsampleMode = DownsampleMode.LTTB) -> None:
     datas = []
     for file in files:
         file_name = file.split('/')[-1].split('.json')[0]
@@ -97,7 +207,7 @@ def compare_projectile(files: list[str]) -> None:
         sim_data = SimData(file_dir)
         datas.append(sim_data)
 
-    compare = CompareProjectiles(datas)
+    compare = CompareProjectiles(datas, points=points, mode=mode)
 
     compare.plot_pos()
     compare.plot_vel()
@@ -106,7 +216,8 @@ def compare_projectile(files: list[str]) -> None:
     print('Plotting 2d plots...')
 
 
-def compare_sol(files: list[str]) -> None:
+def compare_sol(files: list[str], points: int | None = PLOT_POINTS,
+                mode: DownsampleMode = DownsampleMode.LTTB) -> None:
     datas = []
     for file in files:
         file_name = file.split('/')[-1].split('.json')[0]
@@ -114,18 +225,21 @@ def compare_sol(files: list[str]) -> None:
         sim_data = SimData(file_dir)
         datas.append(sim_data)
 
-    compare = CompareSol(datas)
+    compare = CompareSol(datas, points=points, mode=mode)
     compare.plot_momentum()
     compare.plot_energy()
 
     print('Plotting 2d plots...')
 
 
-def plot_sol(filename: str, animation: bool, data: dict | None = None):
+def plot_sol(filename: str, animation: bool, data: dict | None = None,
+             points: int | None = PLOT_POINTS,
+             mode: DownsampleMode = DownsampleMode.LTTB,
+             window: tuple[float | None, float | None] | None = None):
     file_name = filename.split('/')[-1].split('.json')[0]
     file_dir = f"data/sims/solarsystem/{file_name}.json"
-    sim_data = SimData(file_dir, data)
-    plot2d = Plot2DSol(sim_data)
+    sim_data = SimData(file_dir, data, window=window)
+    plot2d = Plot2DSol(sim_data, points=points, mode=mode)
 
     print('Plotting 2d plots...')
     plot2d.plot_all_pos()
@@ -141,11 +255,13 @@ def plot_sol(filename: str, animation: bool, data: dict | None = None):
         animation_3d(sim_data, filename=output_file)
 
 
-def plot_projectile(filename: str, animation: bool, data: dict | None = None):
+def plot_projectile(filename: str, animation: bool, data: dict | None = None,
+                    points: int | None = PLOT_POINTS,
+                    mode: DownsampleMode = DownsampleMode.LTTB):
     file_name = filename.split('/')[-1].split('.json')[0]
     file_dir = f"data/sims/projectile/{file_name}.json"
     sim_data = SimData(file_dir, data)
-    plot2d = Plot2DProjectile(sim_data)
+    plot2d = Plot2DProjectile(sim_data, points=points, mode=mode)
 
     print('Plotting 2d plots...')
     plot2d.plot_pos()
@@ -153,11 +269,14 @@ def plot_projectile(filename: str, animation: bool, data: dict | None = None):
     print('Finished plotting 2d plots.')
 
 
-def plot_orbit(filename: str, animation: bool, data: dict | None = None):
+def plot_orbit(filename: str, animation: bool, data: dict | None = None,
+               points: int | None = PLOT_POINTS,
+               mode: DownsampleMode = DownsampleMode.LTTB,
+               window: tuple[float | None, float | None] | None = None):
     file_name = filename.split('/')[-1].split('.json')[0]
     file_dir = f"data/sims/solarsystem/{file_name}.json"
-    sim_data = SimData(file_dir, data)
-    plot2d = Plot2DSol(sim_data)
+    sim_data = SimData(file_dir, data, window=window)
+    plot2d = Plot2DSol(sim_data, points=points, mode=mode)
 
     print('Plotting 2d plots...')
     plot2d.plot_all_pos()
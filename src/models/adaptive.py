@@ -0,0 +1,225 @@
+from models.events import EventDetector
+from models.solar_system import SolarSystem
+import numpy as np
+
+
+# Dormand-Prince 5(4) tableau. The last row of A is also the fifth order
+# solution, so the last stage is the first stage of the next step.
+DP_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+    [35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+]
+DP_B4 = [5179 / 57600, 0.0, 7571 / 16695, 393 / 640, -92097 / 339200,
+         187 / 2100, 1 / 40]
+DP_E = [b5 - b4 for b5, b4 in zip(DP_A[6] + [0.0], DP_B4)]
+
+
+class DormandPrince:
+    """
+    Args:
+        system (SolarSystem): The system to advance.
+        initial_step (float): The first step to try (s).
+        rtol (float): The relative tolerance of each body's position and
+        velocity.
+        atol (float): The absolute tolerance, applied to positions in m and
+        velocities in m/s.
+        min_step (float): The smallest step allowed (s), a step this small is
+        accepted even if it misses the tolerance.
+        max_step (float): The largest step allowed (s).
+
+    An adaptive step driver for a SolarSystem using the embedded
+    Dormand-Prince 5(4) Runge-Kutta pair. Each step is taken with the fifth
+    order solution and its size is chosen from the difference between the
+    fifth and fourth order solutions.
+    """
+
+    safety = 0.9
+    min_factor = 0.2
+    max_factor = 5.0
+
+    def __init__(self, system: SolarSystem, initial_step: float,
+                 rtol: float = 1e-10, atol: float = 1e-3,
+                 min_step: float = 1e-3, max_step: float = np.inf) -> None:
+        self._system = system
+        self._dt = initial_step
+        self.rtol = rtol
+        self.atol = atol
+        self.min_step = min_step
+        self.max_step = max_step
+
+        self.time = 0.0
+        self.accepted = 0
+        self.rejected = 0
+        self.forced = 0
+        self.evaluations = 0
+
+        # the first stage of each step uses the stored acceleration
+        self._evaluate()
+
+    @property
+    def step_size(self) -> float:
+        """
+        Returns:
+            float: The size of the next step to try (s).
+        """
+        return self._dt
+
+    def _evaluate(self) -> None:
+        """
+        Calculates the acceleration of every particle at its current position.
+        """
+        for state in self._system.states:
+            state.update_gravitational_acceleration()
+        self.evaluations += 1
+
+    def _attempt(self, h: float, x0: list[np.ndarray],
+                 v0: list[np.ndarray]) -> float:
+        """
+        Args:
+            h (float): The step size (s).
+            x0 (list[np.ndarray]): The positions of each state at the start.
+            v0 (list[np.ndarray]): The velocities of each state at the start.
+        Returns:
+            float: The error of the step relative to the tolerance, the step
+            is acceptable if it is at most 1.
+
+        Takes a fifth order step, leaving the particles at the new state.
+        """
+        states = self._system.states
+
+        # the stage derivatives, the position's is the stage velocity
+        kx = [[state.velocity.copy() for state in states]]
+        kv = [[state.acceleration.copy() for state in states]]
+
+        for stage in range(1, 7):
+            row = DP_A[stage]
+            for n, state in enumerate(states):
+                dx = sum(a * k[n] for a, k in zip(row, kx) if a != 0.0)
+                dv = sum(a * k[n] for a, k in zip(row, kv) if a != 0.0)
+                state.position[:] = x0[n] + h * dx
+                state.velocity[:] = v0[n] + h * dv
+            self._evaluate()
+            kx.append([state.velocity.copy() for state in states])
+            kv.append([state.acceleration.copy() for state in states])
+
+        error = 0.0
+        for n, state in enumerate(states):
+            if len(state) == 0:
+                continue
+            ex = h * sum(e * k[n] for e, k in zip(DP_E, kx) if e != 0.0)
+            ev = h * sum(e * k[n] for e, k in zip(DP_E, kv) if e != 0.0)
+            for err, start, end in [(ex, x0[n], state.position),
+                                    (ev, v0[n], state.velocity)]:
+                scale = self.atol + self.rtol * np.maximum(
+                    np.linalg.norm(start, axis=1),
+                    np.linalg.norm(end, axis=1))
+                error = max(error, float(np.max(
+                    np.linalg.norm(err, axis=1) / scale)))
+
+        return error
+
+    def step(self, max_dt: float | None = None) -> float:
+        """
+        Args:
+            max_dt (float | None): The most time the step may cover (s).
+        Returns:
+            float: The size of the step taken (s).
+
+        Takes one accepted step, retrying with smaller steps until the error
+        is within the tolerance.
+        """
+        h = min(self._dt, self.max_step)
+        limited = max_dt is not None and max_dt < h
+        if limited:
+            h = max_dt
+
+        states = self._system.states
+        x0 = [state.position.copy() for state in states]
+        v0 = [state.velocity.copy() for state in states]
+        a0 = [state.acceleration.copy() for state in states]
+
+        while True:
+            error = self._attempt(h, x0, v0)
+            factor = self.max_factor if error == 0 else min(
+                self.max_factor,
+                max(self.min_factor, self.safety * error**-0.2))
+
+            if error <= 1.0 or h <= self.min_step:
+                if error > 1.0:
+                    self.forced += 1
+                self.accepted += 1
+                self.time += h
+                self._system.elapse(h)
+
+                # a step cut short to land on an output time says nothing
+                # about the natural step size unless it was also too large
+                if not limited or factor < 1.0:
+                    self._dt = min(max(h * factor, self.min_step),
+                                   self.max_step)
+                return h
+
+            self.rejected += 1
+            for n, state in enumerate(states):
+                state.position[:] = x0[n]
+                state.velocity[:] = v0[n]
+                state.acceleration[:] = a0[n]
+            h = max(h * factor, self.min_step)
+            limited = False
+
+    def advance_to(self, time: float,
+                   detector: EventDetector | None = None) -> bool:
+        """
+        Args:
+            time (float): The time to advance to (s), measured from the start
+            of the driver.
+            detector (EventDetector | None): Checks each accepted step for
+            events, None to look for none.
+        Returns:
+            bool: Whether a terminal event stopped the steps, leaving the
+            system at the event.
+
+        Takes steps until the time is reached, shortening the last step to
+        land on it exactly. An event that moves the state back to it
+        continues the steps from the event.
+        """
+        while time - self.time > 1e-9 * max(abs(time), 1.0):
+            if detector is None:
+                self.step(time - self.time)
+                continue
+
+            x0, v0 = self._system.phase_space()
+            start = detector.time
+            h = self.step(time - self.time)
+            event = detector.check(x0, v0, h)
+            if event is None:
+                continue
+
+            # the rest of the step is undone
+            back = detector.time - (start + h)
+            self.time += back
+            self._system.elapse(back)
+            self._evaluate()
+            if event.terminal:
+                return True
+
+        self._system.elapse(time - self.time)
+        self.time = time
+        return False
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: The number of accepted, rejected and forced steps and of
+            acceleration evaluations.
+        """
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'forced': self.forced,
+            'evaluations': self.evaluations,
+        }
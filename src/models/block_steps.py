@@ -0,0 +1,166 @@
+from models.particle import ParticleState
+import numpy as np
+
+
+class BlockSteps:
+    """
+    Args:
+        states (list[ParticleState]): The states to advance, test particle
+        states after their sources.
+        max_level (int): The number of times the largest step may be halved.
+        eta (float): The fraction of its acceleration divided by its jerk
+        that a particle may step by.
+
+    Advances particles with hierarchical block time steps. Each particle
+    steps by the largest step divided by a power of two, its level, so the
+    steps of every level line up with those of the levels above it. Only
+    the particles at the end of a step have their acceleration calculated,
+    the others drift at their current velocity.
+
+    Each step is a kick-drift-kick leapfrog, the same as the Verlet method,
+    and every particle is back in step at the end of the largest step.
+    """
+
+    def __init__(self, states: list[ParticleState], max_level: int = 10,
+                 eta: float = 0.01) -> None:
+        self._states = states
+        self.max_level = max_level
+        self.eta = eta
+        self.levels: list[np.ndarray] | None = None
+
+        # the number of largest steps taken, of times the clock stopped and
+        # of particle accelerations calculated
+        self.steps = 0
+        self.ticks = 0
+        self.evaluations = 0
+
+    def _gravity(self, state: ParticleState,
+                 rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculates the acceleration and jerk of some of the particles.
+        """
+        if not state._has_forces():
+            return np.zeros((len(rows), 3)), np.zeros((len(rows), 3))
+        self.evaluations += len(rows)
+        return state.gravity_at(rows)
+
+    def _wanted_level(self, accel: np.ndarray, jerk: np.ndarray,
+                      deltaT: float) -> np.ndarray:
+        """
+        Args:
+            accel (np.ndarray): The (A, 3) acceleration of the particles.
+            jerk (np.ndarray): The (A, 3) jerk of the particles.
+            deltaT (float): The largest step.
+        Returns:
+            np.ndarray: The level whose step is no larger than eta times
+            the acceleration divided by the jerk of each particle.
+        """
+        accel_size = np.sqrt(np.einsum('ij,ij->i', accel, accel))
+        jerk_size = np.sqrt(np.einsum('ij,ij->i', jerk, jerk))
+
+        # no jerk allows the largest step and no acceleration the smallest
+        tiny = np.finfo(float).tiny
+        level = np.ceil(np.log2(np.maximum(deltaT * jerk_size, tiny) /
+                                np.maximum(self.eta * accel_size, tiny)))
+        return np.clip(level, 0, self.max_level).astype(np.int64)
+
+    def start(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The largest step.
+        Returns:
+            None
+
+        Calculates the acceleration of every particle and assigns each its
+        first level.
+        """
+        self.levels = []
+        for state in self._states:
+            rows = np.arange(len(state))
+            accel, jerk = self._gravity(state, rows)
+            state.acceleration[:] = accel
+            state.last_acceleration[:] = accel
+            self.levels.append(self._wanted_level(accel, jerk, deltaT))
+
+    def advance(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The largest step.
+        Returns:
+            None
+
+        Advances every particle by the largest step. The clock moves in
+        multiples of the smallest step, skipping straight to the next time
+        a particle finishes its step.
+        """
+        if self.levels is None:
+            self.start(deltaT)
+
+        ticks = 2**self.max_level
+        h = deltaT / ticks
+        active = [(state, level) for state, level in
+                  zip(self._states, self.levels) if len(state) > 0]
+        if len(active) == 0:
+            return
+
+        # the tick each particle finishes its current step on
+        ends = []
+        for state, level in active:
+            state.add_velocity(0.5 * deltaT / 2.0**level[:, np.newaxis] *
+                               state.acceleration)
+            ends.append(2**(self.max_level - level))
+
+        tick = 0
+        while tick < ticks:
+            next_tick = min(int(np.min(end)) for end in ends)
+            for state, _ in active:
+                state.drift((next_tick - tick) * h)
+            tick = next_tick
+            self.ticks += 1
+
+            for (state, level), end in zip(active, ends):
+                rows = np.flatnonzero(end == tick)
+                if len(rows) == 0:
+                    continue
+
+                accel, jerk = self._gravity(state, rows)
+                state.last_acceleration[rows] = state.acceleration[rows]
+                state.acceleration[rows] = accel
+
+                # a particle may move to a smaller step at any time, but
+                # only to the next larger step and only when its steps line
+                # up with that level's
+                current = level[rows]
+                span = 2**(self.max_level - current)
+                wanted = self._wanted_level(accel, jerk, deltaT)
+                longer = (wanted < current) & (tick % (2 * span) == 0)
+                level[rows] = np.where(wanted > current, wanted,
+                                       current - longer)
+
+                # the closing half kick of this step and, unless every
+                # particle is back in step, the opening half kick of the next
+                step = 0.5 * deltaT / 2.0**current
+                if tick < ticks:
+                    step = step + 0.5 * deltaT / 2.0**level[rows]
+                    end[rows] = tick + 2**(self.max_level - level[rows])
+                state.add_velocity(step[:, np.newaxis] * accel, rows)
+
+        self.steps += 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: The number of particle accelerations calculated, the
+            number stepping every particle by the smallest step would have
+            needed, and the number of particles at each level.
+        """
+        particles = sum(len(state) for state in self._states)
+        levels = np.concatenate(self.levels) if self.levels else \
+            np.array([], dtype=np.int64)
+        return {
+            'evaluations': self.evaluations,
+            'single_step_evaluations':
+                self.steps * 2**self.max_level * particles,
+            'levels': np.bincount(levels,
+                                  minlength=self.max_level + 1).tolist()
+        }
@@ -0,0 +1,160 @@
+from enum import Enum
+import itertools
+import numpy as np
+
+
+class CollisionOutcome(Enum):
+    NONE = 0
+    # the bodies become one, keeping their mass and momentum
+    MERGE = 1
+    BOUNCE = 2
+    # the simulation stops at the first collision
+    STOP = 3
+
+
+# the cell itself and the 13 neighbouring cells whose first nonzero offset
+# is positive, so each pair of neighbouring cells is visited once
+_HALF_SHELL = [(0, 0, 0)] + [
+    offset for offset in itertools.product((-1, 0, 1), repeat=3)
+    if next((o for o in offset if o != 0), 0) > 0
+]
+
+# the grid is abandoned when the bodies crowd into a few cells, as the
+# pairs within a cell grow with the square of its bodies
+_MAX_CELL_PAIRS_PER_BODY = 64
+
+
+def _expand(rows: np.ndarray, first: np.ndarray,
+            number: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        rows (np.ndarray): The first body of each run of pairs.
+        first (np.ndarray): The first partner of each run.
+        number (np.ndarray): The number of consecutive partners in each run.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Every pair in the runs.
+    """
+    total = int(np.sum(number))
+    if total == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    run_start = np.cumsum(number) - number
+    step = np.arange(total) - np.repeat(run_start, number)
+    return np.repeat(rows, number), np.repeat(first, number) + step
+
+
+def grid_pairs(position: np.ndarray, radius: np.ndarray
+               ) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Args:
+        position (np.ndarray): The (N, 3) positions.
+        radius (np.ndarray): The (N,) radii.
+    Returns:
+        tuple[np.ndarray, np.ndarray] | None: The candidate pairs, or None if
+        the bodies do not suit a grid.
+
+    Hashes the bodies into a uniform grid of cells as wide as the largest
+    body, so touching bodies are always in the same or neighbouring cells.
+    The cells are keyed exactly and sorted, so each body finds its
+    neighbours with a binary search and the cost grows as N log N while the
+    cells stay sparse.
+    """
+    n = len(position)
+    cell = 2 * np.max(radius, initial=0.0)
+    if n < 2 or cell <= 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+    scaled = np.floor(position / cell)
+    span = np.ptp(scaled, axis=0) + 3
+    if not np.all(np.isfinite(span)) or np.prod(span) > 2.0**62:
+        return None
+
+    # padded by a cell on each side so neighbouring keys never wrap
+    coords = (scaled - scaled.min(axis=0) + 1).astype(np.int64)
+    shape = span.astype(np.int64)
+    strides = np.array([shape[1] * shape[2], shape[2], 1])
+    keys = coords @ strides
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    cells, start, count = np.unique(sorted_keys, return_index=True,
+                                    return_counts=True)
+    if np.sum(count.astype(float)**2) > _MAX_CELL_PAIRS_PER_BODY * n:
+        return None
+
+    rows = np.arange(n)
+    first_parts, second_parts = [], []
+    for offset in _HALF_SHELL:
+        if offset == (0, 0, 0):
+            # the later bodies of the same cell
+            slot = np.searchsorted(cells, sorted_keys)
+            first = rows + 1
+            number = start[slot] + count[slot] - first
+        else:
+            neighbour = sorted_keys + np.array(offset) @ strides
+            slot = np.minimum(np.searchsorted(cells, neighbour),
+                              len(cells) - 1)
+            found = cells[slot] == neighbour
+            first = np.where(found, start[slot], 0)
+            number = np.where(found, count[slot], 0)
+        i, j = _expand(rows, first, number)
+        first_parts.append(order[i])
+        second_parts.append(order[j])
+    return np.concatenate(first_parts), np.concatenate(second_parts)
+
+
+def sweep_and_prune_pairs(position: np.ndarray, radius: np.ndarray
+                          ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        position (np.ndarray): The (N, 3) positions.
+        radius (np.ndarray): The (N,) radii.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The candidate pairs.
+
+    Sorts the bodies' extents along the axis they are most spread over and
+    pairs the bodies whose extents overlap. It suits bodies of very
+    different sizes, which a grid cannot.
+    """
+    n = len(position)
+    if n < 2:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+    axis = int(np.argmax(np.ptp(position, axis=0)))
+    low = position[:, axis] - radius
+    high = position[:, axis] + radius
+    order = np.argsort(low, kind='stable')
+
+    # every later body that starts before this one ends overlaps it
+    rows = np.arange(n)
+    end = np.searchsorted(low[order], high[order], side='right')
+    number = np.maximum(end - rows - 1, 0)
+    i, j = _expand(rows, rows + 1, number)
+    return order[i], order[j]
+
+
+def find_contacts(position: np.ndarray, radius: np.ndarray
+                  ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        position (np.ndarray): The (N, 3) positions.
+        radius (np.ndarray): The (N,) radii.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The pairs of bodies that touch, first
+        the lower row, sorted.
+
+    Finds the candidates with the spatial hash, or sweep and prune when the
+    grid does not suit, then keeps the pairs that touch.
+    """
+    pairs = grid_pairs(position, radius)
+    if pairs is None:
+        pairs = sweep_and_prune_pairs(position, radius)
+    i, j = pairs
+
+    separation = position[j] - position[i]
+    distance_sq = np.einsum('ij,ij->i', separation, separation)
+    touching = distance_sq <= (radius[i] + radius[j])**2
+    i, j = i[touching], j[touching]
+
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    order = np.lexsort((j, i))
+    return i[order], j[order]
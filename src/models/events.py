@@ -0,0 +1,319 @@
+from typing import Callable
+import numpy as np
+
+
+EventFunction = Callable[[np.ndarray, np.ndarray], float]
+
+
+class Event:
+    """
+    Args:
+        name (str): The name of the event.
+        function (EventFunction): A function of the positions and velocities
+        that is zero at the event.
+        direction (int): 1 to only detect the function rising through
+        zero, -1 for falling and 0 for both.
+        terminal (bool): Whether the run stops at the event.
+        handler (Callable[[EventRecord], bool] | None): Called with each
+        record, it may change the record's position and velocity and
+        returns whether it did, in which case the run continues from them.
+
+    An event the simulations look for between steps.
+    """
+
+    def __init__(self, name: str, function: EventFunction,
+                 direction: int = 0, terminal: bool = False,
+                 handler: Callable[['EventRecord'], bool] | None = None
+                 ) -> None:
+        self.name = name
+        self.function = function
+        self.direction = direction
+        self.terminal = terminal
+        self.handler = handler
+
+    def crossed(self, before: float, after: float) -> bool:
+        """
+        Args:
+            before (float): The value at the start of the step.
+            after (float): The value at the end of the step.
+        Returns:
+            bool: Whether the value passed through zero in the event's
+            direction.
+        """
+        if before == 0 or np.sign(before) == np.sign(after):
+            return False
+        rising = before < 0
+        return self.direction == 0 or (self.direction > 0) == rising
+
+
+class EventRecord:
+    """
+    Args:
+        name (str): The name of the event.
+        time (float): The time of the event.
+        position (np.ndarray): The positions at the event.
+        velocity (np.ndarray): The velocities at the event.
+
+    An event that happened.
+    """
+
+    def __init__(self, name: str, time: float, position: np.ndarray,
+                 velocity: np.ndarray) -> None:
+        self.name = name
+        self.time = time
+        self.position = position
+        self.velocity = velocity
+
+    def to_json(self) -> dict:
+        return {
+            'name': self.name,
+            'time': self.time,
+            'position': self.position.tolist(),
+            'velocity': self.velocity.tolist(),
+        }
+
+
+def hermite(x0: np.ndarray, v0: np.ndarray, x1: np.ndarray,
+            v1: np.ndarray, h: float,
+            s: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        x0 (np.ndarray): The positions at the start of the step.
+        v0 (np.ndarray): The velocities at the start of the step.
+        x1 (np.ndarray): The positions at the end of the step.
+        v1 (np.ndarray): The velocities at the end of the step.
+        h (float): The length of the step.
+        s (float): The fraction of the step to interpolate to.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The positions and velocities.
+
+    Interpolates within a step with the cubic Hermite polynomial through
+    both ends, which is exact for motion under a constant acceleration.
+    """
+    h00 = 2 * s**3 - 3 * s**2 + 1
+    h10 = s**3 - 2 * s**2 + s
+    h01 = -2 * s**3 + 3 * s**2
+    h11 = s**3 - s**2
+    position = h00 * x0 + h10 * h * v0 + h01 * x1 + h11 * h * v1
+
+    d00 = 6 * s**2 - 6 * s
+    d10 = 3 * s**2 - 4 * s + 1
+    d11 = 3 * s**2 - 2 * s
+    velocity = d00 / h * (x0 - x1) + d10 * v0 + d11 * v1
+    return position, velocity
+
+
+def find_root(function: Callable[[float], float], a: float, b: float,
+              fa: float, fb: float, tolerance: float = 1e-12,
+              max_iterations: int = 100) -> float:
+    """
+    Args:
+        function (Callable[[float], float]): The function.
+        a (float): The start of the bracket.
+        b (float): The end of the bracket.
+        fa (float): The function at a.
+        fb (float): The function at b, of the opposite sign.
+        tolerance (float): The width of the bracket to stop at, relative
+        to the starting width.
+        max_iterations (int): The most iterations to take.
+    Returns:
+        float: The root.
+
+    Narrows the bracket with the Illinois variant of the false position
+    method, which converges superlinearly and never leaves the bracket.
+    """
+    width = tolerance * abs(b - a)
+    side = 0
+    for _ in range(max_iterations):
+        c = (a * fb - b * fa) / (fb - fa)
+        fc = function(c)
+        if fc == 0:
+            return c
+        if np.sign(fc) == np.sign(fb):
+            b, fb = c, fc
+            # halve the end that has stayed put twice, so the bracket
+            # shrinks from both sides
+            if side == -1:
+                fa /= 2
+            side = -1
+        else:
+            a, fa = c, fc
+            if side == 1:
+                fb /= 2
+            side = 1
+        if abs(b - a) <= width:
+            break
+    return (a * fb - b * fa) / (fb - fa)
+
+
+class EventDetector:
+    """
+    Args:
+        events (list[Event]): The events to look for.
+        get_state (Callable[[], tuple[np.ndarray, np.ndarray]]): Returns
+        the current positions and velocities.
+        set_state (Callable[[np.ndarray, np.ndarray], None]): Sets the
+        positions and velocities.
+        advance (Callable[[float], None]): Advances the simulation by an
+        amount of time.
+
+    Steps a simulation and finds the events within each step. An event is
+    bracketed by a sign change of its function between the ends of a step,
+    then its time is found by root finding on the Hermite interpolant of
+    the step, so coarse steps still give accurate event times.
+    """
+
+    def __init__(self, events: list[Event],
+                 get_state: Callable[[], tuple[np.ndarray, np.ndarray]],
+                 set_state: Callable[[np.ndarray, np.ndarray], None],
+                 advance: Callable[[float], None]) -> None:
+        self.events = events
+        self._get_state = get_state
+        self._set_state = set_state
+        self._advance = advance
+        self.records: list[EventRecord] = []
+        self.time = 0.0
+        self._values: list[float] | None = None
+
+    def _evaluate(self, position: np.ndarray,
+                  velocity: np.ndarray) -> list[float]:
+        return [float(event.function(position, velocity))
+                for event in self.events]
+
+    def reset(self, time: float = 0.0) -> None:
+        """
+        Args:
+            time (float): The time of the current state.
+        Returns:
+            None
+        """
+        self.time = time
+        self.records = []
+        self._values = None
+
+    def step(self, deltaT: float) -> bool:
+        """
+        Args:
+            deltaT (float): The amount of time to advance by.
+        Returns:
+            bool: Whether a terminal event stopped the step, leaving the
+            simulation at the event.
+
+        Advances the simulation by one step, recording the events in it. A
+        handler that changes the state restarts the rest of the step from
+        the event.
+        """
+        start = self.time
+        end = start + deltaT
+        while True:
+            x0, v0 = (np.array(a, dtype=float) for a in self._get_state())
+            t0 = self.time
+
+            # a whole step is taken as given, so the steps match a run
+            # without events
+            h = deltaT if t0 == start else end - t0
+            if h <= 0:
+                return False
+
+            self._advance(h)
+            event = self.check(x0, v0, h)
+            if event is None:
+                self.time = end
+                return False
+            if event.terminal:
+                return True
+
+    def check(self, x0: np.ndarray, v0: np.ndarray,
+              h: float) -> Event | None:
+        """
+        Args:
+            x0 (np.ndarray): The positions at the start of the step.
+            v0 (np.ndarray): The velocities at the start of the step.
+            h (float): The length of the step, already taken.
+        Returns:
+            Event | None: The terminal event or the event whose handler
+            changed the state, which is then moved back to the event, or
+            None if the step stands.
+
+        Records the events in a step that has been taken, by step or by an
+        adaptive driver, and moves the time on to the end of the step or
+        back to the event the state was moved to.
+        """
+        if self._values is None:
+            self._values = self._evaluate(x0, v0)
+        t0 = self.time
+        x1, v1 = (np.array(a, dtype=float) for a in self._get_state())
+        after = self._evaluate(x1, v1)
+
+        found = []
+        for k, event in enumerate(self.events):
+            if not event.crossed(self._values[k], after[k]):
+                continue
+
+            def value(s: float, event: Event = event) -> float:
+                return float(event.function(
+                    *hermite(x0, v0, x1, v1, h, s)))
+
+            s = find_root(value, 0.0, 1.0, self._values[k], after[k])
+            found.append((s, event))
+
+        for s, event in sorted(found, key=lambda item: item[0]):
+            position, velocity = hermite(x0, v0, x1, v1, h, s)
+            record = EventRecord(event.name, t0 + s * h, position, velocity)
+            self.records.append(record)
+            changed = event.handler is not None and event.handler(record)
+
+            if event.terminal or changed:
+                self._set_state(record.position, record.velocity)
+                self.time = record.time
+                self._values = None
+                return event
+
+        self.time = t0 + h
+        self._values = after
+        return None
+
+def height(row: int = 0, axis: int = 1, ground: float = 0.0
+           ) -> EventFunction:
+    """
+    Args:
+        row (int): The particle.
+        axis (int): The vertical axis.
+        ground (float): The height of the ground.
+    Returns:
+        EventFunction: The height of the particle above the ground.
+    """
+    def function(position: np.ndarray, velocity: np.ndarray) -> float:
+        return np.atleast_2d(position)[row, axis] - ground
+    return function
+
+
+def radial_velocity(row: int, centre: int) -> EventFunction:
+    """
+    Args:
+        row (int): The orbiting particle.
+        centre (int): The particle it orbits.
+    Returns:
+        EventFunction: The rate the separation of the particles changes,
+        which rises through zero at periapsis and falls at apoapsis.
+    """
+    def function(position: np.ndarray, velocity: np.ndarray) -> float:
+        separation = position[row] - position[centre]
+        relative = velocity[row] - velocity[centre]
+        return separation @ relative / np.linalg.norm(separation)
+    return function
+
+
+def separation(row: int, other: int, radius: float) -> EventFunction:
+    """
+    Args:
+        row (int): The first particle.
+        other (int): The second particle.
+        radius (float): The sum of the particles' radii.
+    Returns:
+        EventFunction: The gap between the particles' surfaces, which falls
+        through zero when they collide.
+    """
+    def function(position: np.ndarray, velocity: np.ndarray) -> float:
+        return np.linalg.norm(position[row] - position[other]) - radius
+    return function
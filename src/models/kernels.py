@@ -0,0 +1,187 @@
+from models.particle import ParticleState, UpdateMethod, advance_states
+import numpy as np
+
+# Numba is optional, without it every step takes the NumPy path
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# the methods the fused kernel can run, by the code it is passed
+KERNEL_METHODS = {
+    UpdateMethod.EULER: 1,
+    UpdateMethod.VERLET: 2,
+    UpdateMethod.EULER_CROMER: 3,
+}
+
+
+def _accelerate(position: np.ndarray, mass: np.ndarray, G: float,
+                accel: np.ndarray) -> None:
+    """
+    Sums the acceleration of every particle due to every other particle
+    into accel, visiting each pair once.
+    """
+    n = position.shape[0]
+    accel[:, :] = 0.0
+    for i in range(n):
+        for j in range(i + 1, n):
+            dx = position[j, 0] - position[i, 0]
+            dy = position[j, 1] - position[i, 1]
+            dz = position[j, 2] - position[i, 2]
+            distance_sq = dx * dx + dy * dy + dz * dz
+            inverse_cube = G / (distance_sq * np.sqrt(distance_sq))
+            wi = mass[j] * inverse_cube
+            wj = mass[i] * inverse_cube
+            accel[i, 0] += wi * dx
+            accel[i, 1] += wi * dy
+            accel[i, 2] += wi * dz
+            accel[j, 0] -= wj * dx
+            accel[j, 1] -= wj * dy
+            accel[j, 2] -= wj * dz
+
+
+def _accelerate_test(test_position: np.ndarray, position: np.ndarray,
+                     mass: np.ndarray, G: float, accel: np.ndarray) -> None:
+    """
+    Sums the acceleration of every test particle due to the massive
+    particles into accel.
+    """
+    for i in range(test_position.shape[0]):
+        ax = 0.0
+        ay = 0.0
+        az = 0.0
+        for j in range(position.shape[0]):
+            dx = position[j, 0] - test_position[i, 0]
+            dy = position[j, 1] - test_position[i, 1]
+            dz = position[j, 2] - test_position[i, 2]
+            distance_sq = dx * dx + dy * dy + dz * dz
+            weight = G * mass[j] / (distance_sq * np.sqrt(distance_sq))
+            ax += weight * dx
+            ay += weight * dy
+            az += weight * dz
+        accel[i, 0] = ax
+        accel[i, 1] = ay
+        accel[i, 2] = az
+
+
+def _update_accelerations(position: np.ndarray, accel: np.ndarray,
+                          last_accel: np.ndarray, mass: np.ndarray,
+                          test_position: np.ndarray, test_accel: np.ndarray,
+                          test_last_accel: np.ndarray, G: float) -> None:
+    """
+    Keeps the previous accelerations and calculates the new ones, the same
+    as ParticleState.update_gravitational_acceleration on both states.
+    """
+    n = position.shape[0]
+    if n > 1:
+        last_accel[:, :] = accel
+        _accelerate(position, mass, G, accel)
+    if n > 0 and test_position.shape[0] > 0:
+        test_last_accel[:, :] = test_accel
+        _accelerate_test(test_position, position, mass, G, test_accel)
+
+
+def _run(position: np.ndarray, velocity: np.ndarray, accel: np.ndarray,
+         last_accel: np.ndarray, mass: np.ndarray,
+         test_position: np.ndarray, test_velocity: np.ndarray,
+         test_accel: np.ndarray, test_last_accel: np.ndarray,
+         G: float, deltaT: float, steps: int, method: int) -> None:
+    """
+    Advances the massive and test particles by a number of steps in one
+    call, following advance_states for the method's code.
+    """
+    for _ in range(steps):
+        if method == 2:
+            position += velocity * deltaT + 0.5 * accel * deltaT**2
+            test_position += test_velocity * deltaT + \
+                0.5 * test_accel * deltaT**2
+            _update_accelerations(position, accel, last_accel, mass,
+                                  test_position, test_accel,
+                                  test_last_accel, G)
+            velocity += 0.5 * (accel + last_accel) * deltaT
+            test_velocity += 0.5 * (test_accel + test_last_accel) * deltaT
+        elif method == 3:
+            _update_accelerations(position, accel, last_accel, mass,
+                                  test_position, test_accel,
+                                  test_last_accel, G)
+            velocity += accel * deltaT
+            position += velocity * deltaT
+            test_velocity += test_accel * deltaT
+            test_position += test_velocity * deltaT
+        else:
+            _update_accelerations(position, accel, last_accel, mass,
+                                  test_position, test_accel,
+                                  test_last_accel, G)
+            position += velocity * deltaT
+            velocity += accel * deltaT
+            test_position += test_velocity * deltaT
+            test_velocity += test_accel * deltaT
+
+
+if numba is not None:
+    # compiled in dependency order, each kernel calls the compiled
+    # versions of the ones above it
+    _accelerate = numba.njit(cache=True)(_accelerate)
+    _accelerate_test = numba.njit(cache=True)(_accelerate_test)
+    _update_accelerations = numba.njit(cache=True)(_update_accelerations)
+    _run = numba.njit(cache=True)(_run)
+
+
+def kernels_available() -> bool:
+    """
+    Returns:
+        bool: Whether the compiled kernels can be used.
+    """
+    return numba is not None
+
+
+def can_fuse(state: ParticleState, test_state: ParticleState,
+             method: UpdateMethod) -> bool:
+    """
+    Args:
+        state (ParticleState): The massive particles.
+        test_state (ParticleState): The test particles.
+        method (UpdateMethod): The update method.
+    Returns:
+        bool: Whether the kernel can advance the states, which needs a
+        direct sum, one of the kernel's methods and plain summation.
+    """
+    return method in KERNEL_METHODS and state._solver is None and \
+        test_state._sources is state and not state.compensated and \
+        not test_state.compensated
+
+
+def advance_fused(state: ParticleState, test_state: ParticleState,
+                  deltaT: float, steps: int, method: UpdateMethod,
+                  compiled: bool | None = None) -> None:
+    """
+    Args:
+        state (ParticleState): The massive particles.
+        test_state (ParticleState): The test particles, attracted by state.
+        deltaT (float): The amount of time to advance each step by.
+        steps (int): The number of steps.
+        method (UpdateMethod): The update method.
+        compiled (bool | None): Whether to use the compiled kernel, by
+        default whenever Numba is installed and the states allow it.
+    Returns:
+        None
+
+    Advances the particles by a number of steps. The compiled kernel runs
+    every step in one call, which removes the NumPy overhead that
+    dominates small systems. Otherwise each step is taken with
+    advance_states.
+    """
+    if compiled is None:
+        compiled = kernels_available()
+    if not compiled or not can_fuse(state, test_state, method):
+        for _ in range(steps):
+            advance_states([state, test_state], deltaT, method)
+        return
+
+    # the kernel works on the views in place
+    _run(state.position, state.velocity, state.acceleration,
+         state.last_acceleration, state.mass, test_state.position,
+         test_state.velocity, test_state.acceleration,
+         test_state.last_acceleration, state.G, deltaT, steps,
+         KERNEL_METHODS[method])
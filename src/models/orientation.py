@@ -0,0 +1,313 @@
+import numpy as np
+
+
+# quaternions are (w, x, y, z) in the last axis of an array, so every
+# function works on one rotation or on any stack of them at once
+
+
+def quaternion_multiply(q: np.ndarray, r: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        q (np.ndarray): The (..., 4) left quaternions.
+        r (np.ndarray): The (..., 4) right quaternions.
+    Returns:
+        np.ndarray: The (..., 4) products, the rotation r followed by q.
+    """
+    w1, x1, y1, z1 = np.moveaxis(q, -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(r, -1, 0)
+    return np.stack([
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+    ], axis=-1)
+
+
+def conjugate(q: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        q (np.ndarray): The (..., 4) unit quaternions.
+    Returns:
+        np.ndarray: The (..., 4) inverse rotations.
+    """
+    return q * np.array([1.0, -1.0, -1.0, -1.0])
+
+
+def axis_angle(axis: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        axis (np.ndarray): The (..., 3) unit axes.
+        angle (np.ndarray): The (...) angles (radians).
+    Returns:
+        np.ndarray: The (..., 4) rotations by each angle about each axis.
+    """
+    half = 0.5 * np.asarray(angle, dtype=float)[..., np.newaxis]
+    return np.concatenate([np.cos(half), np.sin(half) * axis], axis=-1)
+
+
+def rotate(q: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        q (np.ndarray): The (..., 4) unit quaternions.
+        v (np.ndarray): The (..., 3) vectors.
+    Returns:
+        np.ndarray: The (..., 3) rotated vectors.
+    """
+    w = q[..., :1]
+    u = q[..., 1:]
+    t = 2 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+def surface_point(latitude: np.ndarray, longitude: np.ndarray,
+                  radius: float = 1.0) -> np.ndarray:
+    """
+    Args:
+        latitude (np.ndarray): The latitudes (degrees).
+        longitude (np.ndarray): The longitudes east of the prime meridian
+        (degrees).
+        radius (float): The radius of the body.
+    Returns:
+        np.ndarray: The (..., 3) body fixed points, z towards the north pole
+        and x towards 0 degrees latitude and longitude.
+    """
+    latitude = np.radians(latitude)
+    longitude = np.radians(longitude)
+    return radius * np.stack([np.cos(latitude) * np.cos(longitude),
+                              np.cos(latitude) * np.sin(longitude),
+                              np.sin(latitude)], axis=-1)
+
+
+def latitude_longitude(points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        points (np.ndarray): The (..., 3) body fixed points or directions.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Their latitudes and longitudes, in
+        (-180, 180] (degrees).
+    """
+    x, y, z = np.moveaxis(points, -1, 0)
+    latitude = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    longitude = np.degrees(np.arctan2(y, x))
+    return latitude, longitude
+
+
+def _initial_quaternion(axis: np.ndarray,
+                        prime_meridian: np.ndarray) -> np.ndarray:
+    """
+    Args:
+        axis (np.ndarray): The (..., 3) unit spin axes.
+        prime_meridian (np.ndarray): The (..., 3) directions of 0 degrees
+        latitude and longitude, perpendicular to the axes.
+    Returns:
+        np.ndarray: The (..., 4) rotations from body fixed to world
+        coordinates.
+    """
+    # tilt z onto the axis, about the axis perpendicular to both
+    z = np.array([0.0, 0.0, 1.0])
+    tilt_axis = np.cross(z, axis)
+    sine = np.linalg.norm(tilt_axis, axis=-1, keepdims=True)
+    tilt_axis = np.where(sine > 1e-12, tilt_axis / np.maximum(sine, 1e-300),
+                         np.array([1.0, 0.0, 0.0]))
+    tilt = axis_angle(tilt_axis, np.arctan2(sine[..., 0], axis[..., 2]))
+
+    # then spin about the axis until x points along the prime meridian
+    x = rotate(tilt, np.array([1.0, 0.0, 0.0]))
+    phase = np.arctan2(np.einsum('...i,...i', np.cross(x, prime_meridian),
+                                 axis),
+                       np.einsum('...i,...i', x, prime_meridian))
+    return quaternion_multiply(axis_angle(axis, phase), tilt)
+
+
+class Orientation:
+    """
+    Holds the spin axis, rotation rate and orientation of a group of bodies
+    as contiguous arrays with one row per body. Every body spins at a
+    constant rate about a fixed axis, so all of them are rotated at once
+    and the orientation at any time has a closed form.
+    """
+
+    def __init__(self, capacity: int = 1) -> None:
+        self._size = 0
+        self._capacity = max(capacity, 1)
+        self._axis = np.zeros((self._capacity, 3))
+        self._rate = np.zeros(self._capacity)
+        self._initial = np.zeros((self._capacity, 4))
+        self._quaternion = np.zeros((self._capacity, 4))
+        self._set_views()
+
+        # the time advanced since the initial orientations
+        self.time = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _set_views(self) -> None:
+        """
+        Points the public arrays at the used rows of the buffers.
+        """
+        self.axis = self._axis[:self._size]
+        self.rate = self._rate[:self._size]
+        self.initial = self._initial[:self._size]
+        self.quaternion = self._quaternion[:self._size]
+
+    def _grow(self, capacity: int) -> None:
+        """
+        Args:
+            capacity (int): The new number of rows to allocate.
+        Returns:
+            None
+
+        Reallocates the buffers, keeping the used rows.
+        """
+        def grow(buffer: np.ndarray) -> np.ndarray:
+            new = np.zeros((capacity,) + buffer.shape[1:])
+            new[:self._size] = buffer[:self._size]
+            return new
+
+        self._axis = grow(self._axis)
+        self._rate = grow(self._rate)
+        self._initial = grow(self._initial)
+        self._quaternion = grow(self._quaternion)
+        self._capacity = capacity
+
+    def append(self, axis: np.ndarray, rate: float,
+               prime_meridian: np.ndarray | None = None,
+               quaternion: np.ndarray | None = None) -> int:
+        """
+        Args:
+            axis (np.ndarray): The spin axis, towards the north pole.
+            rate (float): The rotation rate (radians per second).
+            prime_meridian (np.ndarray | None): The direction of 0 degrees
+            latitude and longitude, any direction perpendicular to the axis
+            if None.
+            quaternion (np.ndarray | None): The current orientation, the
+            initial one if None.
+        Returns:
+            int: The row the body was stored in.
+
+        Adds a body to the end of the group.
+        """
+        axis = np.asarray(axis, dtype=float)
+        axis = axis / np.linalg.norm(axis)
+        if prime_meridian is None:
+            # the world x direction, or y for an axis along x
+            prime_meridian = np.array([1.0, 0.0, 0.0])
+            if abs(axis[0]) > 0.9:
+                prime_meridian = np.array([0.0, 1.0, 0.0])
+
+        # keep only the part perpendicular to the axis
+        prime_meridian = np.asarray(prime_meridian, dtype=float)
+        prime_meridian = prime_meridian - (prime_meridian @ axis) * axis
+        prime_meridian = prime_meridian / np.linalg.norm(prime_meridian)
+
+        if self._size == self._capacity:
+            self._grow(2 * self._capacity)
+
+        index = self._size
+        self._axis[index] = axis
+        self._rate[index] = rate
+        self._initial[index] = _initial_quaternion(axis, prime_meridian)
+        self._quaternion[index] = self._initial[index] if quaternion is None \
+            else quaternion
+        self._size += 1
+        self._set_views()
+        return index
+
+    def reset(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
+
+        Returns every body to its initial orientation.
+        """
+        self.quaternion[:] = self.initial
+        self.time = 0.0
+
+    def advance(self, deltaT: float, rows: np.ndarray | None = None) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to spin the bodies by.
+            rows (np.ndarray | None): The bodies to spin, every body if None.
+        Returns:
+            None
+
+        Spins the bodies about their axes in one batched rotation. The
+        result is normalised so rounding cannot build up over many steps.
+        """
+        if rows is None:
+            rows = slice(None)
+            self.time += deltaT
+        spin = axis_angle(self.axis[rows], self.rate[rows] * deltaT)
+        quaternion = quaternion_multiply(spin, self.quaternion[rows])
+        self.quaternion[rows] = quaternion / np.linalg.norm(
+            quaternion, axis=-1, keepdims=True)
+
+    def at(self, times: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            times (np.ndarray): The (T,) times since the initial orientations.
+        Returns:
+            np.ndarray: The (T, N, 4) orientation of every body at each time.
+        """
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        angle = times[:, np.newaxis] * self.rate[np.newaxis, :]
+        spin = axis_angle(self.axis[np.newaxis, :, :], angle)
+        return quaternion_multiply(spin, self.initial[np.newaxis, :, :])
+
+    def to_world(self, points: np.ndarray,
+                 times: np.ndarray | None = None) -> np.ndarray:
+        """
+        Args:
+            points (np.ndarray): The (N, 3) or (N, P, 3) body fixed points,
+            relative to each body's centre.
+            times (np.ndarray | None): The (T,) times, the current time if
+            None.
+        Returns:
+            np.ndarray: The points in world coordinates relative to each
+            body's centre, with a leading (T,) axis if times are given.
+        """
+        points = np.asarray(points, dtype=float)
+        extra = points.ndim - 2
+        if times is None:
+            quaternion = self.quaternion
+        else:
+            quaternion = self.at(times)
+        quaternion = quaternion.reshape(quaternion.shape[:-1] +
+                                        (1,) * extra + (4,))
+        return rotate(quaternion, points)
+
+    def to_body(self, directions: np.ndarray,
+                times: np.ndarray | None = None) -> np.ndarray:
+        """
+        Args:
+            directions (np.ndarray): The (N, 3) world vectors, or (T, N, 3)
+            with times.
+            times (np.ndarray | None): The (T,) times, the current time if
+            None.
+        Returns:
+            np.ndarray: The vectors in each body's fixed coordinates.
+        """
+        if times is None:
+            quaternion = self.quaternion
+        else:
+            quaternion = self.at(times)
+        return rotate(conjugate(quaternion), directions)
+
+    def sub_points(self, directions: np.ndarray,
+                   times: np.ndarray | None = None
+                   ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            directions (np.ndarray): The (N, 3) world directions from each
+            body, or (T, N, 3) with times.
+            times (np.ndarray | None): The (T,) times, the current time if
+            None.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The latitude and longitude of the
+            point on each body facing each direction (degrees). With the
+            directions to the sun these are the sub-solar points.
+        """
+        return latitude_longitude(self.to_body(directions, times))
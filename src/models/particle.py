@@ -1,4 +1,5 @@
 from __future__ import annotations
+import math
 import numpy as np
 from enum import Enum
 from typing import Callable
@@ -8,13 +9,668 @@ class UpdateMethod(Enum):
     EULER = 1
     VERLET = 2
     EULER_CROMER = 3
+    YOSHIDA4 = 4
+    FOREST_RUTH = 5
+    # needs a central body, so only a SolarSystem can use it
+    WISDOM_HOLMAN = 6
+
+
+# Both fourth order methods compose three leapfrog steps of W1, W0 and W1
+# times the step. Yoshida-4 composes kick-drift-kick leapfrogs and
+# Forest-Ruth drift-kick-drift leapfrogs, each stage is a kick (velocity)
+# or a drift (position) and the fraction of the step it covers.
+_W1 = 1 / (2 - 2**(1 / 3))
+_W0 = 1 - 2 * _W1
+COMPOSITION_STAGES: dict[UpdateMethod, list[tuple[str, float]]] = {
+    UpdateMethod.YOSHIDA4: [
+        ('kick', _W1 / 2), ('drift', _W1),
+        ('kick', (_W0 + _W1) / 2), ('drift', _W0),
+        ('kick', (_W0 + _W1) / 2), ('drift', _W1),
+        ('kick', _W1 / 2)
+    ],
+    UpdateMethod.FOREST_RUTH: [
+        ('drift', _W1 / 2), ('kick', _W1),
+        ('drift', (_W0 + _W1) / 2), ('kick', _W0),
+        ('drift', (_W0 + _W1) / 2), ('kick', _W1),
+        ('drift', _W1 / 2)
+    ],
+}
+
+
+class ForceMethod(Enum):
+    DIRECT = 1
+    BARNES_HUT = 2
+
+
+def _compensated_add(values: np.ndarray, errors: np.ndarray,
+                     increment: np.ndarray) -> None:
+    """
+    Args:
+        values (np.ndarray): The running sums, updated in place.
+        errors (np.ndarray): The rounding error of each sum, updated in
+        place.
+        increment (np.ndarray): The amount to add.
+    Returns:
+        None
+
+    Adds to the sums with Kahan summation. The part of each increment lost
+    to rounding is kept and added back with the next increment, so the
+    error no longer grows with the number of steps.
+    """
+    corrected = increment - errors
+    total = values + corrected
+    errors[...] = (total - values) - corrected
+    values[...] = total
+
+
+# scratch vectors shared by every Particle, which are stepped one at a time,
+# so a step allocates no arrays: a step's increment, a second term or the
+# direction to a body, and the sum of the accelerations
+_INCREMENT = np.zeros(3)
+_TERM = np.zeros(3)
+_TOTAL = np.zeros(3)
+
+
+class ParticleState:
+    """
+    Holds the position, velocity, acceleration and mass of a group of
+    particles as contiguous arrays with one row per particle, so the whole
+    group can be advanced with array operations instead of one particle at
+    a time.
+    """
+
+    def __init__(self, capacity: int = 1, G: float = 6.67408e-11) -> None:
+        self.G = G
+        self._size = 0
+        self._capacity = max(capacity, 1)
+        self._position = np.zeros((self._capacity, 3))
+        self._velocity = np.zeros((self._capacity, 3))
+        self._acceleration = np.zeros((self._capacity, 3))
+        self._last_acceleration = np.zeros((self._capacity, 3))
+        self._mass = np.zeros(self._capacity)
+
+        # the position, velocity and acceleration each particle resets to
+        self._initial = np.zeros((self._capacity, 3, 3))
+
+        # the rounding errors of the positions and velocities, only kept
+        # when compensated
+        self.compensated = False
+        self._position_error = np.zeros((self._capacity, 3))
+        self._velocity_error = np.zeros((self._capacity, 3))
+        self._set_views()
+
+        # replaces the direct sum when set
+        self._solver: Callable[[np.ndarray, np.ndarray, float],
+                               np.ndarray] | None = None
+
+        # test particles are attracted by the sources but not each other
+        self._sources: ParticleState | None = None
+
+        # pair indices and the pair geometry of the current positions
+        self._pairs: tuple[int, tuple[np.ndarray, np.ndarray]] | None = None
+        self._geometry: tuple | None = None
+        self._geometry_position: np.ndarray | None = None
+        self._geometry_sources: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _set_views(self) -> None:
+        """
+        Points the public arrays at the used rows of the buffers.
+        """
+        self.position = self._position[:self._size]
+        self.velocity = self._velocity[:self._size]
+        self.acceleration = self._acceleration[:self._size]
+        self.last_acceleration = self._last_acceleration[:self._size]
+        self.mass = self._mass[:self._size]
+        self.initial = self._initial[:self._size]
+        self.position_error = self._position_error[:self._size]
+        self.velocity_error = self._velocity_error[:self._size]
+
+    def _grow(self, capacity: int) -> None:
+        """
+        Args:
+            capacity (int): The new number of rows to allocate.
+        Returns:
+            None
+
+        Reallocates the buffers, keeping the used rows.
+        """
+        def grow(buffer: np.ndarray) -> np.ndarray:
+            new = np.zeros((capacity,) + buffer.shape[1:])
+            new[:self._size] = buffer[:self._size]
+            return new
+
+        self._position = grow(self._position)
+        self._velocity = grow(self._velocity)
+        self._acceleration = grow(self._acceleration)
+        self._last_acceleration = grow(self._last_acceleration)
+        self._mass = grow(self._mass)
+        self._initial = grow(self._initial)
+        self._position_error = grow(self._position_error)
+        self._velocity_error = grow(self._velocity_error)
+        self._capacity = capacity
+
+    def append(self, position: np.ndarray, velocity: np.ndarray,
+               acceleration: np.ndarray, last_acceleration: np.ndarray,
+               mass: float, initial: np.ndarray | None = None) -> int:
+        """
+        Args:
+            position (np.ndarray): The position of the particle.
+            velocity (np.ndarray): The velocity of the particle.
+            acceleration (np.ndarray): The acceleration of the particle.
+            last_acceleration (np.ndarray): The previous acceleration.
+            mass (float): The mass of the particle.
+            initial (np.ndarray | None): The (3, 3) position, velocity and
+            acceleration the particle resets to, the current ones if None.
+        Returns:
+            int: The row the particle was stored in.
+
+        Adds a particle to the end of the state.
+        """
+        if self._size == self._capacity:
+            self._grow(2 * self._capacity)
+
+        index = self._size
+        self._position[index] = position
+        self._velocity[index] = velocity
+        self._acceleration[index] = acceleration
+        self._last_acceleration[index] = last_acceleration
+        self._mass[index] = mass
+        if initial is None:
+            self._initial[index, 0] = position
+            self._initial[index, 1] = velocity
+            self._initial[index, 2] = acceleration
+        else:
+            self._initial[index] = initial
+        self._position_error[index] = 0.0
+        self._velocity_error[index] = 0.0
+        self._size += 1
+        self._set_views()
+        return index
+
+    def add_position(self, increment: np.ndarray,
+                     rows: np.ndarray | int | None = None) -> None:
+        """
+        Args:
+            increment (np.ndarray): The change in position.
+            rows (np.ndarray | int | None): The particles to move, every
+            particle if None.
+        Returns:
+            None
+
+        Moves the particles, with compensated summation if it is on.
+        """
+        if rows is None:
+            if self.compensated:
+                _compensated_add(self.position, self.position_error,
+                                 increment)
+            else:
+                self.position += increment
+            return
+
+        if self.compensated:
+            position = self.position[rows]
+            error = self.position_error[rows]
+            _compensated_add(position, error, increment)
+            self.position[rows] = position
+            self.position_error[rows] = error
+        else:
+            self.position[rows] += increment
+
+    def add_velocity(self, increment: np.ndarray,
+                     rows: np.ndarray | int | None = None) -> None:
+        """
+        Args:
+            increment (np.ndarray): The change in velocity.
+            rows (np.ndarray | int | None): The particles to accelerate,
+            every particle if None.
+        Returns:
+            None
+
+        Accelerates the particles, with compensated summation if it is on.
+        """
+        if rows is None:
+            if self.compensated:
+                _compensated_add(self.velocity, self.velocity_error,
+                                 increment)
+            else:
+                self.velocity += increment
+            return
+
+        if self.compensated:
+            velocity = self.velocity[rows]
+            error = self.velocity_error[rows]
+            _compensated_add(velocity, error, increment)
+            self.velocity[rows] = velocity
+            self.velocity_error[rows] = error
+        else:
+            self.velocity[rows] += increment
+
+    def clear_errors(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
+
+        Forgets the rounding errors, for when the positions and velocities
+        are set rather than added to.
+        """
+        self.position_error[:] = 0.0
+        self.velocity_error[:] = 0.0
+
+    def set_solver(self, solver: Callable[[np.ndarray, np.ndarray, float],
+                                          np.ndarray] | None) -> None:
+        """
+        Args:
+            solver (Callable | None): A function of the positions, masses
+            and G that returns the accelerations, or None for the direct sum.
+        Returns:
+            None
+
+        Sets the function used to calculate the gravitational acceleration.
+        """
+        self._solver = solver
+
+    def set_sources(self, sources: ParticleState | None) -> None:
+        """
+        Args:
+            sources (ParticleState | None): The massive particles that
+            attract this state's particles, or None for self-gravity.
+        Returns:
+            None
+
+        Turns the particles into test particles, which feel the sources
+        but have no effect on them or on each other.
+        """
+        self._sources = sources
+
+    def _has_forces(self) -> bool:
+        """
+        Returns:
+            bool: Whether there are any bodies to attract the particles.
+        """
+        if self._sources is not None:
+            return self._size > 0 and len(self._sources) > 0
+        return self._size > 1
+
+    def pair_geometry(self) -> tuple[np.ndarray, np.ndarray,
+                                     np.ndarray, np.ndarray]:
+        """
+        Args:
+            None
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The first
+            and second particle of each pair, the (P, 3) separation from the
+            first to the second and the (P,) inverse distance.
+
+        Calculates the geometry of every pair of particles once. The result
+        is cached until the positions change, so the forces, the potential
+        energy and the system energy of a step share it.
+        """
+        if self._geometry is not None and \
+                np.array_equal(self._geometry_position, self.position):
+            return self._geometry
+
+        n = self._size
+        if self._pairs is None or self._pairs[0] != n:
+            self._pairs = (n, np.triu_indices(n, 1))
+        i, j = self._pairs[1]
+
+        separation = self.position[j] - self.position[i]
+        inverse_distance = 1 / np.sqrt(
+            np.einsum('ij,ij->i', separation, separation))
+
+        self._geometry = (i, j, separation, inverse_distance)
+        self._geometry_position = self.position.copy()
+        return self._geometry
+
+    def test_geometry(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            None
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The (N, M, 3) separation from each
+            test particle to each source and the (N, M) inverse distance.
+
+        Calculates the geometry between the test particles and the sources,
+        cached until either of their positions change.
+        """
+        sources = self._sources
+        if self._geometry is not None and \
+                np.array_equal(self._geometry_position, self.position) and \
+                np.array_equal(self._geometry_sources, sources.position):
+            return self._geometry
+
+        separation = sources.position[np.newaxis, :, :] - \
+            self.position[:, np.newaxis, :]
+        inverse_distance = 1 / np.sqrt(
+            np.einsum('ijk,ijk->ij', separation, separation))
+
+        self._geometry = (separation, inverse_distance)
+        self._geometry_position = self.position.copy()
+        self._geometry_sources = sources.position.copy()
+        return self._geometry
+
+    def compute_test_acceleration(self) -> np.ndarray:
+        """
+        Args:
+            None
+        Returns:
+            np.ndarray: The (N, 3) gravitational acceleration of every test
+            particle due to the sources.
+
+        Sums the source to test particle accelerations in one batched pass,
+        so the cost grows with the number of sources times the number of
+        test particles.
+        """
+        separation, inverse_distance = self.test_geometry()
+        weight = self.G * self._sources.mass[np.newaxis, :] * \
+            inverse_distance**3
+        return np.einsum('ij,ijk->ik', weight, separation)
+
+    def compute_acceleration(self) -> np.ndarray:
+        """
+        Args:
+            None
+        Returns:
+            np.ndarray: The (N, 3) gravitational acceleration of every
+            particle due to every other particle.
+
+        Visits each pair once and applies the force to both particles,
+        unless a solver has been set.
+        """
+        if self._sources is not None:
+            return self.compute_test_acceleration()
+        if self._solver is not None:
+            return self._solver(self.position, self.mass, self.G)
+
+        i, j, separation, inverse_distance = self.pair_geometry()
+        field = self.G * separation * inverse_distance[:, np.newaxis]**3
+
+        # i is pulled towards j and j towards i
+        accel = np.empty((self._size, 3))
+        for k in range(3):
+            accel[:, k] = np.bincount(
+                i, weights=self.mass[j] * field[:, k], minlength=self._size)
+            accel[:, k] -= np.bincount(
+                j, weights=self.mass[i] * field[:, k], minlength=self._size)
+        return accel
+
+    def gravity_at(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            rows (np.ndarray): The rows of the particles to calculate.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The (A, 3) gravitational
+            acceleration and the (A, 3) jerk, its rate of change, of each
+            of the particles.
+
+        Sums the acceleration and jerk of only the given particles, so the
+        cost grows with their number times the number of bodies attracting
+        them. A solver, if set, still calculates the acceleration of every
+        particle.
+        """
+        sources = self if self._sources is None else self._sources
+        separation = sources.position[np.newaxis, :, :] - \
+            self.position[rows, np.newaxis, :]
+        relative_velocity = sources.velocity[np.newaxis, :, :] - \
+            self.velocity[rows, np.newaxis, :]
+        distance_sq = np.einsum('ijk,ijk->ij', separation, separation)
+
+        # a particle does not attract itself
+        if self._sources is None:
+            distance_sq[np.arange(len(rows)), rows] = np.inf
+
+        weight = self.G * sources.mass[np.newaxis, :] * distance_sq**-1.5
+        radial = np.einsum('ijk,ijk->ij', separation,
+                           relative_velocity) / distance_sq
+        jerk = np.einsum('ij,ijk->ik', weight, relative_velocity -
+                         3 * radial[:, :, np.newaxis] * separation)
+
+        if self._solver is not None and self._sources is None:
+            accel = self._solver(self.position, self.mass, self.G)[rows]
+        else:
+            accel = np.einsum('ij,ijk->ik', weight, separation)
+        return accel, jerk
+
+    def potential_energies(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The (N,) potential energy of each particle due to
+            every other particle.
+        """
+        if self._sources is not None:
+            _, inverse_distance = self.test_geometry()
+            return -self.G * self.mass * \
+                (inverse_distance @ self._sources.mass)
+
+        i, j, _, inverse_distance = self.pair_geometry()
+        pair_energy = -self.G * self.mass[i] * self.mass[j] * inverse_distance
+        return np.bincount(i, weights=pair_energy, minlength=self._size) + \
+            np.bincount(j, weights=pair_energy, minlength=self._size)
+
+    def potential_energy(self) -> float:
+        """
+        Returns:
+            float: The total potential energy of the particles, counting
+            each pair once.
+        """
+        if self._sources is not None:
+            return float(np.sum(self.potential_energies()))
+
+        i, j, _, inverse_distance = self.pair_geometry()
+        return float(-self.G * np.sum(
+            self.mass[i] * self.mass[j] * inverse_distance))
+
+    def init_acceleration(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
+
+        Initializes the acceleration of every particle.
+        """
+        if not self._has_forces():
+            return
+        self.acceleration[:] = self.compute_acceleration()
+        self.last_acceleration[:] = self.acceleration
+
+    def update_gravitational_acceleration(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
+
+        Updates the acceleration of every particle, keeping the previous
+        acceleration for the Verlet method.
+        """
+        if not self._has_forces():
+            return
+        self.last_acceleration[:] = self.acceleration
+        self.acceleration[:] = self.compute_acceleration()
+
+    def euler_update(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to update the particles by.
+        Returns:
+            None
+
+        Updates the position and velocity of every particle using the
+        Euler method.
+        """
+        self.add_position(self.velocity * deltaT)
+        self.add_velocity(self.acceleration * deltaT)
+
+    def euler_cromer_update(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to update the particles by.
+        Returns:
+            None
+
+        Updates the position and velocity of every particle using the
+        Euler-Cromer method.
+        """
+        self.add_velocity(self.acceleration * deltaT)
+        self.add_position(self.velocity * deltaT)
+
+    def verlet_update_position(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to update the particles by.
+        Returns:
+            None
+
+        Updates the position of every particle using the Verlet method.
+        """
+        self.add_position(self.velocity * deltaT +
+                          0.5 * self.acceleration * deltaT**2)
+
+    def verlet_update_velocity(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to update the particles by.
+        Returns:
+            None
+
+        Updates the velocity of every particle using the Verlet method.
+        """
+        self.add_velocity(0.5 * (self.acceleration +
+                                 self.last_acceleration) * deltaT)
+
+    def drift(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to move the particles by.
+        Returns:
+            None
+
+        Moves every particle at its current velocity.
+        """
+        self.add_position(self.velocity * deltaT)
+
+    def kick(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to accelerate the particles by.
+        Returns:
+            None
+
+        Changes the velocity of every particle by its current acceleration.
+        """
+        self.add_velocity(self.acceleration * deltaT)
+
+    def advance(self, deltaT: float, method: UpdateMethod) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to advance by.
+            method (UpdateMethod): The method used to advance the particles.
+        Returns:
+            None
+
+        Advances every particle by one step.
+        """
+        advance_states([self], deltaT, method)
+
+    def kinetic_energy(self) -> float:
+        """
+        Returns:
+            float: The total kinetic energy of the particles.
+        """
+        return float(0.5 * np.sum(self.mass * np.einsum(
+            'ij,ij->i', self.velocity, self.velocity)))
+
+    def momentum(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The total momentum of the particles.
+        """
+        return self.mass @ self.velocity
+
+
+def advance_states(states: list[ParticleState], deltaT: float,
+                   method: UpdateMethod) -> None:
+    """
+    Args:
+        states (list[ParticleState]): The states to advance, test particle
+        states after their sources.
+        deltaT (float): The amount of time to advance by.
+        method (UpdateMethod): The method used to advance the particles.
+    Returns:
+        None
+
+    Advances every particle in the states by one step. Each stage is run
+    on every state before the next stage, so all of the accelerations are
+    calculated from positions at the same time.
+    """
+    match method:
+        case UpdateMethod.VERLET:
+            # Verlet requires the position to be updated first so the
+            # acceleration can be calculated for the next step
+            for state in states:
+                state.verlet_update_position(deltaT)
+            for state in states:
+                state.update_gravitational_acceleration()
+            for state in states:
+                state.verlet_update_velocity(deltaT)
+        case UpdateMethod.EULER_CROMER:
+            for state in states:
+                state.update_gravitational_acceleration()
+            for state in states:
+                state.euler_cromer_update(deltaT)
+        case UpdateMethod.YOSHIDA4 | UpdateMethod.FOREST_RUTH:
+            # the acceleration is only recalculated once the particles have
+            # moved, so the first kick of Yoshida-4 reuses the last step's
+            moved = False
+            for stage, fraction in COMPOSITION_STAGES[method]:
+                if stage == 'drift':
+                    for state in states:
+                        state.drift(fraction * deltaT)
+                    moved = True
+                    continue
+                if moved:
+                    for state in states:
+                        state.update_gravitational_acceleration()
+                    moved = False
+                for state in states:
+                    state.kick(fraction * deltaT)
+        case _:
+            for state in states:
+                state.update_gravitational_acceleration()
+            for state in states:
+                state.euler_update(deltaT)
 
 
 class Particle:
     """
     A class that represents a particle in a simulation.
+
+    A particle is a name and an index into a ParticleState, which holds its
+    position, velocity, acceleration, mass and initial conditions. It has
+    slots rather than a __dict__ so that many bodies cost little more than
+    their rows of the state.
     """
 
+    __slots__ = ('_state', '_index', 'name', 'radius', '_method', '_bodies',
+                 '_rows', '_rows_buffer')
+
+    G = 6.67408e-11
+
+    # the step each method takes, by name so subclasses can override them
+    _UPDATES: dict[UpdateMethod, str] = {
+        UpdateMethod.EULER: 'euler_update',
+        UpdateMethod.EULER_CROMER: 'euler_cromer_update',
+        UpdateMethod.VERLET: 'verlet_update_velocity',
+        UpdateMethod.YOSHIDA4: 'composition_update',
+        UpdateMethod.FOREST_RUTH: 'composition_update'
+    }
+
     def __init__(
         self,
         position: np.ndarray = np.array([0, 0, 0], dtype=float),
@@ -22,33 +678,172 @@ class Particle:
         acceleration: np.ndarray = np.array([0, 0, 0], dtype=float),
         name: str = 'Ball',
         mass: float = 1.0,
-        method: UpdateMethod = UpdateMethod.EULER
+        method: UpdateMethod = UpdateMethod.EULER,
+        radius: float = 0.0,
+        state: ParticleState | None = None
     ):
-        self.init_position = position
-        self.init_velocity = velocity
-        self.first_acceleration = acceleration
-
-        # convert numpy arrays to arrays of floats
-        self.position = np.array(position, dtype=float)
-        self.velocity = np.array(velocity, dtype=float)
-        self.acceleration = np.array(acceleration, dtype=float)
-        self.last_acceleration = np.array(acceleration, dtype=float)
+        # the particle's data lives in a row of a ParticleState, a particle
+        # on its own gets a state of one row which is swapped for a shared
+        # state when it is added to a system, unless it is made in one
+        self._state = ParticleState() if state is None else state
+        self._index = self._state.append(position, velocity, acceleration,
+                                         acceleration, mass)
 
         self.name = name
-        self.mass = mass
-        self.G = 6.67408e-11
+
+        # only used to find collisions, a point particle never collides
+        self.radius = radius
 
         # set the update method
         self._method = method
 
-        # create a dictionary of update methods
-        self._method_map: dict[UpdateMethod, Callable[[float], None]] = {
-            UpdateMethod.EULER: self.euler_update,
-            UpdateMethod.EULER_CROMER: self.euler_cromer_update,
-            UpdateMethod.VERLET: self.verlet_update_velocity
-        }
+        self._bodies: list[Particle] | tuple = ()
+
+        # views of the particle's row, made when it is first stepped on its
+        # own and refreshed when the state reallocates its buffers
+        self._rows: tuple[np.ndarray, ...] | None = None
+        self._rows_buffer: np.ndarray | None = None
+
+    def _row_views(self) -> tuple[np.ndarray, ...]:
+        """
+        Returns:
+            tuple[np.ndarray, ...]: Views of the particle's position,
+            velocity, acceleration, last acceleration, position error and
+            velocity error.
+        """
+        state = self._state
+        if self._rows_buffer is not state._position:
+            index = self._index
+            self._rows = (state._position[index], state._velocity[index],
+                          state._acceleration[index],
+                          state._last_acceleration[index],
+                          state._position_error[index],
+                          state._velocity_error[index])
+            self._rows_buffer = state._position
+        return self._rows
+
+    def _add(self, values: np.ndarray, errors: np.ndarray,
+             increment: np.ndarray) -> None:
+        """
+        Args:
+            values (np.ndarray): A row view, updated in place.
+            errors (np.ndarray): Its rounding errors.
+            increment (np.ndarray): The amount to add.
+        Returns:
+            None
+
+        Adds to a row in place, with compensated summation if the state
+        uses it.
+        """
+        if self._state.compensated:
+            _compensated_add(values, errors, increment)
+        else:
+            np.add(values, increment, out=values)
+
+    @property
+    def position(self) -> np.ndarray:
+        return self._state.position[self._index]
+
+    @position.setter
+    def position(self, value: np.ndarray) -> None:
+        self._state.position[self._index] = value
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self._state.velocity[self._index]
+
+    @velocity.setter
+    def velocity(self, value: np.ndarray) -> None:
+        self._state.velocity[self._index] = value
+
+    @property
+    def acceleration(self) -> np.ndarray:
+        return self._state.acceleration[self._index]
+
+    @acceleration.setter
+    def acceleration(self, value: np.ndarray) -> None:
+        self._state.acceleration[self._index] = value
+
+    @property
+    def last_acceleration(self) -> np.ndarray:
+        return self._state.last_acceleration[self._index]
+
+    @last_acceleration.setter
+    def last_acceleration(self, value: np.ndarray) -> None:
+        self._state.last_acceleration[self._index] = value
 
-        self._bodies = []
+    @property
+    def mass(self) -> float:
+        return float(self._state.mass[self._index])
+
+    @mass.setter
+    def mass(self, value: float) -> None:
+        self._state.mass[self._index] = value
+
+    @property
+    def index(self) -> int:
+        """
+        Returns:
+            int: The row of the particle in its state.
+        """
+        return self._index
+
+    def _initial(self, column: int) -> np.ndarray:
+        """
+        Args:
+            column (int): 0 for the position, 1 for the velocity and 2 for
+            the acceleration.
+        Returns:
+            np.ndarray: A read only view of the initial value, so neither
+            the caller nor a step can change the state the particle resets
+            to.
+        """
+        view = self._state.initial[self._index, column]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def init_position(self) -> np.ndarray:
+        return self._initial(0)
+
+    @property
+    def init_velocity(self) -> np.ndarray:
+        return self._initial(1)
+
+    @property
+    def first_acceleration(self) -> np.ndarray:
+        return self._initial(2)
+
+    def attach(self, state: ParticleState) -> None:
+        """
+        Args:
+            state (ParticleState): The state to move the particle into.
+        Returns:
+            None
+
+        Copies the particle's data into a new row of the state, the
+        particle then reads and writes that row.
+        """
+        if state is self._state:
+            return
+        index = state.append(self.position, self.velocity, self.acceleration,
+                             self.last_acceleration, self.mass,
+                             self._state.initial[self._index])
+        self._state = state
+        self._index = index
+        self._rows = None
+        self._rows_buffer = None
+
+    def detach(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
+
+        Moves the particle out of a shared state into a state of its own.
+        """
+        self.attach(ParticleState())
 
     def reset(self) -> None:
         """
@@ -63,6 +858,19 @@ class Particle:
         self.velocity = self.init_velocity
         self.acceleration = self.first_acceleration
         self.last_acceleration = self.first_acceleration
+        self._state.position_error[self._index] = 0.0
+        self._state.velocity_error[self._index] = 0.0
+
+    def set_compensated(self, compensated: bool) -> None:
+        """
+        Args:
+            compensated (bool): Whether to keep the rounding errors of the
+            position and velocity, see ParticleState.add_position. This
+            applies to every particle in the particle's state.
+        Returns:
+            None
+        """
+        self._state.compensated = compensated
 
     def set_method(self, method: UpdateMethod) -> None:
         """
@@ -114,8 +922,12 @@ class Particle:
         Updates the position and velocity of the particle by the amount of time
         using the Euler method.
         """
-        self.position += self.velocity * deltaT
-        self.velocity += self.acceleration * deltaT
+        position, velocity, acceleration, _, position_error, \
+            velocity_error = self._row_views()
+        np.multiply(velocity, deltaT, out=_INCREMENT)
+        self._add(position, position_error, _INCREMENT)
+        np.multiply(acceleration, deltaT, out=_INCREMENT)
+        self._add(velocity, velocity_error, _INCREMENT)
 
     def verlet_update_position(self, deltaT: float) -> None:
         """
@@ -127,7 +939,13 @@ class Particle:
         Updates the position and velocity of the particle by the amount of time
         using the Verlet method.
         """
-        self.position += self.velocity * deltaT + 0.5 * self.acceleration * deltaT**2
+        position, velocity, acceleration, _, position_error, _ = \
+            self._row_views()
+        np.multiply(acceleration, 0.5, out=_TERM)
+        np.multiply(_TERM, deltaT**2, out=_TERM)
+        np.multiply(velocity, deltaT, out=_INCREMENT)
+        np.add(_INCREMENT, _TERM, out=_INCREMENT)
+        self._add(position, position_error, _INCREMENT)
 
     def verlet_update_velocity(self, deltaT: float) -> None:
         """
@@ -139,8 +957,12 @@ class Particle:
         Updates the position and velocity of the particle by the amount of time
         using the Verlet method.
         """
-        self.velocity += 0.5 * (self.acceleration +
-                                self.last_acceleration) * deltaT
+        _, velocity, acceleration, last_acceleration, _, velocity_error = \
+            self._row_views()
+        np.add(acceleration, last_acceleration, out=_INCREMENT)
+        np.multiply(_INCREMENT, 0.5, out=_INCREMENT)
+        np.multiply(_INCREMENT, deltaT, out=_INCREMENT)
+        self._add(velocity, velocity_error, _INCREMENT)
 
     def euler_cromer_update(self, deltaT: float) -> None:
         """
@@ -152,8 +974,41 @@ class Particle:
         Updates the position and velocity of the particle by the amount of time
         using the Euler-Cromer method.
         """
-        self.velocity += self.acceleration * deltaT
-        self.position += self.velocity * deltaT
+        position, velocity, acceleration, _, position_error, \
+            velocity_error = self._row_views()
+        np.multiply(acceleration, deltaT, out=_INCREMENT)
+        self._add(velocity, velocity_error, _INCREMENT)
+        np.multiply(velocity, deltaT, out=_INCREMENT)
+        self._add(position, position_error, _INCREMENT)
+
+    def composition_update(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to update the particle by.
+        Returns:
+            None
+
+        Updates the position and velocity of the particle by the amount of time
+        using the Yoshida-4 or Forest-Ruth method. The bodies are held still
+        during the step, so for bodies that move use a SolarSystem instead.
+        """
+        position, velocity, acceleration, _, position_error, \
+            velocity_error = self._row_views()
+        scratch = _INCREMENT
+        moved = False
+        for stage, fraction in COMPOSITION_STAGES[self._method]:
+            if stage == 'drift':
+                np.multiply(velocity, fraction, out=scratch)
+                np.multiply(scratch, deltaT, out=scratch)
+                self._add(position, position_error, scratch)
+                moved = True
+                continue
+            if moved:
+                self.update_gravitational_acceleration()
+                moved = False
+            np.multiply(acceleration, fraction, out=scratch)
+            np.multiply(scratch, deltaT, out=scratch)
+            self._add(velocity, velocity_error, scratch)
 
     def update(self, deltaT: float) -> None:
         """
@@ -164,7 +1019,7 @@ class Particle:
 
         Updates the position and velocity of the particle by the amount of time
         """
-        self._method_map[self._method](deltaT)
+        getattr(self, self._UPDATES[self._method])(deltaT)
 
     def update_gravitational_acceleration(self) -> None:
         """
@@ -179,41 +1034,46 @@ class Particle:
         if len(self._bodies) == 0:
             return
 
-        self.last_acceleration = self.acceleration
-
-        self.acceleration = self._calculate_acceleration(self._bodies)
+        _, _, acceleration, last_acceleration, _, _ = self._row_views()
+        last_acceleration[...] = acceleration
+        self._calculate_acceleration(self._bodies, out=acceleration)
 
-    def _calculate_acceleration(self, bodies: list[Particle]) -> np.ndarray:
+    def _calculate_acceleration(self, bodies: list[Particle],
+                                out: np.ndarray | None = None
+                                ) -> np.ndarray:
         """
         Args:
             bodies (list[Particle]): A list of particles that are exerting a
             gravitational force on the particle.
+            out (np.ndarray | None): The array to write the acceleration to,
+            a new array if None.
         Returns:
-            None
-
-        Updates the acceleration of the particle due to the gravitational force
-        of the bodies passed in.
+            np.ndarray: The acceleration of the particle due to the
+            gravitational force of the bodies passed in.
         """
-        total_acceleration = np.array([0, 0, 0], dtype=float)
+        position = self._row_views()[0]
+        mass = self.mass
+        total = _TOTAL
+        direction = _TERM
+        total.fill(0.0)
         for body in bodies:
-            acceleration = np.array([0, 0, 0], dtype=float)
-            # calculate the distance between the two particles
-            distance = np.linalg.norm(self.position - body.position)
+            # the direction to the body, then the distance between the two
+            # particles
+            np.subtract(body._row_views()[0], position, out=direction)
+            distance = math.sqrt(direction.dot(direction))
 
             # calculate the gravitational force
-            force = self.G * self.mass * body.mass / distance**2
-
-            # calculate the direction of the force
-            direction = (body.position - self.position) / distance
-
-            # calculate the acceleration
-            acceleration = force / self.mass * direction
+            force = self.G * mass * body.mass / distance**2
 
             # add the acceleration to the total acceleration
-            total_acceleration += acceleration
+            np.divide(direction, distance, out=direction)
+            np.multiply(direction, force / mass, out=direction)
+            np.add(total, direction, out=total)
 
-        # update the acceleration
-        return total_acceleration
+        if out is None:
+            return total.copy()
+        out[...] = total
+        return out
 
     @property
     def kinetic_energy(self) -> np.float64:
@@ -248,8 +1108,8 @@ class Particle:
             # calculate the distance between the two particles
             distance = np.linalg.norm(self.position - body.position)
 
-            # calculate the gravitational force
-            potential = self.G * self.mass * body.mass / distance
+            # add the potential energy of the pair
+            potential += self.G * self.mass * body.mass / distance
 
         return -float(potential)
 
@@ -263,10 +1123,11 @@ class Particle:
             self.acceleration
         )
 
-    def to_json(self):
+    def to_json(self, potential_energy: float | None = None):
         """
         Args:
-            None
+            potential_energy (float | None): The potential energy of the
+            particle, if it has already been calculated.
         Returns:
             dict: A dictionary containing the position, velocity,
             acceleration, name and mass of the particle.
@@ -276,7 +1137,8 @@ class Particle:
             'velocity': self.velocity.tolist(),
             'acceleration': self.acceleration.tolist(),
             'ke': self.kinetic_energy,
-            'pe': self.potential_energy(),
+            'pe': potential_energy if potential_energy is not None
+            else self.potential_energy(),
             'momentum': self.momentum.tolist(),
             'name': self.name,
             'mass': self.mass,
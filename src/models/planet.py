@@ -1,38 +1,126 @@
-from numpy.core.multiarray import ndarray
-from particle import Particle
+from models.particle import Particle
+from models.orientation import Orientation, rotate, surface_point
 import numpy as np
 
 
 class Planet(Particle):
+    """
+    A particle with a surface that spins about its axis. The orientation is
+    a row of an Orientation, a planet on its own gets an orientation of one
+    row which is swapped for a shared one when it is added to a system.
+    """
+
+    __slots__ = ('tangential_velocity', '_orientation', '_spin_index')
+
     def __init__(self, position: np.ndarray, velocity: np.ndarray,
                  acceleration: np.ndarray, name: str, mass: float,
                  radius: float, axis: np.ndarray, tangential_velocity: float,
                  null_island: np.ndarray):
-        super().__init__(position, velocity, acceleration, name, mass)
-        self.radius: float = radius
+        super().__init__(position, velocity, acceleration, name, mass,
+                         radius=radius)
 
-        # axis is a normalized vector pointing to the north pole
-        self.axis: ndarray = axis
+        self.tangential_velocity: float = tangential_velocity
 
-        self.north_pole: ndarray = radius * axis + position
-        self.south_pole: ndarray = -radius * axis + position
+        # axis is a vector pointing to the north pole and null island a
+        # vector pointing to 0deg, 0deg, which set the initial orientation
+        self._orientation = Orientation()
+        self._spin_index = self._orientation.append(
+            axis, tangential_velocity / radius, null_island)
 
-        self.tangential_velocity: float = tangential_velocity
+    @property
+    def orientation(self) -> Orientation:
+        return self._orientation
+
+    @property
+    def spin_index(self) -> int:
+        """
+        Returns:
+            int: The row of the planet in its orientation.
+        """
+        return self._spin_index
+
+    @property
+    def axis(self) -> np.ndarray:
+        return self._orientation.axis[self._spin_index]
+
+    @property
+    def north_pole(self) -> np.ndarray:
+        return self.radius * self.axis + self.position
+
+    @property
+    def south_pole(self) -> np.ndarray:
+        return -self.radius * self.axis + self.position
+
+    @property
+    def null_island(self) -> np.ndarray:
+        return self.surface_point(0.0, 0.0) - self.position
+
+    def attach_orientation(self, orientation: Orientation) -> None:
+        """
+        Args:
+            orientation (Orientation): The orientation to move the planet
+            into.
+        Returns:
+            None
+
+        Copies the planet's spin into a new row of the orientation, keeping
+        its initial orientation and its current one.
+        """
+        row = self._spin_index
+        old = self._orientation
+        index = orientation.append(old.axis[row], old.rate[row],
+                                   quaternion=old.quaternion[row])
+        orientation.initial[index] = old.initial[row]
+        self._orientation = orientation
+        self._spin_index = index
+
+    def detach(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
+
+        Moves the planet out of a shared state and orientation into ones
+        of its own.
+        """
+        super().detach()
+        self.attach_orientation(Orientation())
 
-        # null island is a vector pointing to 0deg, 0deg
-        self.null_island: ndarray = null_island
+    def surface_point(self, latitude: float, longitude: float) -> np.ndarray:
+        """
+        Args:
+            latitude (float): The latitude (degrees).
+            longitude (float): The longitude (degrees).
+        Returns:
+            np.ndarray: The current world position of the point on the
+            surface.
+        """
+        point = surface_point(latitude, longitude, self.radius)
+        quaternion = self._orientation.quaternion[self._spin_index]
+        return self.position + rotate(quaternion, point)
 
-    def update(self, deltaT):
-        # update null island
-        null_island_angle = self.tangential_velocity * deltaT / self.radius
+    def reset(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
 
-        # create rotation matrix
-        null_island_rotation_matrix = np.array(
-            [[np.cos(null_island_angle), -np.sin(null_island_angle)],
-             [np.sin(null_island_angle), np.cos(null_island_angle)]])
+        Resets the planet to its initial state and orientation.
+        """
+        super().reset()
+        row = self._spin_index
+        self._orientation.quaternion[row] = self._orientation.initial[row]
 
-        # rotate null island vector
-        self.null_island = np.matmul(null_island_rotation_matrix,
-                                     self.null_island)
+    def update(self, deltaT: float) -> None:
+        """
+        Args:
+            deltaT (float): The amount of time to update the planet by.
+        Returns:
+            None
 
+        Spins the planet and updates its position and velocity.
+        """
+        self._orientation.advance(deltaT, rows=np.array([self._spin_index]))
         return super().update(deltaT)
@@ -1,28 +1,147 @@
-from models.particle import Particle, UpdateMethod
+from models.particle import Particle, ParticleState, UpdateMethod, \
+    ForceMethod, advance_states
+from models.barnes_hut import barnes_hut_acceleration
+from models.block_steps import BlockSteps
+from models.wisdom_holman import wisdom_holman_step
+from models.kernels import advance_fused, kernels_available
+from models.collisions import CollisionOutcome, find_contacts
+from models.orientation import Orientation
+from models.planet import Planet
+from functools import partial
 import numpy as np
 
 
 class SolarSystem:
     def __init__(self,
                  particles: list[Particle],
-                 method: UpdateMethod
+                 method: UpdateMethod,
+                 force: ForceMethod = ForceMethod.DIRECT,
+                 opening_angle: float = 0.5,
+                 test_particles: list[Particle] | None = None
                  ) -> None:
+        if test_particles is None:
+            test_particles = []
+
         self._particles: dict[str, Particle] = {}
+        self._test_names: set[str] = set()
         self._method = method
+        self._force = force
+        self._opening_angle = opening_angle
+
+        # per particle block time steps, off when max_level is 0
+        self._block_levels = 0
+        self._block_eta = 0.01
+        self._blocks: BlockSteps | None = None
+
+        # compiled kernels are used whenever Numba is installed
+        self._compiled = kernels_available()
+
+        # compensated summation of the positions and velocities
+        self._compensated = False
+
+        # the time advanced since the last reset
+        self.time = 0.0
+
+        # collisions are only looked for once an outcome is set, the names
+        # and radii of the rows of phase_space are cached between changes
+        self._collision_outcome = CollisionOutcome.NONE
+        self._restitution = 1.0
+        self._contact_rows: tuple[list[str], np.ndarray] | None = None
+        self.collisions: list[tuple[float, str, str]] = []
+        self.stopped = False
+
+        # the spin of every planet, rotated together each advance
+        self.orientation = Orientation()
+
+        # every particle is a view onto a row of a shared state, massive
+        # particles in one and test particles in another
+        self._state = self._create_state(len(particles))
+        self._test_state = self._create_test_state(len(test_particles))
         for particle in particles:
             self.add_particle(particle)
+        for particle in test_particles:
+            self.add_particle(particle, test=True)
+
+    def _create_state(self, capacity: int) -> ParticleState:
+        state = ParticleState(capacity=capacity)
+        state.compensated = self._compensated
+        if self._force == ForceMethod.BARNES_HUT:
+            state.set_solver(partial(barnes_hut_acceleration,
+                                     theta=self._opening_angle))
+        return state
+
+    def _create_test_state(self, capacity: int) -> ParticleState:
+        state = ParticleState(capacity=capacity)
+        state.compensated = self._compensated
+        state.set_sources(self._state)
+        return state
+
+    @property
+    def states(self) -> list[ParticleState]:
+        """
+        The massive particle state followed by the test particle state.
+        """
+        return [self._state, self._test_state]
 
     def reset(self) -> None:
         for particle in self._particles.values():
             particle.reset()
-        for particle in self._particles.values():
-            particle.init_acceleration()
+        self._state.init_acceleration()
+        self._test_state.init_acceleration()
+        self._blocks = None
+        self.orientation.reset()
+        self.time = 0.0
+        self.collisions = []
+        self.stopped = False
 
-    def add_particle(self, particle: Particle) -> None:
+    def add_particle(self, particle: Particle, test: bool = False) -> None:
+        """
+        Args:
+            particle (Particle): The particle to add.
+            test (bool): Whether the particle is a test particle, which is
+            attracted by the massive particles but does not attract anything.
+        Returns:
+            None
+        """
+        if particle.name in self._particles:
+            self.remove_particle(particle.name)
+        if test:
+            particle.attach(self._test_state)
+            self._test_names.add(particle.name)
+            particle.set_bodies(self.massive_particles())
+            self._test_state.init_acceleration()
+        else:
+            particle.attach(self._state)
+        if isinstance(particle, Planet):
+            particle.attach_orientation(self.orientation)
         self._particles[particle.name] = particle
+        self._blocks = None
+        self._contact_rows = None
 
     def remove_particle(self, name: str) -> None:
-        del self._particles[name]
+        particle = self._particles.pop(name)
+        particle.detach()
+        self._test_names.discard(name)
+
+        # rebuild the states so the remaining rows stay contiguous
+        self._state = self._create_state(len(self._particles))
+        self._test_state = self._create_test_state(len(self._test_names))
+        orientation = Orientation(capacity=len(self.orientation))
+        orientation.time = self.orientation.time
+        self.orientation = orientation
+        for other in self._particles.values():
+            if other.name in self._test_names:
+                other.attach(self._test_state)
+            else:
+                other.attach(self._state)
+            if isinstance(other, Planet):
+                other.attach_orientation(self.orientation)
+        self._blocks = None
+        self._contact_rows = None
+
+    def massive_particles(self) -> list[Particle]:
+        return [particle for particle in self._particles.values()
+                if particle.name not in self._test_names]
 
     def get_particle(self, name: str) -> Particle:
         return self._particles[name]
@@ -32,15 +151,356 @@ class SolarSystem:
         for particle in self._particles.values():
             particle.set_method(method)
 
-    def advance(self, dt: float) -> None:
-        if self._method == UpdateMethod.VERLET:
-            # Verlet requires the position to be updated first so the
-            # acceleration can be calculated for the next step
+    def set_block_steps(self, max_level: int, eta: float = 0.01) -> None:
+        """
+        Args:
+            max_level (int): The number of times each step may be halved for
+            fast particles, 0 to step every particle together.
+            eta (float): The fraction of its acceleration divided by its jerk
+            that a particle may step by.
+        Returns:
+            None
+
+        Gives each particle its own power of two fraction of the step, see
+        BlockSteps. Block steps always use a kick-drift-kick leapfrog,
+        whatever the update method.
+        """
+        self._block_levels = max_level
+        self._block_eta = eta
+        self._blocks = None
+
+    @property
+    def block_steps(self) -> BlockSteps | None:
+        return self._blocks
+
+    def set_compiled(self, compiled: bool) -> None:
+        """
+        Args:
+            compiled (bool): Whether to use the compiled kernels, which are
+            only used if Numba is installed.
+        Returns:
+            None
+        """
+        self._compiled = compiled and kernels_available()
+
+    def set_collisions(self, outcome: CollisionOutcome,
+                       restitution: float = 1.0) -> None:
+        """
+        Args:
+            outcome (CollisionOutcome): What happens when two particles
+            touch, NONE to let them pass through each other.
+            restitution (float): The fraction of their approach speed
+            bouncing particles separate with.
+        Returns:
+            None
+
+        Looks for particles touching, using their radii, after every step.
+        """
+        self._collision_outcome = outcome
+        self._restitution = restitution
+
+    def set_compensated(self, compensated: bool) -> None:
+        """
+        Args:
+            compensated (bool): Whether to keep the rounding error of every
+            position and velocity and add it back in the next step.
+        Returns:
+            None
+
+        Compensated summation stops round off building up over long runs,
+        where positions of 1e12 m take increments of 1e6 m, at the cost of
+        a few more array operations per update. The compiled kernels and
+        Wisdom-Holman steps do not compensate, so with it the steps are
+        taken with NumPy.
+        """
+        self._compensated = compensated
+        for state in self.states:
+            state.compensated = compensated
+            state.clear_errors()
+
+    def advance(self, dt: float, steps: int = 1) -> bool:
+        """
+        Args:
+            dt (float): The amount of time to advance each step by.
+            steps (int): The number of steps to take.
+        Returns:
+            bool: Whether a collision has stopped the system.
+
+        Advances the system. With the compiled kernels the Euler,
+        Euler-Cromer and Verlet methods take all of the steps in one call,
+        unless collisions are looked for after each step.
+        """
+        if self.stopped:
+            return True
+        if self._collision_outcome == CollisionOutcome.NONE:
+            self._step(dt, steps)
+            self.elapse(dt * steps)
+            return False
+
+        for _ in range(steps):
+            self._step(dt, 1)
+            self.elapse(dt)
+            if self._resolve_collisions():
+                return True
+        return False
+
+    def elapse(self, dt: float) -> None:
+        """
+        Args:
+            dt (float): The time the particles have been stepped by.
+        Returns:
+            None
+
+        Advances the time and the spin of the planets, once the particles
+        have been stepped, by advance or by a driver such as DormandPrince.
+        """
+        self.time += dt
+        self.orientation.advance(dt)
+
+    def _step(self, dt: float, steps: int) -> None:
+        if self._block_levels > 0:
+            if self._blocks is None:
+                self._blocks = BlockSteps(self.states, self._block_levels,
+                                          self._block_eta)
+            for _ in range(steps):
+                self._blocks.advance(dt)
+        elif self._method == UpdateMethod.WISDOM_HOLMAN:
+            for _ in range(steps):
+                wisdom_holman_step(self._state, self._test_state, dt)
+        elif self._compiled:
+            advance_fused(self._state, self._test_state, dt, steps,
+                          self._method)
+        else:
+            for _ in range(steps):
+                advance_states(self.states, dt, self._method)
+
+    def _contact_arrays(self) -> tuple[list[str], np.ndarray]:
+        """
+        Returns:
+            tuple[list[str], np.ndarray]: The names and radii of the
+            particles, in the order of phase_space.
+        """
+        if self._contact_rows is None:
+            names = [''] * (len(self._state) + len(self._test_state))
+            radius = np.zeros(len(names))
             for particle in self._particles.values():
-                particle.verlet_update_position(dt)
+                row = self.phase_index(particle.name)
+                names[row] = particle.name
+                radius[row] = particle.radius
+            self._contact_rows = (names, radius)
+        return self._contact_rows
+
+    def _resolve_collisions(self) -> bool:
+        """
+        Returns:
+            bool: Whether a collision stopped the system.
+
+        Finds the particles that touch and applies the collision outcome to
+        each pair, in order. A particle merged away earlier in the same
+        step takes no further part.
+        """
+        names, radius = self._contact_arrays()
+        position, _ = self.phase_space()
+        first, second = find_contacts(position, radius)
+        if len(first) == 0:
+            return False
+
+        merged = False
+        for i, j in zip(first.tolist(), second.tolist()):
+            a, b = names[i], names[j]
+            if a not in self._particles or b not in self._particles:
+                continue
+            self.collisions.append((self.time, a, b))
+            match self._collision_outcome:
+                case CollisionOutcome.MERGE:
+                    self._merge(a, b)
+                    merged = True
+                case CollisionOutcome.BOUNCE:
+                    self._bounce(a, b)
+                case CollisionOutcome.STOP:
+                    self.stopped = True
+
+        if merged:
+            self._state.init_acceleration()
+            self._test_state.init_acceleration()
+        self._blocks = None
+        return self.stopped
+
+    def _merge(self, a: str, b: str) -> None:
+        """
+        Args:
+            a (str): The name of the first particle.
+            b (str): The name of the second particle.
+        Returns:
+            None
+
+        Merges two particles into the heavier one, keeping their mass,
+        momentum and volume. A test particle is absorbed by a massive
+        particle without changing it.
+        """
+        first, second = self._particles[a], self._particles[b]
+        a_test, b_test = a in self._test_names, b in self._test_names
+        if a_test != b_test:
+            survivor, absorbed = (second, first) if a_test else \
+                (first, second)
+        else:
+            survivor, absorbed = (first, second) \
+                if first.mass >= second.mass else (second, first)
+            mass = survivor.mass + absorbed.mass
+            survivor.position = (survivor.mass * survivor.position +
+                                 absorbed.mass * absorbed.position) / mass
+            survivor.velocity = (survivor.mass * survivor.velocity +
+                                 absorbed.mass * absorbed.velocity) / mass
+            survivor.mass = mass
+            survivor.radius = np.cbrt(survivor.radius**3 +
+                                      absorbed.radius**3)
+
+            # recalculated with the others after the merges, unless no
+            # other particle is left to attract it
+            survivor.acceleration = np.zeros(3)
+            survivor.last_acceleration = np.zeros(3)
+        self.remove_particle(absorbed.name)
+
+    def _bounce(self, a: str, b: str) -> None:
+        """
+        Args:
+            a (str): The name of the first particle.
+            b (str): The name of the second particle.
+        Returns:
+            None
+
+        Bounces two approaching particles apart along the line between
+        their centres. A test particle bounces off a massive particle
+        without moving it.
+        """
+        first, second = self._particles[a], self._particles[b]
+        normal = second.position - first.position
+        normal = normal / np.linalg.norm(normal)
+        approach = (second.velocity - first.velocity) @ normal
+        if approach >= 0:
+            return
+
+        a_test, b_test = a in self._test_names, b in self._test_names
+        inverse_a = 0.0 if b_test and not a_test else 1 / first.mass
+        inverse_b = 0.0 if a_test and not b_test else 1 / second.mass
+        impulse = -(1 + self._restitution) * approach / \
+            (inverse_a + inverse_b)
+        first.velocity = first.velocity - impulse * inverse_a * normal
+        second.velocity = second.velocity + impulse * inverse_b * normal
+
+    def phase_space(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Copies of the positions and
+            velocities, the massive particles followed by the test particles.
+        """
+        return (np.concatenate([self._state.position,
+                                self._test_state.position]),
+                np.concatenate([self._state.velocity,
+                                self._test_state.velocity]))
+
+    def set_phase_space(self, position: np.ndarray,
+                        velocity: np.ndarray) -> None:
+        """
+        Args:
+            position (np.ndarray): The positions, in the order of phase_space.
+            velocity (np.ndarray): The velocities, in the order of
+            phase_space.
+        Returns:
+            None
+
+        Moves the particles, recalculating their accelerations as the
+        state no longer follows from the last step.
+        """
+        n = len(self._state)
+        self._state.position[:] = position[:n]
+        self._state.velocity[:] = velocity[:n]
+        self._test_state.position[:] = position[n:]
+        self._test_state.velocity[:] = velocity[n:]
+        self._state.clear_errors()
+        self._test_state.clear_errors()
+        self._state.init_acceleration()
+        self._test_state.init_acceleration()
+        self._blocks = None
+
+    def checkpoint(self) -> dict[str, np.ndarray]:
+        """
+        Returns:
+            dict[str, np.ndarray]: Copies of everything needed to continue
+            the steps exactly, the rows in the order of phase_space. The
+            last accelerations and rounding errors are kept as Verlet and
+            compensated summation carry them from step to step.
+        """
+        names = [''] * (len(self._state) + len(self._test_state))
+        radius = np.zeros(len(names))
+        quaternion = np.zeros((len(names), 4))
         for particle in self._particles.values():
-            particle.update_gravitational_acceleration()
-            particle.update(dt)
+            row = self.phase_index(particle.name)
+            names[row] = particle.name
+            radius[row] = particle.radius
+            if isinstance(particle, Planet):
+                quaternion[row] = self.orientation.quaternion[
+                    particle.spin_index]
+
+        def rows(key: str) -> np.ndarray:
+            return np.concatenate([getattr(self._state, key),
+                                   getattr(self._test_state, key)])
+
+        checkpoint = {key: rows(key) for key in [
+            'position', 'velocity', 'acceleration', 'last_acceleration',
+            'position_error', 'velocity_error', 'mass']}
+        checkpoint['names'] = np.array(names)
+        checkpoint['radius'] = radius
+        checkpoint['quaternion'] = quaternion
+        checkpoint['time'] = np.array([self.time, self.orientation.time])
+        return checkpoint
+
+    def restore(self, checkpoint: dict[str, np.ndarray]) -> None:
+        """
+        Args:
+            checkpoint (dict[str, np.ndarray]): A checkpoint of a system with
+            the same particles, as given by checkpoint.
+        Returns:
+            None
+
+        Returns the system to the checkpoint. Particles merged away before
+        the checkpoint are removed. Block steps start again from the
+        restored state.
+        """
+        names = checkpoint['names'].tolist()
+        for name in list(self._particles):
+            if name not in names:
+                self.remove_particle(name)
+
+        for row, name in enumerate(names):
+            particle = self._particles[name]
+            state = self._test_state if name in self._test_names \
+                else self._state
+            index = particle.index
+            for key in ['position', 'velocity', 'acceleration',
+                        'last_acceleration', 'position_error',
+                        'velocity_error', 'mass']:
+                getattr(state, key)[index] = checkpoint[key][row]
+            particle.radius = float(checkpoint['radius'][row])
+            if isinstance(particle, Planet):
+                self.orientation.quaternion[particle.spin_index] = \
+                    checkpoint['quaternion'][row]
+
+        self.time, self.orientation.time = checkpoint['time'].tolist()
+        self._blocks = None
+        self._contact_rows = None
+
+    def phase_index(self, name: str) -> int:
+        """
+        Args:
+            name (str): The name of the particle.
+        Returns:
+            int: The row of the particle in phase_space.
+        """
+        index = self._particles[name].index
+        if name in self._test_names:
+            index += len(self._state)
+        return index
 
     def get_system_energy(self) -> float:
         energy = self.get_system_kinetic_energy()
@@ -48,27 +508,34 @@ class SolarSystem:
         return energy
 
     def get_system_momentum(self) -> np.ndarray:
-        momentum = np.array([0.0, 0.0, 0.0])
-        for particle in self._particles.values():
-            momentum += particle.momentum
-        return momentum
+        return self._state.momentum() + self._test_state.momentum()
 
     def get_system_potential_energy(self) -> float:
-        total_potential = 0.0
-        for particle in self._particles.values():
-            total_potential += particle.potential_energy()
-        return total_potential
+        return self._state.potential_energy() + \
+            self._test_state.potential_energy()
 
     def get_system_kinetic_energy(self) -> float:
-        total_kinetic = 0.0
-        for particle in self._particles.values():
-            total_kinetic += float(particle.kinetic_energy)
-        return total_kinetic
+        return self._state.kinetic_energy() + \
+            self._test_state.kinetic_energy()
 
     def get_state(self) -> dict[str, Particle]:
+        # Wisdom-Holman steps never need the full acceleration
+        if self._method == UpdateMethod.WISDOM_HOLMAN and \
+                self._block_levels <= 0:
+            self._state.init_acceleration()
+            self._test_state.init_acceleration()
+
+        # the pair geometry is shared with the last force evaluation
+        potential = self._state.potential_energies()
+        test_potential = self._test_state.potential_energies()
+
         state = {}
         for particle in self._particles.values():
-            state[particle.name] = particle.to_json()
+            if particle.name in self._test_names:
+                pe = test_potential[particle.index]
+            else:
+                pe = potential[particle.index]
+            state[particle.name] = particle.to_json(float(pe))
         sytem_info = {
             'energy': self.get_system_energy(),
             'momentum': self.get_system_momentum().tolist()
@@ -0,0 +1,216 @@
+from models.particle import ParticleState
+import numpy as np
+
+
+# Stumpff series coefficients, 1 / (2k + 2)! for c2 and 1 / (2k + 3)! for
+# c3 in rows, used for |z| < 1 where the closed forms lose precision
+_SERIES_TERMS = 9
+_STUMPFF_SERIES = np.array([
+    [1 / np.prod(np.arange(1, 2 * k + 3 + n, dtype=float)) for n in (0, 1)]
+    for k in range(_SERIES_TERMS)
+])[:, :, np.newaxis]
+
+
+def _stumpff(z: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        z (np.ndarray): The arguments.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The Stumpff functions c2(z) and c3(z).
+    """
+    # Horner's rule in -z for both at once, for every element as steps are
+    # usually a small part of an orbit
+    series = _STUMPFF_SERIES[-1] * np.ones_like(z)
+    for coefficients in _STUMPFF_SERIES[-2::-1]:
+        series = coefficients - z * series
+    c2, c3 = series
+
+    elliptic = z >= 1.0
+    if np.any(elliptic):
+        s = np.sqrt(z[elliptic])
+        c2[elliptic] = 2 * np.sin(s / 2)**2 / z[elliptic]
+        c3[elliptic] = (s - np.sin(s)) / s**3
+
+    hyperbolic = z <= -1.0
+    if np.any(hyperbolic):
+        s = np.sqrt(-z[hyperbolic])
+        c2[hyperbolic] = 2 * np.sinh(s / 2)**2 / -z[hyperbolic]
+        c3[hyperbolic] = (np.sinh(s) - s) / s**3
+    return c2, c3
+
+
+def kepler_drift(position: np.ndarray, velocity: np.ndarray, mu: float,
+                 deltaT: float, tolerance: float = 1e-14,
+                 max_iterations: int = 50) -> None:
+    """
+    Args:
+        position (np.ndarray): The (N, 3) positions relative to the central
+        body, updated in place.
+        velocity (np.ndarray): The (N, 3) velocities relative to the central
+        body, updated in place.
+        mu (float): G times the mass of the central body.
+        deltaT (float): The amount of time to move the bodies by.
+        tolerance (float): The relative tolerance of the universal anomaly.
+        max_iterations (int): The most Newton iterations to take.
+    Returns:
+        None
+
+    Moves every body along its two body orbit around the central body,
+    using the universal variable form of Kepler's equation so elliptic,
+    parabolic and hyperbolic orbits are all handled the same way.
+    """
+    if len(position) == 0:
+        return
+
+    r0 = np.sqrt(np.einsum('ij,ij->i', position, position))
+    v0_sq = np.einsum('ij,ij->i', velocity, velocity)
+    sigma0 = np.einsum('ij,ij->i', position, velocity) / np.sqrt(mu)
+    alpha = 2 / r0 - v0_sq / mu
+    sqrt_mu_dt = np.sqrt(mu) * deltaT
+
+    # a Taylor series in time for short steps, otherwise the mean motion
+    # for bound orbits and a straight line for unbound ones
+    chi = sqrt_mu_dt / r0 - sigma0 * sqrt_mu_dt**2 / (2 * r0**3)
+    long_step = np.abs(alpha) * (sqrt_mu_dt / r0)**2 > 0.1
+    if np.any(long_step):
+        chi[long_step] = np.where(alpha[long_step] > 0,
+                                  sqrt_mu_dt * alpha[long_step],
+                                  sqrt_mu_dt / r0[long_step])
+
+    # Newton's method converges quadratically, so once the correction is
+    # below the square root of the tolerance the next would be below it
+    for _ in range(max_iterations):
+        chi_sq = chi**2
+        c2, c3 = _stumpff(alpha * chi_sq)
+        r = chi_sq * c2 + sigma0 * chi * (1 - alpha * chi_sq * c3) + \
+            r0 * (1 - alpha * chi_sq * c2)
+        f = sigma0 * chi_sq * c2 + (1 - alpha * r0) * chi**3 * c3 + \
+            r0 * chi - sqrt_mu_dt
+        step = f / r
+        chi = chi - step
+        if np.all(np.abs(step) <= np.sqrt(tolerance) * np.abs(chi)):
+            break
+
+    chi_sq = chi**2
+    c2, c3 = _stumpff(alpha * chi_sq)
+    r = chi_sq * c2 + sigma0 * chi * (1 - alpha * chi_sq * c3) + \
+        r0 * (1 - alpha * chi_sq * c2)
+
+    # the Lagrange coefficients
+    f = 1 - chi_sq * c2 / r0
+    g = deltaT - chi**3 * c3 / np.sqrt(mu)
+    f_dot = np.sqrt(mu) / (r * r0) * chi * (alpha * chi_sq * c3 - 1)
+    g_dot = 1 - chi_sq * c2 / r
+
+    new_position = f[:, np.newaxis] * position + g[:, np.newaxis] * velocity
+    velocity[:] = f_dot[:, np.newaxis] * position + \
+        g_dot[:, np.newaxis] * velocity
+    position[:] = new_position
+
+
+def _interaction(position: np.ndarray, mass: np.ndarray, G: float,
+                 test_position: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        position (np.ndarray): The (N, 3) heliocentric positions of the
+        massive bodies other than the central body.
+        mass (np.ndarray): Their (N,) masses.
+        G (float): The gravitational constant.
+        test_position (np.ndarray): The (M, 3) heliocentric positions of the
+        test particles.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The acceleration of the massive
+        bodies and of the test particles due to the massive bodies, leaving
+        out the central body.
+    """
+    accel = np.zeros_like(position)
+    if len(position) > 1:
+        separation = position[np.newaxis, :, :] - position[:, np.newaxis, :]
+        distance_sq = np.einsum('ijk,ijk->ij', separation, separation)
+        np.fill_diagonal(distance_sq, np.inf)
+        weight = G * mass[np.newaxis, :] * distance_sq**-1.5
+        accel = np.einsum('ij,ijk->ik', weight, separation)
+
+    test_accel = np.zeros_like(test_position)
+    if len(test_position) > 0 and len(position) > 0:
+        separation = position[np.newaxis, :, :] - \
+            test_position[:, np.newaxis, :]
+        distance_sq = np.einsum('ijk,ijk->ij', separation, separation)
+        weight = G * mass[np.newaxis, :] * distance_sq**-1.5
+        test_accel = np.einsum('ij,ijk->ik', weight, separation)
+    return accel, test_accel
+
+
+def wisdom_holman_step(state: ParticleState, test_state: ParticleState,
+                       deltaT: float) -> None:
+    """
+    Args:
+        state (ParticleState): The massive particles, the most massive of
+        which is the central body.
+        test_state (ParticleState): The test particles.
+        deltaT (float): The amount of time to advance by.
+    Returns:
+        None
+
+    Advances the particles by one Wisdom-Holman step in democratic
+    heliocentric coordinates, positions relative to the central body and
+    velocities relative to the centre of mass. The motion of each body
+    around the central body is solved exactly and the forces between the
+    other bodies, and the motion of the central body, are applied as kicks
+    and drifts around it:
+
+        interaction kick (dt / 2), central drift (dt / 2), Kepler drift (dt),
+        central drift (dt / 2), interaction kick (dt / 2)
+
+    The energy error stays bounded as long as the step is small compared
+    to each orbit around the central body. A moon orbits the central body
+    in these coordinates, so its planet's pull is a kick that needs a
+    step much shorter than the moon's orbit.
+    """
+    if len(state) == 0:
+        return
+
+    mass = state.mass
+    total_mass = np.sum(mass)
+    central = int(np.argmax(mass))
+    others = np.arange(len(state)) != central
+    central_mass = mass[central]
+    mu = state.G * central_mass
+
+    # the centre of mass moves in a straight line
+    com_position = mass @ state.position / total_mass
+    com_velocity = mass @ state.velocity / total_mass
+
+    position = state.position[others] - state.position[central]
+    velocity = state.velocity[others] - com_velocity
+    body_mass = mass[others]
+    test_position = test_state.position - state.position[central]
+    test_velocity = test_state.velocity - com_velocity
+
+    def kick(dt: float) -> None:
+        accel, test_accel = _interaction(position, body_mass, state.G,
+                                         test_position)
+        velocity[:] += accel * dt
+        test_velocity[:] += test_accel * dt
+
+    def central_drift(dt: float) -> None:
+        shift = body_mass @ velocity / central_mass * dt
+        position[:] += shift
+        test_position[:] += shift
+
+    kick(deltaT / 2)
+    central_drift(deltaT / 2)
+    kepler_drift(position, velocity, mu, deltaT)
+    kepler_drift(test_position, test_velocity, mu, deltaT)
+    central_drift(deltaT / 2)
+    kick(deltaT / 2)
+
+    com_position = com_position + com_velocity * deltaT
+    central_position = com_position - body_mass @ position / total_mass
+    state.position[central] = central_position
+    state.velocity[central] = com_velocity - body_mass @ velocity / \
+        central_mass
+    state.position[others] = position + central_position
+    state.velocity[others] = velocity + com_velocity
+    test_state.position[:] = test_position + central_position
+    test_state.velocity[:] = test_velocity + com_velocity
@@ -1,15 +1,19 @@
 from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+from models.adaptive import DormandPrince
 import numpy as np
 import time
 from utils.config import EarthOrbitConfig
+from utils.checkpoint import save_checkpoint, load_checkpoint
+from utils.trajectory import TrajectoryStates, TrajectoryWriter
 from utils.utils import log_progress
 import os
-import json
 
 
 class EarthOrbit:
     def __init__(self, config: EarthOrbitConfig,
-                 output: str | None = None) -> None:
+                 output: str | None = None,
+                 checkpoint: str | None = None) -> None:
         self._config = config
         self._deltaT = self._config.deltaT
         self._method = self._config.method
@@ -21,20 +25,25 @@ class EarthOrbit:
 
         # run simulation for at least one period
         self.steps = int(self.period() / self._deltaT) + 1
-        self._data = {}
+        self._data: TrajectoryWriter | None = None
         self.init_orbit()
         if output is not None:
             self._title = output
         else:
             self._title = self._create_title()
 
+        # the steps taken and states logged before the run, once resumed
+        self._taken = 0
+        self._logged: int | None = None
+        if checkpoint is not None:
+            self.resume(checkpoint)
+
     def set_method(self, method: UpdateMethod):
         """
         Sets the update method.
         """
         self._method = method
-        self.earth.set_method(method)
-        self.satellite.set_method(method)
+        self._system.set_method(method)
 
     def _create_title(self):
         mass_str = f'{self.mass:.2e}'.replace('.', '-')
@@ -76,22 +85,55 @@ class EarthOrbit:
         self.earth.init_acceleration()
         self.satellite.init_acceleration()
 
-    def update(self):
+        # advance both bodies together so multi-stage methods see the
+        # positions of both at every stage
+        self._system = SolarSystem([self.earth, self.satellite], self._method)
+
+    def update(self, steps: int = 1):
         """
         Updates the position and velocity of the satellite.
         """
-        if self._method == UpdateMethod.VERLET:
-            self.earth.verlet_update_position(self._deltaT)
-            self.satellite.verlet_update_position(self._deltaT)
-        self.earth.update_gravitational_acceleration()
-        self.satellite.update_gravitational_acceleration()
-        self.earth.update(self._deltaT)
-        self.satellite.update(self._deltaT)
+        self._system.advance(self._deltaT, steps)
 
     def save_data(self):
+        """
+        Waits for the states logged so far to be written to the trajectory.
+        """
+        self._data.flush()
+
+    def create_writer(self) -> TrajectoryWriter:
+        """
+        Returns the writer the states are logged to, which appends to the
+        trajectory of a resumed run.
+        """
         os.makedirs('data/sims/earth_orbit/', exist_ok=True)
-        with open(f'data/sims/earth_orbit/{self._title}.json', 'w') as f:
-            json.dump(self._data, f, indent=4)
+        meta = {'sim': 'earth_orbit', 'title': self._title,
+                'config': self._config.to_dict()}
+        return TrajectoryWriter(f'data/sims/earth_orbit/{self._title}',
+                                meta, self._logged)
+
+    def resume(self, checkpoint: str):
+        """
+        Returns the earth and satellite to the checkpoint, so the run
+        appends to the states logged before it.
+        """
+        if self._config.adaptive:
+            raise ValueError('Adaptive runs cannot be resumed')
+        header, arrays = load_checkpoint(checkpoint, self._config.to_dict())
+        self._system.restore(arrays)
+        self._taken = header['step']
+        self._title = header['title']
+        self._logged = header['logged']
+        print(f'Resuming {self._title} from step {self._taken}')
+
+    def save_checkpoint(self, taken: int):
+        """
+        Saves the data logged so far, then a checkpoint to resume from.
+        """
+        self.save_data()
+        save_checkpoint('earth_orbit', self._title, taken,
+                        self._config.to_dict(), self._system.checkpoint(),
+                        {'logged': len(self._data)})
 
     def get_system_energy(self):
         """
@@ -117,26 +159,82 @@ class EarthOrbit:
         }
         return info
 
-    def run(self):
+    def get_state(self):
         """
-        Runs the simulation.
+        Returns the state of the earth and satellite.
+        """
+        return {
+            'satellite': self.satellite.to_json(),
+            '399': self.earth.to_json(),
+            'system_info': self.get_system_info()
+        }
+
+    def run_adaptive(self, start: float):
+        """
+        Runs the simulation with adaptive steps, logging every
+        log_interval * deltaT seconds of simulated time.
+        """
+        driver = DormandPrince(self._system,
+                               initial_step=self._deltaT,
+                               rtol=self._config.rtol,
+                               atol=self._config.atol,
+                               min_step=self._config.min_step,
+                               max_step=self._config.max_step)
+        interval = self._config.log_interval * self._deltaT
+        logs = self.steps // self._config.log_interval
+
+        self._data[0.0] = self.get_state()
+        for log in range(1, logs + 1):
+            driver.advance_to(log * interval)
+            log_progress(log, logs, start)
+            self._data[driver.time] = self.get_state()
+
+        stats = driver.stats()
+        print(f"\nAccepted steps: {stats['accepted']}, "
+              f"rejected steps: {stats['rejected']}, "
+              f"forced steps: {stats['forced']}")
+
+    def run(self) -> tuple[str, TrajectoryStates]:
+        """
+        Runs the simulation, streaming the states to the trajectory. The
+        states logged are written even if the run is interrupted.
         """
         start = time.time()
 
         print(f'Running simulation for {self.steps} steps...')
-        for step in range(self.steps):
-            self.update()
-            if step % self._config.log_interval == 0:
-                log_progress(step, self.steps, start)
-                step_time = step * self._deltaT
-                self._data[step_time] = {
-                    'satellite': self.satellite.to_json(),
-                    '399': self.earth.to_json(),
-                    'system_info': self.get_system_info()
-                }
+        self._data = self.create_writer()
+        try:
+            self._run(start)
+        finally:
+            self._data.close()
 
         print(f'\nSimulation finished in {time.time() - start:.2f} seconds.')
 
         self.save_data()
 
-        return self._title, self._data
+        return self._title, self._data.states()
+
+    def _run(self, start: float):
+        """
+        Takes the steps of the run, logging the states.
+        """
+        if self._config.adaptive:
+            self.run_adaptive(start)
+        else:
+            # the steps between logs are taken in one call, a resumed run
+            # starts at the log after its checkpoint
+            log_interval = self._config.log_interval
+            interval = self._config.checkpoint_interval
+            taken = self._taken
+            first = 0 if taken == 0 else taken - 1 + log_interval
+            checkpointed = taken
+            for step in range(first, self.steps, log_interval):
+                self.update(step + 1 - taken)
+                taken = step + 1
+                log_progress(step, self.steps, start)
+                step_time = step * self._deltaT
+                self._data[step_time] = self.get_state()
+                if interval > 0 and taken - checkpointed >= interval:
+                    self.save_checkpoint(taken)
+                    checkpointed = taken
+            self.update(self.steps - taken)
@@ -1,8 +1,27 @@
-from models.particle import Particle, UpdateMethod
+from models.particle import Particle, UpdateMethod, COMPOSITION_STAGES
+from models.events import Event, EventDetector, EventRecord, height, \
+    hermite, find_root
 from utils.config import ProjectileConfig
+from utils.checkpoint import save_checkpoint, load_checkpoint, \
+    read_json, write_json
 from utils.utils import log_progress
 import numpy as np
 import json
+import os
+
+
+def check_method(method: UpdateMethod) -> None:
+    """
+    Args:
+        method (UpdateMethod): The method of a projectile run.
+    Returns:
+        None
+
+    Raises a ValueError for a method a projectile cannot be stepped with.
+    """
+    if method == UpdateMethod.WISDOM_HOLMAN:
+        raise ValueError('Projectiles have no central body for the '
+                         'Wisdom-Holman method')
 
 
 class ProjectileSim:
@@ -12,10 +31,15 @@ class ProjectileSim:
     Args:
         config (ProjectileConfig): The configuration for the simulation.
         output_file (str) (optional): The output file for the simulation.
+        checkpoint (str) (optional): A checkpoint to resume the run from,
+        appending to its output file.
     """
 
     def __init__(self, config: ProjectileConfig,
-                 output_file: str | None = None):
+                 output_file: str | None = None,
+                 checkpoint: str | None = None):
+        check_method(config.method)
+
         self.config = config
         self.particle = Particle(
             position=self.config.position,
@@ -34,18 +58,102 @@ class ProjectileSim:
         else:
             self.output_file = self._create_title()
 
-    def advance(self) -> None:
+        # events found between steps, by default the run stops when the
+        # particle comes down to the ground
+        self.events: list[Event] = [
+            Event('ground', height(), direction=-1, terminal=True)
+        ]
+        self._detector: EventDetector | None = None
+
+        # the steps taken, time and events found before the run, set when
+        # it is resumed from a checkpoint
+        self._taken = 0
+        self._time = 0.0
+        self._records: list[EventRecord] = []
+        if checkpoint is not None:
+            self.resume(checkpoint)
+
+    def advance(self, deltaT: float | None = None) -> None:
         """
         Args:
-            None
+            deltaT (float | None): The amount of time to advance by,
+            deltaT from the config if None.
         Returns:
             None
 
         Advances the simulation by one step.
         """
+        if deltaT is None:
+            deltaT = self.deltaT
         if self._method == UpdateMethod.VERLET:
-            self.particle.verlet_update_position(self.deltaT)
-        self.particle.update(self.deltaT)
+            self.particle.verlet_update_position(deltaT)
+        self.particle.update(deltaT)
+
+    def get_state(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.particle.position, self.particle.velocity
+
+    def set_state(self, position: np.ndarray, velocity: np.ndarray) -> None:
+        self.particle.position = position
+        self.particle.velocity = velocity
+
+    @property
+    def event_records(self) -> list:
+        """
+        Returns:
+            list[EventRecord]: The events found in the last run.
+        """
+        if self._detector is None:
+            return []
+        return self._detector.records
+
+    def resume(self, checkpoint: str) -> None:
+        """
+        Args:
+            checkpoint (str): The checkpoint file.
+        Returns:
+            None
+
+        Returns the particle to the checkpoint and loads the data logged
+        before it, so the run continues from the step after it.
+        """
+        header, arrays = load_checkpoint(checkpoint, self.config.to_dict())
+        self.particle.position = arrays['position']
+        self.particle.velocity = arrays['velocity']
+        self.particle.acceleration = arrays['acceleration']
+        self.particle.last_acceleration = arrays['last_acceleration']
+        self._taken = header['step']
+        self._time = header['time']
+        self._records = [EventRecord(record['name'], record['time'],
+                                     np.array(record['position']),
+                                     np.array(record['velocity']))
+                         for record in header['records']]
+        self.output_file = header['title']
+        self._data = read_json(
+            f'data/sims/projectile/{self.output_file}.json')
+        print(f'Resuming {self.output_file} from step {self._taken}')
+
+    def save_checkpoint(self, taken: int) -> None:
+        """
+        Args:
+            taken (int): The number of steps taken.
+        Returns:
+            None
+
+        Saves the data logged so far, then a checkpoint to resume from.
+        """
+        self.save()
+        arrays = {
+            'position': self.particle.position,
+            'velocity': self.particle.velocity,
+            'acceleration': self.particle.acceleration,
+            'last_acceleration': self.particle.last_acceleration,
+        }
+        save_checkpoint('projectile', self.output_file, taken,
+                        self.config.to_dict(), arrays, {
+                            'time': self._detector.time,
+                            'records': [record.to_json() for record in
+                                        self._detector.records],
+                        })
 
     def _create_title(self) -> str:
         """
@@ -86,6 +194,7 @@ class ProjectileSim:
 
         Sets the method for the simulation.
         """
+        check_method(method)
         self._method = method
         self.particle.set_method(method)
 
@@ -99,8 +208,8 @@ class ProjectileSim:
         Saves the data to a json file.
         """
         print(f'Saving data to data/sims/projectile/{self.output_file}.json..')
-        with open(f'data/sims/projectile/{self.output_file}.json', 'w') as f:
-            json.dump(self._data, f)
+        write_json(f'data/sims/projectile/{self.output_file}.json',
+                   self._data)
         print('Data saved!')
 
         return self.output_file
@@ -117,12 +226,21 @@ class ProjectileSim:
         """
 
         print('Running simulation\n')
-        for step in range(self.steps):
-            self.advance()
-
-            # Stop simulation if particle hits ground
-            if self.particle.position[1] <= 0:
-                print('Particle hit ground!')
+        self._detector = EventDetector(self.events, self.get_state,
+                                       self.set_state, self.advance)
+        self._detector.reset(self._time)
+        self._detector.records = list(self._records)
+        interval = self.config.checkpoint_interval
+        for step in range(self._taken, self.steps):
+            # a terminal event, such as hitting the ground, leaves the
+            # particle at the event, which is logged as the last state
+            if self._detector.step(self.deltaT):
+                record = self._detector.records[-1]
+                print(f'Particle stopped by {record.name} at '
+                      f'{record.time:.6f}s!')
+                self._data[record.time] = {
+                    "projectile": self.particle.to_json()
+                }
                 break
 
             if step % self.log_interval == 0:
@@ -131,9 +249,244 @@ class ProjectileSim:
                     "projectile": self.particle.to_json()
                 }
                 log_progress(step, self.steps)
+            if interval > 0 and (step + 1) % interval == 0:
+                self.save_checkpoint(step + 1)
 
         print('\nSimulation finished!')
         if output is not None:
             self.output_file = output
         title = self.save()
         return title, self._data
+
+
+class ProjectileEnsemble:
+    """
+    Args:
+        config (ProjectileConfig): The configuration for the simulation,
+        which gives the step, method and logging of every member and the
+        initial state of any member not given below.
+        position (np.ndarray | None): The (M, 3) initial positions.
+        velocity (np.ndarray | None): The (M, 3) initial velocities.
+        mass (np.ndarray | None): The (M,) masses.
+        gravity (np.ndarray | None): The (M,) vertical accelerations.
+        output_file (str) (optional): The output folder for the simulation.
+
+    Runs many projectile simulations together. The members are stepped as
+    (M, 3) arrays and each is retired when it hits the ground, so a sweep
+    over launch velocities or gravity takes about as long as one run.
+    Arrays of one row are shared by every member.
+    """
+
+    def __init__(self, config: ProjectileConfig,
+                 position: np.ndarray | None = None,
+                 velocity: np.ndarray | None = None,
+                 mass: np.ndarray | None = None,
+                 gravity: np.ndarray | None = None,
+                 output_file: str | None = None):
+        check_method(config.method)
+
+        self.config = config
+        self.deltaT = config.deltaT
+        self.steps = config.steps
+        self.log_interval = config.log_interval
+        self._method = config.method
+
+        position = np.atleast_2d(config.position if position is None
+                                 else position).astype(float)
+        velocity = np.atleast_2d(config.velocity if velocity is None
+                                 else velocity).astype(float)
+        mass = np.atleast_1d(config.mass if mass is None
+                             else mass).astype(float)
+        gravity = np.atleast_1d(config.gravity if gravity is None
+                                else gravity).astype(float)
+        self.members = np.broadcast_shapes(
+            (len(position),), (len(velocity),), mass.shape, gravity.shape)[0]
+
+        self.init_position = np.broadcast_to(
+            position, (self.members, 3)).copy()
+        self.init_velocity = np.broadcast_to(
+            velocity, (self.members, 3)).copy()
+        self.mass = np.broadcast_to(mass, (self.members,)).copy()
+        self.acceleration = np.zeros((self.members, 3))
+        self.acceleration[:, 1] = gravity
+
+        # the time and final state of each member when it hit the ground
+        self.landing_time = np.full(self.members, np.nan)
+        self.landing_position = np.full((self.members, 3), np.nan)
+
+        self._data: list[dict] = []
+        if output_file:
+            self.output_file = output_file
+        else:
+            self.output_file = self._create_title()
+
+    def _create_title(self) -> str:
+        """
+        Args:
+            None
+        Returns:
+            title (str): The title of the output folder.
+
+        Generates a title for the output folder based on the config.
+        """
+        title = f'ensemble_{self.members}_'
+        title += f'{self.config.method.name.lower()}_'
+        title += f'{self.config.steps}_'
+        dt_str = str(self.config.deltaT).replace('.', '-')
+        title += f'{dt_str}'
+        return title
+
+    def advance(self, position: np.ndarray, velocity: np.ndarray,
+                acceleration: np.ndarray) -> None:
+        """
+        Args:
+            position (np.ndarray): The (A, 3) positions, updated in place.
+            velocity (np.ndarray): The (A, 3) velocities, updated in place.
+            acceleration (np.ndarray): The (A, 3) constant accelerations.
+        Returns:
+            None
+
+        Advances the members by one step, in the same way as ProjectileSim
+        advances its particle.
+        """
+        dt = self.deltaT
+        match self._method:
+            case UpdateMethod.VERLET:
+                position += velocity * dt + 0.5 * acceleration * dt**2
+                velocity += acceleration * dt
+            case UpdateMethod.EULER_CROMER:
+                velocity += acceleration * dt
+                position += velocity * dt
+            case UpdateMethod.YOSHIDA4 | UpdateMethod.FOREST_RUTH:
+                for stage, fraction in COMPOSITION_STAGES[self._method]:
+                    if stage == 'drift':
+                        position += velocity * fraction * dt
+                    else:
+                        velocity += acceleration * fraction * dt
+            case _:
+                position += velocity * dt
+                velocity += acceleration * dt
+
+    def _to_json(self, members: np.ndarray, position: np.ndarray,
+                 velocity: np.ndarray) -> list[dict]:
+        """
+        Args:
+            members (np.ndarray): The members logged.
+            position (np.ndarray): Their (A, 3) positions.
+            velocity (np.ndarray): Their (A, 3) velocities.
+        Returns:
+            list[dict]: Each member's state in the format of
+            Particle.to_json.
+        """
+        mass = self.mass[members]
+        ke = 0.5 * mass * np.einsum('ij,ij->i', velocity, velocity)
+        columns = zip(position.tolist(), velocity.tolist(),
+                      self.acceleration[members].tolist(), ke.tolist(),
+                      (mass[:, np.newaxis] * velocity).tolist(),
+                      mass.tolist())
+        return [{
+            'position': p,
+            'velocity': v,
+            'acceleration': a,
+            'ke': k,
+            'pe': 0.0,
+            'momentum': momentum,
+            'name': 'Ball',
+            'mass': m,
+        } for p, v, a, k, momentum, m in columns]
+
+    def run(self) -> tuple[str, list[dict]]:
+        """
+        Args:
+            None
+        Returns:
+            title (str): The title of the output folder.
+            data (list[dict]): The data of each member, in the format of
+            ProjectileSim.run.
+
+        Runs every member until it hits the ground or the steps run out.
+        """
+        print(f'Running {self.members} simulations\n')
+
+        # only the members still in the air are stepped
+        active = np.arange(self.members)
+        position = self.init_position.copy()
+        velocity = self.init_velocity.copy()
+        acceleration = self.acceleration.copy()
+        logs: list[tuple[float, np.ndarray, np.ndarray, np.ndarray]] = []
+
+        time = 0.0
+        for step in range(self.steps):
+            last_position = position.copy()
+            last_velocity = velocity.copy()
+            self.advance(position, velocity, acceleration)
+            start, time = time, time + self.deltaT
+
+            landed = position[:, 1] <= 0
+            if np.any(landed):
+                # each landing is found within the step in the same way
+                # as ProjectileSim's ground event
+                for row in np.flatnonzero(landed):
+                    x0, v0 = last_position[row], last_velocity[row]
+                    x1, v1 = position[row], velocity[row]
+
+                    def height(s: float) -> float:
+                        return float(hermite(x0, v0, x1, v1,
+                                             self.deltaT, s)[0][1])
+
+                    s = find_root(height, 0.0, 1.0, float(x0[1]),
+                                  float(x1[1]))
+                    landing_position, landing_velocity = hermite(
+                        x0, v0, x1, v1, self.deltaT, s)
+                    member = active[row]
+                    self.landing_time[member] = float(start +
+                                                      s * self.deltaT)
+                    self.landing_position[member] = landing_position
+                    logs.append((self.landing_time[member],
+                                 active[row:row + 1],
+                                 landing_position[np.newaxis],
+                                 landing_velocity[np.newaxis]))
+
+                flying = ~landed
+                active = active[flying]
+                position = position[flying]
+                velocity = velocity[flying]
+                acceleration = acceleration[flying]
+                if len(active) == 0:
+                    break
+
+            if step % self.log_interval == 0:
+                logs.append(((step + 1) * self.deltaT, active,
+                             position.copy(), velocity.copy()))
+                log_progress(step, self.steps)
+
+        print(f'\n{np.count_nonzero(~np.isnan(self.landing_time))} of '
+              f'{self.members} projectiles hit the ground')
+
+        self._data = [{} for _ in range(self.members)]
+        for step_time, members, log_position, log_velocity in logs:
+            states = self._to_json(members, log_position, log_velocity)
+            for member, state in zip(members.tolist(), states):
+                self._data[member][step_time] = {'projectile': state}
+
+        return self.output_file, self._data
+
+    def save(self) -> str:
+        """
+        Args:
+            None
+        Returns:
+            title (str): The title of the output folder.
+
+        Saves the data of each member to its own json file, which SimData
+        reads in the same way as a ProjectileSim's.
+        """
+        folder = f'data/sims/projectile/{self.output_file}'
+        print(f'Saving data to {folder}..')
+        os.makedirs(folder, exist_ok=True)
+        for member, data in enumerate(self._data):
+            with open(f'{folder}/{member}.json', 'w') as f:
+                json.dump(data, f)
+        print('Data saved!')
+
+        return self.output_file
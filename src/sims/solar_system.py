@@ -1,10 +1,15 @@
 from models.solar_system import SolarSystem
+from models.adaptive import DormandPrince
 from models.particle import Particle
+from models.planet import Planet
+from models.events import Event, EventDetector
 from utils.config import SolarSystemConfig
 from utils.nasa_data import NasaQuery
+from utils.checkpoint import save_checkpoint, load_checkpoint
+from utils.trajectory import TrajectoryStates, TrajectoryWriter
 from utils.utils import log_progress
+import numpy as np
 import time
-import json
 
 
 class SolarSystemSim:
@@ -12,28 +17,53 @@ class SolarSystemSim:
     Args:
         config (SolarSystemConfig): The configuration for the simulation.
         save_file (str) (optional): The output file for the simulation.
+        checkpoint (str) (optional): A checkpoint to resume the run from,
+        appending to its output file.
 
     A class that represents a solar system simulation.
     """
 
     def __init__(self, config: SolarSystemConfig,
-                 save_file: str | None = None):
+                 save_file: str | None = None,
+                 checkpoint: str | None = None):
         self._ts: float = 0.0
         self._config = config
         self._method = self._config.method
         self._deltaT = self.get_deltaT()
         self._particle_ids = self._config.particles
+        self._test_particle_ids = self._config.test_particles
         self._start_time = self._config.start_time
         self._steps = self._config.steps
         self._nq = NasaQuery(start_time=self._start_time)
         self._particles = self.load_particles()
+        self._test_particles = self.load_test_particles()
         self._sim_init_time = time.time()
-        self._solar_system = SolarSystem(self._particles, self._method)
+        self._solar_system = SolarSystem(self._particles, self._method,
+                                         self._config.force,
+                                         self._config.opening_angle,
+                                         self._test_particles)
+        self._solar_system.set_compiled(self._config.jit)
+        self._solar_system.set_compensated(self._config.compensated)
+        self._solar_system.set_collisions(self._config.collisions,
+                                          self._config.restitution)
+        if self._config.block_levels > 0:
+            self._solar_system.set_block_steps(self._config.block_levels,
+                                               self._config.block_eta)
         if save_file is not None:
             self._save_file = save_file
         else:
             self._save_file = self._create_title()
-        self._data = {}
+        self._data: TrajectoryWriter | None = None
+
+        # the steps taken and states logged before the run, once resumed
+        self._taken = 0
+        self._logged: int | None = None
+        if checkpoint is not None:
+            self.resume(checkpoint)
+
+        # events found between steps, which turn off fusing steps
+        self.events: list[Event] = []
+        self._detector: EventDetector | None = None
 
     def get_deltaT(self) -> float:
         return self._config.deltaT
@@ -49,11 +79,48 @@ class SolarSystemSim:
         as the initial state.
         """
 
+        particles = self._create_particles(self._particle_ids)
+
+        for particle in particles:
+            other_particles = particles.copy()
+            other_particles.remove(particle)
+            particle.set_bodies(other_particles)
+
+        for particle in particles:
+            particle.init_acceleration()
+
+        return particles
+
+    def load_test_particles(self) -> list[Particle]:
+        """
+        Args:
+            None
+        Returns:
+            particles (list[Particle]): A list of test particles.
+
+        Initializes the test particles in the simulation using NASA data.
+        Test particles are only attracted by the massive particles, their
+        bodies and accelerations are set by the SolarSystem.
+        """
+        if len(self._test_particle_ids) == 0:
+            return []
+
+        return self._create_particles(self._test_particle_ids)
+
+    def _create_particles(self, particle_ids: list[int]) -> list[Particle]:
+        """
+        Args:
+            particle_ids (list[int]): The NASA ids of the bodies.
+        Returns:
+            particles (list[Particle]): A list of particles.
+
+        Creates a particle for each body from its NASA data.
+        """
         particles = []
-        particles_data = self._nq.get_data(self._particle_ids)
+        particles_data = self._nq.get_data(particle_ids)
 
         # get timestamp from first particle
-        self._ts = particles_data[self._particle_ids[0]].ts
+        self._ts = particles_data[particle_ids[0]].ts
 
         for particle_id, data in particles_data.items():
             print(f'Loading particle {particle_id}...')
@@ -63,20 +130,30 @@ class SolarSystemSim:
             mass = data.object_data.mass
             name = particle_id
 
-            particle = Particle(position=position,
-                                velocity=velocity,
-                                mass=mass,
-                                name=str(name),
-                                method=self._method)
-            particles.append(particle)
-
-        for particle in particles:
-            other_particles = particles.copy()
-            other_particles.remove(particle)
-            particle.set_bodies(other_particles)
+            radius = data.object_data.radius
+            rot_rate = float(data.object_data.rot_rate)
 
-        for particle in particles:
-            particle.init_acceleration()
+            # bodies that spin are planets, the pole directions are not
+            # parsed so every axis starts along the ecliptic north
+            if rot_rate != 0.0 and radius > 0.0:
+                particle = Planet(position=position,
+                                  velocity=velocity,
+                                  acceleration=np.zeros(3),
+                                  name=str(name),
+                                  mass=mass,
+                                  radius=radius,
+                                  axis=np.array([0.0, 0.0, 1.0]),
+                                  tangential_velocity=rot_rate * radius,
+                                  null_island=np.array([1.0, 0.0, 0.0]))
+                particle.set_method(self._method)
+            else:
+                particle = Particle(position=position,
+                                    velocity=velocity,
+                                    mass=mass,
+                                    name=str(name),
+                                    method=self._method,
+                                    radius=radius)
+            particles.append(particle)
 
         return particles
 
@@ -91,16 +168,77 @@ class SolarSystemSim:
         """
         self._solar_system.reset()
 
-    def advance(self) -> None:
+    def resume(self, checkpoint: str) -> None:
         """
         Args:
+            checkpoint (str): The checkpoint file.
+        Returns:
             None
+
+        Returns the system to the checkpoint, so the run continues from the
+        step after it and appends to the states logged before it.
+        """
+        if self._config.adaptive:
+            raise ValueError('Adaptive runs cannot be resumed')
+        header, arrays = load_checkpoint(checkpoint, self._config.to_dict())
+        self._solar_system.restore(arrays)
+        self._taken = header['step']
+        self._ts = header['ts']
+        self._save_file = header['title']
+        self._logged = header['logged']
+        print(f'Resuming {self._save_file} from step {self._taken}')
+
+    def save_checkpoint(self, taken: int) -> None:
+        """
+        Args:
+            taken (int): The number of steps taken.
         Returns:
             None
 
-        Advances the simulation by one step.
+        Saves the data logged so far, then a checkpoint to resume from.
         """
-        self._solar_system.advance(self._deltaT)
+        self.save_data()
+        save_checkpoint('solarsystem', self._save_file, taken,
+                        self._config.to_dict(),
+                        self._solar_system.checkpoint(),
+                        {'ts': self._ts, 'logged': len(self._data)})
+
+    def phase_index(self, name: str) -> int:
+        """
+        Args:
+            name (str): The name of the particle.
+        Returns:
+            int: The row of the particle in the states events are given.
+        """
+        return self._solar_system.phase_index(name)
+
+    @property
+    def event_records(self) -> list:
+        """
+        Returns:
+            list[EventRecord]: The events found in the last run.
+        """
+        if self._detector is None:
+            return []
+        return self._detector.records
+
+    def advance(self, steps: int = 1) -> bool:
+        """
+        Args:
+            steps (int): The number of steps to take.
+        Returns:
+            bool: Whether a terminal event or a collision stopped the steps.
+
+        Advances the simulation by a number of steps. With events each step
+        is checked for them, otherwise the steps are taken in one call.
+        """
+        if self._detector is None:
+            return self._solar_system.advance(self._deltaT, steps)
+        for _ in range(steps):
+            if self._detector.step(self._deltaT) or \
+                    self._solar_system.stopped:
+                return True
+        return False
 
     def _create_title(self) -> str:
         """
@@ -126,37 +264,156 @@ class SolarSystemSim:
         Returns:
             title (str): The title of the output file.
 
-        Saves the simulation data to a json file.
+        Waits for the states logged so far to be written to the trajectory.
         """
-        print(f'Saving data to {self._save_file}.json')
-        with open(f'data/sims/solarsystem/{self._save_file}.json', 'w') as f:
-            json.dump(self._data, f, indent=4)
+        print(f'Saving data to {self._save_file}.traj')
+        self._data.flush()
         return self._save_file
 
-    def run(self) -> tuple[str, dict]:
+    def create_writer(self) -> TrajectoryWriter:
+        """
+        Args:
+            None
+        Returns:
+            TrajectoryWriter: The writer the states are logged to, which
+            appends to the trajectory of a resumed run.
+        """
+        meta = {'sim': 'solarsystem', 'title': self._save_file,
+                'config': self._config.to_dict()}
+        return TrajectoryWriter(f'data/sims/solarsystem/{self._save_file}',
+                                meta, self._logged)
+
+    def run_adaptive(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
+
+        Runs the simulation for steps * deltaT seconds with adaptive steps,
+        logging every log_interval * deltaT seconds of simulated time so
+        the samples are evenly spaced.
+        """
+        driver = DormandPrince(self._solar_system,
+                               initial_step=self._deltaT,
+                               rtol=self._config.rtol,
+                               atol=self._config.atol,
+                               min_step=self._config.min_step,
+                               max_step=self._config.max_step)
+        interval = self._config.log_interval * self._deltaT
+        logs = self._steps // self._config.log_interval
+
+        # the events are checked on each accepted step, interpolating
+        # within it as on the fixed steps
+        if self.events:
+            self._detector = EventDetector(
+                self.events, self._solar_system.phase_space,
+                self._solar_system.set_phase_space,
+                self._solar_system.advance)
+            self._detector.reset(self._solar_system.time)
+
+        self._data[self._ts] = self._solar_system.get_state()
+        for log in range(1, logs + 1):
+            stopped = driver.advance_to(log * interval, self._detector)
+            log_progress(log, logs, self._sim_init_time)
+            self._data[self._ts + driver.time] = \
+                self._solar_system.get_state()
+            if stopped:
+                break
+        for record in self.event_records:
+            print(f'\n{record.name} at {record.time:.1f}s')
+
+        stats = driver.stats()
+        print(f"\nAccepted steps: {stats['accepted']}, "
+              f"rejected steps: {stats['rejected']}, "
+              f"forced steps: {stats['forced']}")
+
+    def run(self) -> tuple[str, TrajectoryStates]:
         """
         Args:
             None
         Returns:
             title (str): The title of the output file.
-            data (dict): The simulation data.
+            data (TrajectoryStates): The simulation data, read from the
+            trajectory as it is looked up.
 
-        Runs the simulation.
+        Runs the simulation, streaming the states to the trajectory. The
+        states logged are written even if the run is interrupted.
         """
 
         print('\n')
         print('Running simulation...')
-        for step in range(self._steps):
-            self.advance()
+        self._data = self.create_writer()
+        try:
+            self._run()
+        finally:
+            self._data.close()
+
+        print('\n')
+        print('Saving data...')
+        title = self.save_data()
+
+        return title, self._data.states()
+
+    def _run(self) -> None:
+        """
+        Args:
+            None
+        Returns:
+            None
 
-            step_time = self._ts + (step * self._deltaT)
+        Takes the steps of the run, logging the states.
+        """
+        if self._config.adaptive:
+            self.run_adaptive()
+        else:
+            if self.events:
+                self._detector = EventDetector(
+                    self.events, self._solar_system.phase_space,
+                    self._solar_system.set_phase_space,
+                    self._solar_system.advance)
+                self._detector.reset(self._solar_system.time)
+
+            # the steps between logs are taken in one call, which the
+            # compiled kernels run without returning to Python. A resumed
+            # run starts at the log after its checkpoint
+            interval = self._config.checkpoint_interval
+            taken = self._taken
+            first = 0 if taken == 0 else \
+                taken - 1 + self._config.log_interval
+            checkpointed = taken
+            stopped = False
+            for step in range(first, self._steps, self._config.log_interval):
+                stopped = self.advance(step + 1 - taken)
+                taken = step + 1
+                if stopped:
+                    break
 
-            if step % self._config.log_interval == 0:
+                step_time = self._ts + (step * self._deltaT)
                 log_progress(step, self._steps, self._sim_init_time)
                 self._data[step_time] = self._solar_system.get_state()
+                if interval > 0 and taken - checkpointed >= interval:
+                    self.save_checkpoint(taken)
+                    checkpointed = taken
+            if not stopped:
+                stopped = self.advance(self._steps - taken)
 
-        print('\n')
-        print('Saving data...')
-        title = self.save_data()
+            # the state at a terminal event or collision is the last one
+            # logged
+            if stopped:
+                stop_time = self._solar_system.time \
+                    if self._detector is None else self._detector.time
+                self._data[self._ts + stop_time] = \
+                    self._solar_system.get_state()
+            for record in self.event_records:
+                print(f'\n{record.name} at {record.time:.1f}s')
+            for collision_time, first, second in \
+                    self._solar_system.collisions:
+                print(f'\n{first} hit {second} at {collision_time:.1f}s')
 
-        return title, self._data
+            blocks = self._solar_system.block_steps
+            if blocks is not None:
+                stats = blocks.stats()
+                print(f"\nForce evaluations: {stats['evaluations']}, "
+                      f"at the smallest step: "
+                      f"{stats['single_step_evaluations']}")
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+
+CHECKPOINT_DIR = 'data/checkpoints'
+
+# checkpoints older than the last few are removed as new ones are written
+KEEP_CHECKPOINTS = 2
+
+# a run can be extended or checkpointed differently and still resume
+_UNHASHED_KEYS = ['steps', 'checkpoint_interval']
+
+
+def config_hash(config: dict) -> str:
+    """
+    Args:
+        config (dict): The config, as given by its to_dict.
+    Returns:
+        str: A hash of every setting that changes the steps of a run.
+    """
+    settings = {key: value for key, value in config.items()
+                if key not in _UNHASHED_KEYS}
+    encoded = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+def checkpoint_folder(sim: str, title: str) -> str:
+    """
+    Args:
+        sim (str): The kind of simulation, the name of its data folder.
+        title (str): The title of the run.
+    Returns:
+        str: The folder the run's checkpoints are written to.
+    """
+    return f'{CHECKPOINT_DIR}/{sim}/{title}'
+
+
+def write_json(filename: str, data: dict, indent: int | None = None) -> None:
+    """
+    Args:
+        filename (str): The file to write.
+        data (dict): The data.
+        indent (int | None): The json indent.
+    Returns:
+        None
+
+    Writes to a temporary file which then replaces the file, so an
+    interrupted write never leaves a partial file behind.
+    """
+    temporary = f'{filename}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(temporary, filename)
+
+
+def read_json(filename: str) -> dict:
+    """
+    Args:
+        filename (str): The output file of a run.
+    Returns:
+        dict: The logged states, keyed by time as floats as when they were
+        logged.
+    """
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    return {float(time): state for time, state in data.items()}
+
+
+def save_checkpoint(sim: str, title: str, step: int, config: dict,
+                    arrays: dict[str, np.ndarray],
+                    meta: dict | None = None) -> str:
+    """
+    Args:
+        sim (str): The kind of simulation.
+        title (str): The title of the run.
+        step (int): The number of steps taken.
+        config (dict): The config of the run.
+        arrays (dict[str, np.ndarray]): The state of the run.
+        meta (dict | None): Anything else needed to resume the run.
+    Returns:
+        str: The checkpoint file.
+
+    Writes a compressed NumPy archive of the state with the step, config
+    and its hash, then removes all but the newest checkpoints.
+    """
+    folder = checkpoint_folder(sim, title)
+    os.makedirs(folder, exist_ok=True)
+    header = {
+        'sim': sim,
+        'title': title,
+        'step': step,
+        'config': config,
+        'config_hash': config_hash(config),
+        **(meta or {}),
+    }
+
+    filename = f'{folder}/{step:010d}.npz'
+    temporary = f'{folder}/{step:010d}.tmp.npz'
+    np.savez_compressed(temporary, header=np.array(json.dumps(header)),
+                        **arrays)
+    os.replace(temporary, filename)
+
+    for old in sorted(checkpoints(sim, title))[:-KEEP_CHECKPOINTS]:
+        os.remove(old)
+    return filename
+
+
+def load_checkpoint(filename: str, config: dict | None = None
+                    ) -> tuple[dict, dict[str, np.ndarray]]:
+    """
+    Args:
+        filename (str): The checkpoint file.
+        config (dict | None): The config to resume with, which must match
+        the checkpoint's apart from the steps.
+    Returns:
+        tuple[dict, dict[str, np.ndarray]]: The header and the state.
+    """
+    with np.load(filename, allow_pickle=False) as archive:
+        header = json.loads(str(archive['header']))
+        arrays = {key: archive[key] for key in archive.files
+                  if key != 'header'}
+
+    if config is not None and config_hash(config) != header['config_hash']:
+        raise ValueError(f'The config does not match the checkpoint '
+                         f'{filename}, only the steps may change')
+    return header, arrays
+
+
+def checkpoints(sim: str, title: str) -> list[str]:
+    """
+    Args:
+        sim (str): The kind of simulation.
+        title (str): The title of the run.
+    Returns:
+        list[str]: The run's checkpoint files, oldest first.
+    """
+    folder = checkpoint_folder(sim, title)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(f'{folder}/{name}' for name in os.listdir(folder)
+                  if name.endswith('.npz') and '.tmp' not in name)
+
+
+def latest_checkpoint(sim: str, title: str | None = None) -> str:
+    """
+    Args:
+        sim (str): The kind of simulation.
+        title (str | None): The title of the run, the most recently
+        checkpointed run if None.
+    Returns:
+        str: The newest checkpoint of the run.
+    """
+    if title is None:
+        folder = f'{CHECKPOINT_DIR}/{sim}'
+        runs = [name for name in os.listdir(folder)
+                if checkpoints(sim, name)] if os.path.isdir(folder) else []
+        if len(runs) == 0:
+            raise FileNotFoundError(f'No checkpoints in {folder}')
+        title = max(runs, key=lambda name: os.path.getmtime(
+            checkpoints(sim, name)[-1]))
+
+    files = checkpoints(sim, title)
+    if len(files) == 0:
+        raise FileNotFoundError(f'No checkpoints for {sim}/{title}')
+    return files[-1]
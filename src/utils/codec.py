@@ -0,0 +1,413 @@
+from enum import Enum
+import lzma
+import zlib
+import numpy as np
+
+
+class Precision(Enum):
+    # every bit of the float64, so the values are exact
+    FLOAT64 = 1
+    # rounded to float32, an error of at most 6e-8 of the value
+    FLOAT32 = 2
+    # integer multiples of a step, an error of at most the tolerance times
+    # the largest magnitude of the array
+    QUANTIZED = 3
+
+
+class Prediction(Enum):
+    # the values themselves
+    NONE = 1
+    # the change from the last sample
+    DELTA = 2
+    # the change from a straight line through the last two samples
+    LINEAR = 3
+
+
+class Compression(Enum):
+    NONE = 1
+    ZLIB = 2
+    LZMA = 3
+
+
+# a quantized NaN, where a body is missing from a state
+_NAN = np.iinfo(np.int64).min
+
+# the smallest tolerance of quantized values. Dividing by the step and
+# multiplying by it again are each off by up to 2**-53 of the value, which
+# the step leaves room for, so a smaller tolerance would be mostly rounding
+MIN_TOLERANCE = 1e-14
+
+# the rows encoded together, so a range of a long run can be decoded
+# without the rest. A keyframe of a body's position is about 100 KiB raw
+KEYFRAME = 4096
+
+
+def precision(name: str) -> Precision:
+    """
+    Args:
+        name (str): The name of the precision.
+    Returns:
+        Precision: The precision.
+    """
+    match name.lower():
+        case 'float64':
+            return Precision.FLOAT64
+        case 'float32':
+            return Precision.FLOAT32
+        case 'quantized':
+            return Precision.QUANTIZED
+        case _:
+            raise ValueError(f'Invalid precision: {name}')
+
+
+def prediction(name: str) -> Prediction:
+    """
+    Args:
+        name (str): The name of the prediction.
+    Returns:
+        Prediction: The prediction.
+    """
+    match name.lower():
+        case 'none':
+            return Prediction.NONE
+        case 'delta':
+            return Prediction.DELTA
+        case 'linear':
+            return Prediction.LINEAR
+        case _:
+            raise ValueError(f'Invalid prediction: {name}')
+
+
+def compression(name: str) -> Compression:
+    """
+    Args:
+        name (str): The name of the compression.
+    Returns:
+        Compression: The compression.
+    """
+    match name.lower():
+        case 'none':
+            return Compression.NONE
+        case 'zlib':
+            return Compression.ZLIB
+        case 'lzma':
+            return Compression.LZMA
+        case _:
+            raise ValueError(f'Invalid compression: {name}')
+
+
+class Codec:
+    """
+    Args:
+        precision (Precision): The precision the values are kept to.
+        prediction (Prediction): What is stored of each sample.
+        compression (Compression): The compression of the stored bytes.
+        tolerance (float): The error of quantized values, relative to the
+        largest magnitude of the array.
+
+    Encodes an array whose first axis is time. The values are made integers,
+    the bits of the floats or the quantized values, so predicting each
+    sample from the last ones and undoing it is exact. The residuals of a
+    smooth series are small integers, which are stored byte by byte of each
+    series in time order so the compression finds their zero bytes.
+    """
+
+    def __init__(self, precision: Precision = Precision.FLOAT64,
+                 prediction: Prediction = Prediction.LINEAR,
+                 compression: Compression = Compression.ZLIB,
+                 tolerance: float = 1e-9) -> None:
+        if not MIN_TOLERANCE <= tolerance < 1.0:
+            raise ValueError(f'Invalid tolerance: {tolerance}')
+        self.precision = precision
+        self.prediction = prediction
+        self.compression = compression
+        self.tolerance = tolerance
+
+    def lossless(self) -> 'Codec':
+        """
+        Returns:
+            Codec: The codec with every bit of the values kept, for arrays
+            that must be exact such as the times.
+        """
+        return Codec(Precision.FLOAT64, self.prediction, self.compression,
+                     self.tolerance)
+
+    def to_dict(self) -> dict:
+        return {
+            'precision': self.precision.name.lower(),
+            'prediction': self.prediction.name.lower(),
+            'compression': self.compression.name.lower(),
+            'tolerance': self.tolerance,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Codec':
+        """
+        Args:
+            data (dict): The codec as given by to_dict.
+        Returns:
+            Codec: The codec.
+        """
+        return cls(precision(data['precision']),
+                   prediction(data['prediction']),
+                   compression(data['compression']), data['tolerance'])
+
+    def _integers(self, values: np.ndarray) -> tuple[np.ndarray, dict]:
+        """
+        Args:
+            values (np.ndarray): The float64 values.
+        Returns:
+            tuple[np.ndarray, dict]: The values as integers, and what is
+            needed to make them floats again.
+        """
+        match self.precision:
+            case Precision.FLOAT64:
+                return values.view(np.int64), {}
+            case Precision.FLOAT32:
+                return values.astype(np.float32).view(np.int32), {}
+            case Precision.QUANTIZED:
+                finite = np.isfinite(values)
+                largest = float(np.max(np.abs(values[finite]), initial=0.0))
+                # rounding to the nearest step is off by at most half of it,
+                # and the float arithmetic by at most 2**-52 of the largest
+                step = 2.0 * (self.tolerance - 2.0 ** -52) * largest
+                if step == 0.0:
+                    step = 1.0
+                integers = np.full(values.shape, _NAN, dtype=np.int64)
+                integers[finite] = np.rint(values[finite] / step)
+                return integers, {'step': step}
+
+    def _floats(self, integers: np.ndarray, header: dict) -> np.ndarray:
+        """
+        Args:
+            integers (np.ndarray): The values as integers.
+            header (dict): What _integers returned with them.
+        Returns:
+            np.ndarray: The float64 values.
+        """
+        match self.precision:
+            case Precision.FLOAT64:
+                return integers.view(np.float64)
+            case Precision.FLOAT32:
+                return integers.view(np.float32).astype(np.float64)
+            case Precision.QUANTIZED:
+                values = integers * header['step']
+                values[integers == _NAN] = np.nan
+                return values
+
+    def _predict(self, integers: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            integers (np.ndarray): The series, one per row, in time order.
+        Returns:
+            np.ndarray: The residuals of the prediction, which wrap around
+            as the integers do.
+        """
+        passes = {Prediction.NONE: 0, Prediction.DELTA: 1,
+                  Prediction.LINEAR: 2}[self.prediction]
+        with np.errstate(over='ignore'):
+            for _ in range(passes):
+                integers = np.concatenate(
+                    [integers[..., :1], np.diff(integers, axis=-1)], axis=-1)
+        return integers
+
+    def _unpredict(self, residuals: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            residuals (np.ndarray): The residuals of _predict.
+        Returns:
+            np.ndarray: The series.
+        """
+        passes = {Prediction.NONE: 0, Prediction.DELTA: 1,
+                  Prediction.LINEAR: 2}[self.prediction]
+        with np.errstate(over='ignore'):
+            for _ in range(passes):
+                residuals = np.cumsum(residuals, axis=-1,
+                                      dtype=residuals.dtype)
+        return residuals
+
+    def _compress(self, integers: np.ndarray) -> bytes:
+        """
+        Args:
+            integers (np.ndarray): The rows of a keyframe, time first.
+        Returns:
+            bytes: The rows encoded.
+        """
+        # one series per row, each in time order
+        series = np.moveaxis(integers, 0, -1) \
+            .reshape(-1, max(len(integers), 1))
+        residuals = np.ascontiguousarray(self._predict(series))
+
+        # the first bytes of every residual, then the second bytes, ...
+        size = residuals.dtype.itemsize
+        shuffled = residuals.view(np.uint8).reshape(-1, size).T.tobytes()
+        match self.compression:
+            case Compression.NONE:
+                return shuffled
+            case Compression.ZLIB:
+                return zlib.compress(shuffled, 6)
+            case Compression.LZMA:
+                return lzma.compress(shuffled)
+
+    def _decompress(self, encoded: bytes, shape: tuple,
+                    dtype: np.dtype) -> np.ndarray:
+        """
+        Args:
+            encoded (bytes): The rows of a keyframe as _compress gave them.
+            shape (tuple): The shape of the rows.
+            dtype (np.dtype): The integers the values were made.
+        Returns:
+            np.ndarray: The integers of the rows.
+        """
+        match self.compression:
+            case Compression.NONE:
+                shuffled = encoded
+            case Compression.ZLIB:
+                shuffled = zlib.decompress(encoded)
+            case Compression.LZMA:
+                shuffled = lzma.decompress(encoded)
+
+        residuals = np.frombuffer(shuffled, dtype=np.uint8) \
+            .reshape(dtype.itemsize, -1).T.copy().view(dtype)
+        series = self._unpredict(residuals.reshape(-1, max(shape[0], 1)))
+        return np.moveaxis(series.reshape(shape[1:] + shape[:1]), -1, 0)
+
+    def encode(self, values: np.ndarray,
+               keyframe: int = KEYFRAME) -> tuple[bytes, dict]:
+        """
+        Args:
+            values (np.ndarray): The array, time first.
+            keyframe (int): The rows encoded together, which are decoded
+            together.
+        Returns:
+            tuple[bytes, dict]: The encoded array, and the header needed to
+            decode it.
+
+        Each keyframe of rows is predicted and compressed on its own, and
+        the header holds the first row and the offset of each, so a range
+        of rows is read without decoding the rest.
+        """
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        integers, header = self._integers(values)
+
+        frames = []
+        encoded = []
+        offset = 0
+        for row in range(0, max(len(values), 1), keyframe):
+            frames.append([row, offset])
+            encoded.append(self._compress(integers[row:row + keyframe]))
+            offset += len(encoded[-1])
+
+        header.update({'codec': self.to_dict(), 'shape': list(values.shape),
+                       'dtype': np.dtype(integers.dtype).str,
+                       'keyframes': frames, 'size': offset})
+        return b''.join(encoded), header
+
+    def decode(self, encoded: bytes, header: dict, start: int = 0,
+               stop: int | None = None) -> np.ndarray:
+        """
+        Args:
+            encoded (bytes): The encoded array, or the part of it from the
+            offset of the first keyframe of the rows.
+            header (dict): The header given with it.
+            start (int): The first row to decode.
+            stop (int | None): The row after the last to decode, None for
+            every row after start.
+        Returns:
+            np.ndarray: The rows.
+        """
+        shape = tuple(header['shape'])
+        dtype = np.dtype(header['dtype'])
+        start, stop, _ = slice(start, stop).indices(shape[0])
+        if stop <= start:
+            return np.empty((0,) + shape[1:])
+        spans = keyframes(header, start, stop)
+        first = spans[0][2]
+
+        rows = []
+        for row, end, offset, next_offset in spans:
+            rows.append(self._decompress(
+                encoded[offset - first:next_offset - first],
+                (end - row,) + shape[1:], dtype))
+        integers = np.concatenate(rows)[start - spans[0][0]:
+                                        stop - spans[0][0]]
+        return self._floats(np.ascontiguousarray(integers), header)
+
+
+def keyframes(header: dict, start: int,
+              stop: int) -> list[tuple[int, int, int, int]]:
+    """
+    Args:
+        header (dict): The header of an encoded array.
+        start (int): The first row needed.
+        stop (int): The row after the last needed.
+    Returns:
+        list[tuple[int, int, int, int]]: The first row, the row after the
+        last, the offset and the offset after the end of each keyframe
+        holding the rows. The last offset is None in an array encoded
+        before keyframes.
+    """
+    length = header['shape'][0]
+    # an array encoded before keyframes is one keyframe
+    frames = header.get('keyframes', [[0, 0]])
+    ends = [frame[0] for frame in frames[1:]] + [max(length, 1)]
+    offsets = [frame[1] for frame in frames[1:]] + [header.get('size')]
+    return [(row, end, offset, next_offset) for (row, offset), end,
+            next_offset in zip(frames, ends, offsets)
+            if row < stop and end > start]
+
+
+def decode(encoded: bytes, header: dict, start: int = 0,
+           stop: int | None = None) -> np.ndarray:
+    """
+    Args:
+        encoded (bytes): An encoded array.
+        header (dict): The header given with it, which holds its codec.
+        start (int): The first row to decode.
+        stop (int | None): The row after the last to decode, None for every
+        row after start.
+    Returns:
+        np.ndarray: The rows.
+    """
+    return Codec.from_dict(header['codec']).decode(encoded, header, start,
+                                                   stop)
+
+
+def read(f, header: dict, start: int = 0,
+         stop: int | None = None) -> np.ndarray:
+    """
+    Args:
+        f: The open file of an encoded array.
+        header (dict): The header of the array, which holds its codec.
+        start (int): The first row to read.
+        stop (int | None): The row after the last to read, None for every
+        row after start.
+    Returns:
+        np.ndarray: The rows, read from the keyframes holding them and no
+        others.
+    """
+    first, last, _ = slice(start, stop).indices(header['shape'][0])
+    spans = keyframes(header, first, last)
+    if not spans:
+        return decode(b'', header, start, stop)
+    f.seek(spans[0][2])
+    end = spans[-1][3]
+    encoded = f.read() if end is None else f.read(end - spans[0][2])
+    return decode(encoded, header, start, stop)
+
+
+def max_error(values: np.ndarray, decoded: np.ndarray) -> float:
+    """
+    Args:
+        values (np.ndarray): An array.
+        decoded (np.ndarray): The array after being encoded and decoded.
+    Returns:
+        float: The largest difference between them, inf if a value is
+        missing from one but not the other.
+    """
+    values = np.asarray(values)
+    missing = np.isnan(values)
+    if np.any(missing != np.isnan(decoded)):
+        return float('inf')
+    return float(np.max(np.abs(values[~missing] - decoded[~missing]),
+                        initial=0.0))
@@ -1,6 +1,7 @@
 import json
 from datetime import datetime
-from models.particle import UpdateMethod
+from models.particle import UpdateMethod, ForceMethod
+from models.collisions import CollisionOutcome
 from enum import Enum
 import numpy as np
 
@@ -31,6 +32,12 @@ class ConfigMeta:
         except ValueError:
             return default
 
+    def parse_bool(self, key: str, default: bool) -> bool:
+        value = self._raw.get(key, default)
+        if isinstance(value, str):
+            return value.lower() in ['true', 'yes', '1']
+        return bool(value)
+
     def parse_str(self, key: str, default: str) -> str:
         return self._raw.get(key, default)
 
@@ -59,11 +66,48 @@ class ConfigMeta:
                     return UpdateMethod.VERLET
                 case 'euler_cromer':
                     return UpdateMethod.EULER_CROMER
+                case 'yoshida4':
+                    return UpdateMethod.YOSHIDA4
+                case 'forest_ruth':
+                    return UpdateMethod.FOREST_RUTH
+                case 'wisdom_holman':
+                    return UpdateMethod.WISDOM_HOLMAN
                 case _:
                     return UpdateMethod.EULER
         except KeyError:
             return default
 
+    def parse_force(self, key: str, default: ForceMethod) -> ForceMethod:
+        try:
+            force = self._raw.get(key, default.name)
+            match force.lower():
+                case 'direct':
+                    return ForceMethod.DIRECT
+                case 'barnes_hut':
+                    return ForceMethod.BARNES_HUT
+                case _:
+                    return default
+        except KeyError:
+            return default
+
+    def parse_collisions(self, key: str,
+                         default: CollisionOutcome) -> CollisionOutcome:
+        try:
+            outcome = self._raw.get(key, default.name)
+            match outcome.lower():
+                case 'none':
+                    return CollisionOutcome.NONE
+                case 'merge':
+                    return CollisionOutcome.MERGE
+                case 'bounce':
+                    return CollisionOutcome.BOUNCE
+                case 'stop':
+                    return CollisionOutcome.STOP
+                case _:
+                    return default
+        except KeyError:
+            return default
+
     def parse_datetime(self, key: str, default: datetime) -> datetime:
         try:
             start_time: str = self._raw[key]
@@ -88,6 +132,35 @@ class ConfigMeta:
         except KeyError or ValueError:
             return [], [], []
 
+    def parse_ids(self, key: str, default: list[int]) -> list[int]:
+        try:
+            return [int(p) for p in self._raw.get(key, default)]
+        except (TypeError, ValueError):
+            return default
+
+    def parse_adaptive(self) -> None:
+        """
+        Parses the settings of the adaptive step driver. Adaptive runs
+        are not checkpointed, so a checkpoint interval is refused with them.
+        """
+        self.adaptive = self.parse_bool('adaptive', False)
+        if self.adaptive and self.checkpoint_interval > 0:
+            raise ValueError('Adaptive runs cannot be checkpointed, set '
+                             'checkpoint_interval to 0')
+        self.rtol = self.parse_float('rtol', 1e-10)
+        self.atol = self.parse_float('atol', 1e-3)
+        self.min_step = self.parse_float('min_step', 1e-3)
+        self.max_step = self.parse_float('max_step', 1e7)
+
+    def adaptive_dict(self) -> dict:
+        return {
+            'adaptive': self.adaptive,
+            'rtol': self.rtol,
+            'atol': self.atol,
+            'min_step': self.min_step,
+            'max_step': self.max_step
+        }
+
     def parse_vector(self, key: str, default: np.ndarray) -> np.ndarray:
         try:
             return np.array(self._raw.get(key, default))
@@ -108,6 +181,8 @@ class EarthOrbitConfig(ConfigMeta):
         self.deltaT = self.parse_float('deltaT', 100.0)
         self.method = self.parse_method('method', UpdateMethod.EULER)
         self.log_interval = self.parse_int('log_interval', 100)
+        self.checkpoint_interval = self.parse_int('checkpoint_interval', 0)
+        self.parse_adaptive()
 
     def to_dict(self) -> dict:
         return {
@@ -115,7 +190,9 @@ class EarthOrbitConfig(ConfigMeta):
             'mass': self.mass,
             'deltaT': self.deltaT,
             'method': self.method.name.lower(),
-            'log_interval': self.log_interval
+            'log_interval': self.log_interval,
+            'checkpoint_interval': self.checkpoint_interval,
+            **self.adaptive_dict()
         }
 
 
@@ -133,6 +210,29 @@ class SolarSystemConfig(ConfigMeta):
         self.deltaT = self.parse_float('deltaT', 100.0)
         self.method = self.parse_method('method', UpdateMethod.EULER)
         self.log_interval = self.parse_int('log_interval', 100)
+
+        # steps between checkpoints a run can be resumed from, 0 for none
+        self.checkpoint_interval = self.parse_int('checkpoint_interval', 0)
+        self.force = self.parse_force('force', ForceMethod.DIRECT)
+        self.opening_angle = self.parse_float('opening_angle', 0.5)
+
+        # with block steps deltaT is the largest step, halved up to
+        # block_levels times for fast bodies
+        self.block_levels = self.parse_int('block_levels', 0)
+        self.block_eta = self.parse_float('block_eta', 0.01)
+
+        # compiled kernels, used if Numba is installed
+        self.jit = self.parse_bool('jit', True)
+
+        # Kahan summation of the positions and velocities
+        self.compensated = self.parse_bool('compensated', False)
+
+        # what happens when bodies touch, restitution is the fraction of
+        # their approach speed they bounce apart with
+        self.collisions = self.parse_collisions('collisions',
+                                                CollisionOutcome.NONE)
+        self.restitution = self.parse_float('restitution', 1.0)
+        self.parse_adaptive()
         particles = self.parse_particles('particles', {
             'low': [],
             'medium': [],
@@ -143,6 +243,11 @@ class SolarSystemConfig(ConfigMeta):
         self.high_particles = particles[2]
         self.particles = self.get_particles()
 
+        # bodies that feel the particles but are too light to affect them
+        test_particles = self.parse_ids('test_particles', [])
+        self.test_particles = [p for p in dict.fromkeys(test_particles)
+                               if p not in self.particles]
+
     def get_particles(self) -> list[int]:
         if self.depth == Depth.LOW:
             return self.low_particles
@@ -163,11 +268,23 @@ class SolarSystemConfig(ConfigMeta):
             'steps': self.steps,
             'deltaT': self.deltaT,
             'method': self.method.name.lower(),
+            'log_interval': self.log_interval,
+            'checkpoint_interval': self.checkpoint_interval,
+            'force': self.force.name.lower(),
+            'opening_angle': self.opening_angle,
+            'block_levels': self.block_levels,
+            'block_eta': self.block_eta,
+            'jit': self.jit,
+            'compensated': self.compensated,
+            'collisions': self.collisions.name.lower(),
+            'restitution': self.restitution,
             'particles': {
                 'low': self.low_particles,
                 'medium': self.medium_particles,
                 'high': self.high_particles
             },
+            'test_particles': self.test_particles,
+            **self.adaptive_dict()
         }
 
 
@@ -182,6 +299,7 @@ class ProjectileConfig(ConfigMeta):
         self.method = self.parse_method('method', UpdateMethod.EULER)
         self.steps = self.parse_int('steps', 1000)
         self.log_interval = self.parse_int('log_interval', 10)
+        self.checkpoint_interval = self.parse_int('checkpoint_interval', 0)
         self.gravity = self.parse_float('gravity', 9.81)
         self.mass = self.parse_float('mass', 1.0)
         default_position = np.array([0.0, 0.0, 0.0])
@@ -195,6 +313,7 @@ class ProjectileConfig(ConfigMeta):
             'method': self.method.name.lower(),
             'steps': self.steps,
             'log_interval': self.log_interval,
+            'checkpoint_interval': self.checkpoint_interval,
             'gravity': self.gravity,
             'mass': self.mass,
             'position': self.position.tolist(),
@@ -0,0 +1,152 @@
+from collections.abc import Iterator
+import json
+
+
+# the characters read from a json run at a time. A state must fit in the
+# buffer, which grows if one does not
+CHUNK_SIZE = 1 << 20
+
+# the fields of a body kept whatever is selected, its mass marking the
+# states it is in and its name labelling it
+REQUIRED = ['mass', 'name']
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _Reader:
+    """
+    Args:
+        f: The open json file.
+        chunk_size (int): The characters read at a time.
+
+    A buffer over the file that values are decoded from one at a time, so
+    only the value being decoded and the rest of its chunk are held.
+    """
+
+    def __init__(self, f, chunk_size: int) -> None:
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """
+        Returns:
+            bool: Whether more of the file was read.
+        """
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Returns:
+            str: The next character that is not whitespace, empty at the
+            end of the file.
+        """
+        while True:
+            while self._position < len(self._buffer) and \
+                    self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer) or not self._fill():
+                return self._buffer[self._position:self._position + 1]
+
+    def expect(self, characters: str) -> str:
+        """
+        Args:
+            characters (str): The characters allowed next.
+        Returns:
+            str: The next character that is not whitespace, consumed.
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f'Expected one of {characters!r} at '
+                             f'{self._f.name}, found {character!r}')
+        self._position += 1
+        return character
+
+    def value(self):
+        """
+        Returns:
+            The next json value, a string or an object, reading more of the
+            file until it is whole.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer,
+                                                      self._position)
+            except json.JSONDecodeError:
+                # the value goes on in the next chunk
+                if not self._fill():
+                    raise
+                continue
+            self._position = end
+            return value
+
+
+def select(state: dict, objects: list[str] | None = None,
+           fields: list[str] | None = None) -> dict:
+    """
+    Args:
+        state (dict): A logged state.
+        objects (list[str] | None): The bodies to keep, None for all.
+        fields (list[str] | None): The fields of each body to keep, None
+        for all.
+    Returns:
+        dict: The state with only those bodies and fields, and the
+        system_info.
+    """
+    if objects is None and fields is None:
+        return state
+    selected = {}
+    for name, body in state.items():
+        if name == 'system_info':
+            selected[name] = body
+        elif objects is None or name in objects:
+            selected[name] = body if fields is None else \
+                {key: value for key, value in body.items()
+                 if key in fields or key in REQUIRED}
+    return selected
+
+
+def iter_states(filename: str, objects: list[str] | None = None,
+                fields: list[str] | None = None,
+                chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[float, dict]]:
+    """
+    Args:
+        filename (str): A run saved as json, {time: {body: {...}}}.
+        objects (list[str] | None): The bodies to keep, None for all.
+        fields (list[str] | None): The fields of each body to keep, None
+        for all.
+        chunk_size (int): The characters read at a time.
+    Yields:
+        tuple[float, dict]: The time and the state of each logged state, in
+        the order of the file.
+
+    Reads the file a chunk at a time and decodes one state at a time, so
+    the memory used is that of a state rather than the whole run as with
+    json.load.
+    """
+    with open(filename, 'r') as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            time = reader.value()
+            reader.expect(':')
+            state = reader.value()
+            if not isinstance(time, str) or not isinstance(state, dict):
+                raise ValueError(f'{filename} is not a run of logged states')
+            yield float(time), select(state, objects, fields)
+            if reader.expect(',}') == '}':
+                return
@@ -8,7 +8,13 @@ import time
 
 
 def animation_3d(data: SimData, frames: int = 24 * 60,
-                 filename: str = 'animation_3d'):
+                 filename: str = 'animation_3d',
+                 window: tuple[float | None, float | None] | None = None):
+
+    # the states from the first to the last time of the window
+    if window is not None:
+        data = data.window(*window)
+    frames = min(frames, len(data.times()))
 
     fig = plt.figure(figsize=(8, 8))
     ax = fig.add_subplot(111, projection='3d')
@@ -31,6 +37,8 @@ def animation_3d(data: SimData, frames: int = 24 * 60,
 
     plt.title('Earth orbiting the sun')
 
+    keys = data.times()
+
     style = {
         "10": "orange",
         "199": "mediumspringgreen",
@@ -82,8 +90,7 @@ def animation_3d(data: SimData, frames: int = 24 * 60,
             lines.append(line2[0])
 
         # display date
-        keys = data.times()
-        date: float = float(list(keys)[i])
+        date: float = float(keys[i])
         date_time = datetime.fromtimestamp(date)
         date_str = date_time.strftime("%Y-%m")
         ax.text2D(0.05, 0.95, date_str, transform=ax.transAxes, color='black')
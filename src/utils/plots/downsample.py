@@ -0,0 +1,131 @@
+from enum import Enum
+import numpy as np
+
+
+# a line is drawn with about this many points, a few per pixel of a plot
+# saved at 300 dpi
+PLOT_POINTS = 4000
+
+
+class DownsampleMode(Enum):
+    # largest triangle three buckets, which keeps the shape of a line
+    LTTB = 1
+    # the lowest and highest sample of each bucket, which keeps every spike
+    MIN_MAX = 2
+
+
+def downsample_mode(mode: str) -> DownsampleMode:
+    """
+    Args:
+        mode (str): The name of the mode.
+    Returns:
+        DownsampleMode: The mode.
+    """
+    match mode.lower():
+        case 'lttb':
+            return DownsampleMode.LTTB
+        case 'min_max':
+            return DownsampleMode.MIN_MAX
+        case _:
+            raise ValueError(f'Invalid downsample mode: {mode}')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Args:
+        x (np.ndarray): The x of each sample.
+        y (np.ndarray): The y of each sample.
+        points (int): The number of samples to keep.
+    Returns:
+        np.ndarray: The indices of the samples kept, in order.
+
+    Keeps the first and last samples and one from each of points - 2
+    buckets between them, the one making the largest triangle with the
+    sample kept before it and the mean of the next bucket. The buckets are
+    by index, so x need not increase, as along an orbit.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # bucket b holds the samples edges[b]:edges[b + 1], and the bucket after
+    # the last is the last sample
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    sums_x = np.concatenate([[0.0], np.cumsum(x)])
+    sums_y = np.concatenate([[0.0], np.cumsum(y)])
+    sizes = np.maximum(edges[1:] - edges[:-1], 1)
+    mean_x = np.append((sums_x[edges[1:]] - sums_x[edges[:-1]]) / sizes,
+                       x[-1])
+    mean_y = np.append((sums_y[edges[1:]] - sums_y[edges[:-1]]) / sizes,
+                       y[-1])
+
+    indices = np.empty(points, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    kept = 0
+    for b in range(points - 2):
+        start, end = edges[b], max(edges[b + 1], edges[b] + 1)
+        # twice the area of each triangle, the sign does not matter
+        area = np.abs((x[kept] - mean_x[b + 1]) * (y[start:end] - y[kept]) -
+                      (x[kept] - x[start:end]) * (mean_y[b + 1] - y[kept]))
+        kept = start + int(np.argmax(area))
+        indices[b + 1] = kept
+    return indices
+
+
+def min_max(series: list[np.ndarray], points: int) -> np.ndarray:
+    """
+    Args:
+        series (list[np.ndarray]): The values of each sample, of each series
+        drawn from the same samples.
+        points (int): About the number of samples to keep.
+    Returns:
+        np.ndarray: The indices of the samples kept, in order.
+
+    Splits the samples into buckets and keeps the lowest and highest of
+    each series in each, and the first and last samples, so a spike of a
+    single sample is never dropped.
+    """
+    n = len(series[0])
+    buckets = max(points // (2 * len(series)), 1)
+    if points >= n:
+        return np.arange(n)
+
+    size = -(-n // buckets)
+    kept = [np.array([0, n - 1])]
+    offsets = np.arange(buckets)[:, np.newaxis] * size
+    for values in series:
+        padded = np.full(buckets * size, np.nan)
+        padded[:n] = values
+        padded = padded.reshape(buckets, size)
+        rows = ~np.all(np.isnan(padded), axis=1)
+        padded = padded[rows]
+        kept.append((np.nanargmin(padded, axis=1)[:, np.newaxis] +
+                     offsets[rows]).ravel())
+        kept.append((np.nanargmax(padded, axis=1)[:, np.newaxis] +
+                     offsets[rows]).ravel())
+    return np.unique(np.concatenate(kept))
+
+
+def downsample(x: np.ndarray, series: list[np.ndarray], points: int | None,
+               mode: DownsampleMode) -> np.ndarray:
+    """
+    Args:
+        x (np.ndarray): The x of each sample, which LTTB measures areas
+        with.
+        series (list[np.ndarray]): The values drawn against x. LTTB uses the
+        first, min-max keeps the extremes of each.
+        points (int | None): The number of samples to keep, None for all.
+        mode (DownsampleMode): How the samples are chosen.
+    Returns:
+        np.ndarray: The indices of the samples kept, in order.
+    """
+    if points is None:
+        return np.arange(len(x))
+    match mode:
+        case DownsampleMode.LTTB:
+            return lttb(x, series[0], points)
+        case DownsampleMode.MIN_MAX:
+            return min_max(series, points)
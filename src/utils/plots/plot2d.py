@@ -1,15 +1,20 @@
 from matplotlib import pyplot as plt
 from utils.plots.prep_data import SimData
+from utils.plots.downsample import DownsampleMode, PLOT_POINTS
 from utils.plots.style import Styles
 from ing_theme_matplotlib import mpl_style
-import numpy as np
 import os
 
 
 class CompareProjectiles:
-    def __init__(self, data_1: SimData, data_2: SimData):
+    def __init__(self, data_1: SimData, data_2: SimData,
+                 points: int | None = PLOT_POINTS,
+                 mode: DownsampleMode = DownsampleMode.LTTB):
         self._data_1: SimData = data_1
         self._data_2: SimData = data_2
+        # the most points of each line and how they are chosen
+        self._points = points
+        self._mode = mode
 
     def init_plot(self) -> None:
         """
@@ -34,8 +39,10 @@ class CompareProjectiles:
         Plots the position of the object.
         """
         self.init_plot()
-        x_1, y_1, _ = self._data_1.position("projectile")
-        x_2, y_2, _ = self._data_2.position("projectile")
+        x_1, y_1, _ = self._data_1.position(
+            "projectile", points=self._points, mode=self._mode)
+        x_2, y_2, _ = self._data_2.position(
+            "projectile", points=self._points, mode=self._mode)
 
         plt.plot(x_1, y_1, label=self._data_1._filename, linewidth=0.5)
         plt.plot(x_2, y_2, label=self._data_2._filename, linewidth=0.5)
@@ -54,8 +61,10 @@ class CompareProjectiles:
         Plots the y velocity of the object.
         """
         self.init_plot()
-        t_1, _, vy_1, _ = self._data_1.velocity("projectile")
-        t_2, _, vy_2, _ = self._data_2.velocity("projectile")
+        t_1, _, vy_1, _ = self._data_1.velocity(
+            "projectile", points=self._points, mode=self._mode)
+        t_2, _, vy_2, _ = self._data_2.velocity(
+            "projectile", points=self._points, mode=self._mode)
 
         plt.plot(t_1, vy_1, label=self._data_1._filename, linewidth=0.5)
         plt.plot(t_2, vy_2, label=self._data_2._filename, linewidth=0.5)
@@ -74,11 +83,13 @@ class CompareProjectiles:
         Plots the momentum of the object.
         """
         self.init_plot()
-        t, p_1 = self._data_1.system_momentum()
-        t, p_2 = self._data_2.system_momentum()
+        t_1, p_1 = self._data_1.system_momentum(
+            points=self._points, mode=self._mode)
+        t_2, p_2 = self._data_2.system_momentum(
+            points=self._points, mode=self._mode)
 
-        plt.plot(t, p_1, label=self._data_1._filename, linewidth=0.5)
-        plt.plot(t, p_2, label=self._data_2._filename, linewidth=0.5)
+        plt.plot(t_1, p_1, label=self._data_1._filename, linewidth=0.5)
+        plt.plot(t_2, p_2, label=self._data_2._filename, linewidth=0.5)
 
         # add labels
         plt.xlabel('t (s)')
@@ -91,9 +102,14 @@ class CompareProjectiles:
 
 
 class CompareSol:
-    def __init__(self, datas: list[SimData]):
+    def __init__(self, datas: list[SimData],
+                 points: int | None = PLOT_POINTS,
+                 mode: DownsampleMode = DownsampleMode.LTTB):
         self._datas: list[SimData] = datas
         self._styles: Styles = Styles()
+        # the most points of each line and how they are chosen
+        self._points = points
+        self._mode = mode
 
     def init_plot(self) -> None:
         """
@@ -120,7 +136,7 @@ class CompareSol:
         self.init_plot()
         for data in self._datas:
             style = self._styles.get_style(data._filename)
-            t, p = data.system_momentum()
+            t, p = data.system_momentum(points=self._points, mode=self._mode)
             plt.plot(t, p, label=style.name, color=style.color, linewidth=0.5)
 
         # add labels
@@ -136,7 +152,7 @@ class CompareSol:
         self.init_plot()
         for data in self._datas:
             style = self._styles.get_style(data._filename)
-            t, e = data.system_energy()
+            t, e = data.system_energy(points=self._points, mode=self._mode)
             plt.plot(t, e, label=style.name, color=style.color, linewidth=0.5)
 
         # add labels
@@ -158,8 +174,10 @@ class CompareSol:
             color = colors[0]
             colors.pop(0)
 
-            earth_x, earth_y, _ = data.position("399")
-            sattelite_x, sattelite_y, _ = data.position("satellite")
+            earth_x, earth_y, _ = data.position(
+                "399", points=self._points, mode=self._mode)
+            sattelite_x, sattelite_y, _ = data.position(
+                "satellite", points=self._points, mode=self._mode)
 
             plt.plot(earth_x, earth_y, color=color,
                      label=f'Earth {data._filename}', linewidth=0.5)
@@ -187,8 +205,13 @@ class CompareSol:
 
 
 class Plot2DProjectile:
-    def __init__(self, data: SimData):
+    def __init__(self, data: SimData,
+                 points: int | None = PLOT_POINTS,
+                 mode: DownsampleMode = DownsampleMode.LTTB):
         self._data: SimData = data
+        # the most points of each line and how they are chosen
+        self._points = points
+        self._mode = mode
 
     def init_plot(self, style: str = "dark_background") -> None:
         """
@@ -214,7 +237,8 @@ class Plot2DProjectile:
         Plots the position of the object.
         """
         self.init_plot()
-        x, y, _ = self._data.position("projectile")
+        x, y, _ = self._data.position(
+            "projectile", points=self._points, mode=self._mode)
 
         plt.plot(x, y, linewidth=0.5)
 
@@ -232,7 +256,8 @@ class Plot2DProjectile:
         Plots the y velocity of the object.
         """
         self.init_plot()
-        t, _, vy, _ = self._data.velocity("projectile")
+        t, _, vy, _ = self._data.velocity(
+            "projectile", points=self._points, mode=self._mode)
 
         plt.plot(t, vy, label='vy', linewidth=0.5)
 
@@ -247,9 +272,16 @@ class Plot2DProjectile:
 
 
 class Plot2DSol:
-    def __init__(self, data: SimData):
+    def __init__(self, data: SimData,
+                 points: int | None = PLOT_POINTS,
+                 mode: DownsampleMode = DownsampleMode.LTTB,
+                 window: tuple[float | None, float | None] | None = None):
         self._styles = Styles()
-        self._data: SimData = data
+        # the states from the first to the last time of the window
+        self._data: SimData = data if window is None else data.window(*window)
+        # the most points of each line and how they are chosen
+        self._points = points
+        self._mode = mode
 
     def init_plot(self) -> None:
         """
@@ -280,7 +312,8 @@ class Plot2DSol:
         """
         self.init_plot()
         for body in bodies:
-            x, y, _ = self._data.position(body)
+            x, y, _ = self._data.position(
+                body, points=self._points, mode=self._mode)
 
             style = self._styles.get_style(body)
 
@@ -330,7 +363,7 @@ class Plot2DSol:
         body_names = []
 
         for body in bodies:
-            t, ke = self._data.ke(body)
+            t, ke = self._data.ke(body, points=self._points, mode=self._mode)
 
             style = self._styles.get_style(body)
 
@@ -360,7 +393,7 @@ class Plot2DSol:
         for body in bodies:
             style = self._styles.get_style(body)
 
-            t, pe = self._data.pe(body)
+            t, pe = self._data.pe(body, points=self._points, mode=self._mode)
 
             plt.plot(t, pe, label=style.name, linewidth=0.5, color=style.color)
 
@@ -382,7 +415,8 @@ class Plot2DSol:
         Plots the kinetic energy of the system.
         """
         self.init_plot()
-        t, energy = self._data.system_energy()
+        t, energy = self._data.system_energy(
+            points=self._points, mode=self._mode)
 
         plt.plot(t, energy, label='Energy', linewidth=0.5)
 
@@ -406,10 +440,8 @@ class Plot2DSol:
         body_names = []
 
         for body in bodies:
-            t, ke = np.array(self._data.ke(body))
-            t, pe = self._data.pe(body)
-
-            energy = list(ke + pe)
+            t, energy = self._data.energy(
+                body, points=self._points, mode=self._mode)
 
             style = self._styles.get_style(body)
 
@@ -435,7 +467,7 @@ class Plot2DSol:
         Plots the momentum of the system.
         """
         self.init_plot()
-        t, p = self._data.system_momentum()
+        t, p = self._data.system_momentum(points=self._points, mode=self._mode)
 
         plt.plot(t, p, label='Momentum', linewidth=0.5)
 
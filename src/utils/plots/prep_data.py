@@ -1,21 +1,77 @@
+from utils.trajectory import Trajectory, TrajectoryStates, is_trajectory, \
+    load_cached
+from utils.json_stream import iter_states
+from utils.plots.downsample import DownsampleMode, downsample
 import numpy as np
-import json
 from datetime import datetime
 
 
 class SimData:
-    def __init__(self, filename: str, raw_data: dict | None = None):
+    """
+    Args:
+        filename (str): The output file of a run, read as a trajectory if
+        the run was saved as one and as json otherwise.
+        raw_data (dict | TrajectoryStates | None): The logged states,
+        instead of reading them.
+        cache (bool): Whether to read a json run through the columnar copy
+        kept beside it, which is written on the first read.
+        window (tuple[float | None, float | None] | None): The first and
+        last time of the states to plot, None for all of them. Only those
+        states are read from a trajectory.
+        objects (list[str] | None): The bodies to read from a json run,
+        None for all.
+        fields (list[str] | None): The quantities of the bodies to read
+        from a json run, None for all.
+
+    The data of a run in a format that can be plotted. The states are put
+    into one array per quantity the first time they are needed, and each
+    series asked for is kept, so plotting every body reads them once. Each
+    series can be asked for with at most a number of points, chosen so the
+    line looks the same.
+    """
+
+    def __init__(self, filename: str,
+                 raw_data: dict | TrajectoryStates | None = None,
+                 cache: bool = True,
+                 window: tuple[float | None, float | None] | None = None,
+                 objects: list[str] | None = None,
+                 fields: list[str] | None = None):
+        self._source = filename
         self._filename = filename.split('/')[-1].split('.')[0]
-        if raw_data is None:
-            self._raw_data = self._load_data(filename)
+        self._trajectory: Trajectory | None = None
+        self._raw_data: dict | None = None
+        self._window = window
+        if isinstance(raw_data, TrajectoryStates):
+            self._trajectory = raw_data.trajectory
+        elif raw_data is None and is_trajectory(filename):
+            self._trajectory = Trajectory.load(filename, window=window)
+            self._window = None
+        elif raw_data is None and cache and objects is None and \
+                fields is None:
+            self._trajectory = load_cached(filename)
+        elif raw_data is None:
+            # the states are read one at a time and only those selected
+            # are kept, as a run may not fit in memory as json
+            trajectory = Trajectory.from_states(
+                iter_states(filename, objects, fields)).sorted()
+            for value in trajectory.arrays.values():
+                value.flags.writeable = False
+            self._trajectory = trajectory
         else:
             self._raw_data = raw_data
 
-        self._obj_list = list(list(self._raw_data.values())[0].keys())
+        if self._trajectory is not None:
+            self._obj_list = list(self._trajectory.names)
+        else:
+            self._obj_list = list(list(self._raw_data.values())[0].keys())
 
         if 'system_info' in self._obj_list:
             self._obj_list.remove('system_info')
 
+        # the series already made, keyed by quantity and object
+        self._cache: dict[tuple, tuple] = {}
+        self._datetimes: np.ndarray | None = None
+
     @property
     def obj_list(self) -> list[str]:
         """
@@ -24,190 +80,346 @@ class SimData:
         """
         return self._obj_list
 
-    def times(self) -> list[float]:
+    @property
+    def trajectory(self) -> Trajectory:
+        """
+        Returns:
+            Trajectory: The states as arrays sorted by time, made from the
+            json the first time they are needed.
+        """
+        if self._trajectory is None:
+            trajectory = Trajectory.from_dict(self._raw_data).sorted()
+            for value in trajectory.arrays.values():
+                value.flags.writeable = False
+            self._trajectory = trajectory
+            self._raw_data = None
+        if self._window is not None:
+            self._trajectory = self._trajectory.window(*self._window)
+            self._window = None
+        return self._trajectory
+
+    def window(self, start: float | None = None,
+               end: float | None = None) -> 'SimData':
+        """
+        Args:
+            start (float | None): The first time, None for the first state.
+            end (float | None): The last time, None for the last state.
+        Returns:
+            SimData: The data of the states logged from start to end, which
+            shares the arrays of this one.
+        """
+        return SimData(self._source,
+                       TrajectoryStates(self.trajectory.window(start, end)))
+
+    def at(self, time: float) -> dict:
         """
+        Args:
+            time (float): The time.
         Returns:
-            list[float]: The list of times in the simulation.
+            dict: The last state logged at or before the time, in the format
+            the simulations log it.
         """
-        return list(map(float, self._raw_data.keys()))
+        row = self.trajectory.rows(None, time).stop - 1
+        if row < 0:
+            raise ValueError(f'{self._filename} has no state before {time}')
+        return self.trajectory.state(row)
 
-    def _load_data(self, filename: str) -> dict:
-        with open(filename, 'r') as f:
-            data = json.load(f)
+    def times(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The times in the simulation.
+        """
+        return np.asarray(self.trajectory.time)
 
-        return data
+    def _present(self, obj: str) -> tuple[int, np.ndarray | None]:
+        """
+        Args:
+            obj (str): The object.
+        Returns:
+            tuple[int, np.ndarray | None]: The column of the object, and the
+            states it is in, None if it is in all of them.
+        """
+        if ('present', obj) not in self._cache:
+            trajectory = self.trajectory
+            column = trajectory.index(obj)
+            present = ~np.isnan(trajectory.mass[:, column])
+            self._cache[('present', obj)] = \
+                (column, None if present.all() else present)
+        return self._cache[('present', obj)]
+
+    def _seconds(self, obj: str | None = None) -> np.ndarray:
+        """
+        Args:
+            obj (str | None): The object, None for every state.
+        Returns:
+            np.ndarray: The times the object was logged, in seconds.
+        """
+        if obj is None:
+            return self.times()
+        _, present = self._present(obj)
+        if present is None:
+            return self.times()
+        return self.times()[present]
+
+    def _downsampled(self, key: tuple, series: tuple, x: np.ndarray,
+                     values: list[np.ndarray], points: int | None,
+                     mode: DownsampleMode) -> tuple:
+        """
+        Args:
+            key (tuple): The quantity and object of the series.
+            series (tuple): The arrays returned, each a value per sample.
+            x (np.ndarray): The x the samples are drawn against.
+            values (list[np.ndarray]): The values drawn against x.
+            points (int | None): The number of samples to keep, None for
+            all.
+            mode (DownsampleMode): How the samples are chosen.
+        Returns:
+            tuple: The arrays at the samples kept.
+        """
+        if points is None or points >= len(x):
+            return series
+        key = key + (points, mode)
+        if key not in self._cache:
+            indices = downsample(x, values, points, mode)
+            self._cache[key] = tuple(value[indices] for value in series)
+        return self._cache[key]
+
+    def _dates(self, obj: str | None = None) -> np.ndarray:
+        """
+        Args:
+            obj (str | None): The object, None for every state.
+        Returns:
+            np.ndarray: The times the object was logged, as datetimes.
+        """
+        if self._datetimes is None:
+            self._datetimes = np.array(
+                [datetime.fromtimestamp(t) for t in self.times().tolist()],
+                dtype=object)
+        if obj is None:
+            return self._datetimes
+        _, present = self._present(obj)
+        if present is None:
+            return self._datetimes
+        return self._datetimes[present]
+
+    def _series(self, key: str, obj: str) -> np.ndarray:
+        """
+        Args:
+            key (str): The quantity.
+            obj (str): The object.
+        Returns:
+            np.ndarray: The quantity of the object in the states it is in,
+            a view of the trajectory if it is in all of them.
+        """
+        column, present = self._present(obj)
+        trajectory = self.trajectory
+        if key == 'momentum':
+            values = trajectory.mass[:, column, np.newaxis] * \
+                trajectory.velocity[:, column]
+            values.flags.writeable = False
+        else:
+            values = trajectory.arrays[key][:, column]
+        if present is not None:
+            values = values[present]
+            values.flags.writeable = False
+        return values
+
+    def _vectors(self, key: str, obj: str) -> tuple[np.ndarray, np.ndarray,
+                                                    np.ndarray]:
+        """
+        Args:
+            key (str): The quantity of the trajectory.
+            obj (str): The object.
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The x, y and z of the
+            object at each time it was logged.
+        """
+        if (key, obj) not in self._cache:
+            vectors = self._series(key, obj)
+            self._cache[(key, obj)] = \
+                (vectors[:, 0], vectors[:, 1], vectors[:, 2])
+        return self._cache[(key, obj)]
 
-    def position(self, obj: str = '399') -> tuple[
-            list[float],
-            list[float],
-            list[float]]:
+    def _values(self, key: str, obj: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            key (str): The quantity of the trajectory.
+            obj (str): The object.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The times the object was logged
+            and its values.
+        """
+        if (key, obj) not in self._cache:
+            self._cache[(key, obj)] = \
+                (self._dates(obj), self._series(key, obj))
+        return self._cache[(key, obj)]
+
+    def position(self, obj: str = '399', points: int | None = None,
+                 mode: DownsampleMode = DownsampleMode.LTTB
+                 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         Args:
             obj (str): The object to plot.
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen, from the path
+            in the x-y plane.
         Returns:
-            tuple[list[float], list[float], list[float]]: The x, y, and z
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The x, y, and z
 
         Converts the simulation position data into a format that can be
         plotted.
         """
-        obj_x = []
-        obj_y = []
-        obj_z = []
-
-        for step in self._raw_data.values():
-            obj_data = step[obj]
+        series = self._vectors('position', obj)
+        return self._downsampled(('position', obj), series, series[0],
+                                 [series[1], series[0]], points, mode)
 
-            obj_pos = np.array(obj_data['position'])
-
-            obj_x.append(obj_pos[0])
-            obj_y.append(obj_pos[1])
-            obj_z.append(obj_pos[2])
-
-        return obj_x, obj_y, obj_z
-
-    def velocity(self, obj: str = '399') -> tuple[
-            list[float],
-            list[float],
-            list[float],
-            list[float]]:
+    def velocity(self, obj: str = '399', points: int | None = None,
+                 mode: DownsampleMode = DownsampleMode.LTTB
+                 ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
         Args:
             obj (str): The object to plot.
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen, LTTB from the
+            y velocity against time, as it is plotted.
         Returns:
-            tuple[list[datetime] list[float],
-                  list[float], list[float]]:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
                 The datetime, x, y, and z
 
         Converts the simulation velocity data into a format that can be
         plotted.
         """
-        t = []
-
-        obj_vx = []
-        obj_vy = []
-        obj_vz = []
-
-        for ts in self._raw_data.keys():
-            step = self._raw_data[ts]
-
-            obj_data = step[obj]
-
-            obj_vel = np.array(obj_data['velocity'])
-
-            obj_vx.append(obj_vel[0])
-            obj_vy.append(obj_vel[1])
-            obj_vz.append(obj_vel[2])
-
-            t.append(datetime.fromtimestamp(float(ts)))
-
-        return t, obj_vx, obj_vy, obj_vz
-
-    def momentum(self, obj: str = '399') -> tuple[
-            list[float],
-            list[float],
-            list[float]]:
+        vectors = self._vectors('velocity', obj)
+        series = (self._dates(obj),) + vectors
+        return self._downsampled(('velocity', obj), series,
+                                 self._seconds(obj),
+                                 [vectors[1], vectors[0], vectors[2]],
+                                 points, mode)
+
+    def momentum(self, obj: str = '399', points: int | None = None,
+                 mode: DownsampleMode = DownsampleMode.LTTB
+                 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         Args:
             obj (str): The object to plot.
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen, from the
+            momentum in the x-y plane.
         Returns:
-            tuple[list[float], list[float], list[float]]: The x, y, and z
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The x, y, and z
 
         Converts the simulation momentum data into a format that can be
         plotted.
         """
-        obj_px = []
-        obj_py = []
-        obj_pz = []
-
-        for step in self._raw_data.values():
-            obj_data = step[obj]
-
-            obj_mom = np.array(obj_data['momentum'])
+        series = self._vectors('momentum', obj)
+        return self._downsampled(('momentum', obj), series, series[0],
+                                 [series[1], series[0]], points, mode)
 
-            obj_px.append(obj_mom[0])
-            obj_py.append(obj_mom[1])
-            obj_pz.append(obj_mom[2])
-
-        return obj_px, obj_py, obj_pz
+    def _timeline(self, key: str, obj: str | None, series: tuple,
+                  points: int | None, mode: DownsampleMode
+                  ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            key (str): The quantity.
+            obj (str | None): The object, None for a system quantity.
+            series (tuple): The datetimes and the values.
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The datetimes and values kept.
+        """
+        return self._downsampled((key, obj), series, self._seconds(obj),
+                                 [series[1]], points, mode)
 
-    def ke(self, obj: str = '399') -> tuple[list[datetime],
-                                            list[float]]:
+    def ke(self, obj: str = '399', points: int | None = None,
+           mode: DownsampleMode = DownsampleMode.LTTB
+           ) -> tuple[np.ndarray, np.ndarray]:
         """
         Args:
             obj (str): The object to plot.
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen.
         Returns:
-            tuple[list[float], list[float]]: The x, y, and z
+            tuple[np.ndarray, np.ndarray]: The datetime and ke
 
         Converts the simulation ke data into a format that can be plotted.
         """
+        return self._timeline('ke', obj, self._values('ke', obj), points,
+                              mode)
 
-        obj_ke = []
-        times = []
-
-        for ts, step in self._raw_data.items():
-            obj_data = step[obj]
-            time = datetime.fromtimestamp(float(ts))
-            times.append(time)
-            obj_ke.append(obj_data['ke'])
-
-        return times, obj_ke
-
-    def pe(self, obj: str = '399') -> tuple[list[datetime],
-                                            list[float]]:
+    def pe(self, obj: str = '399', points: int | None = None,
+           mode: DownsampleMode = DownsampleMode.LTTB
+           ) -> tuple[np.ndarray, np.ndarray]:
         """
         Args:
             obj (str): The object to plot.
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen.
         Returns:
-            tuple[list[float], list[float]]: The x, y, and z
+            tuple[np.ndarray, np.ndarray]: The datetime and pe
 
         Converts the simulation pe data into a format that can be plotted.
         """
-        obj_pe = []
-        times = []
-
-        for ts, step in self._raw_data.items():
-            time = datetime.fromtimestamp(float(ts))
-            obj_data = step[obj]
-
-            times.append(time)
-            obj_pe.append(obj_data['pe'])
+        return self._timeline('pe', obj, self._values('pe', obj), points,
+                              mode)
 
-        return times, obj_pe
+    def energy(self, obj: str = '399', points: int | None = None,
+               mode: DownsampleMode = DownsampleMode.LTTB
+               ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            obj (str): The object to plot.
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The datetime and the kinetic plus
+            potential energy
 
-    def system_energy(self) -> tuple[list[datetime], list[float]]:
+        Converts the simulation energy of an object into a format that can
+        be plotted, the sum taken before the points are chosen.
+        """
+        if ('energy', obj) not in self._cache:
+            t, ke = self._values('ke', obj)
+            _, pe = self._values('pe', obj)
+            energy = ke + pe
+            energy.flags.writeable = False
+            self._cache[('energy', obj)] = (t, energy)
+        return self._timeline('energy', obj, self._cache[('energy', obj)],
+                              points, mode)
+
+    def system_energy(self, points: int | None = None,
+                      mode: DownsampleMode = DownsampleMode.LTTB
+                      ) -> tuple[np.ndarray, np.ndarray]:
         """
+        Args:
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen.
         Returns:
-            tuple[list[float], list[float]]: The x, y, and z
+            tuple[np.ndarray, np.ndarray]: The datetime and energy
 
         Converts the simulation system ke data into a format that can be
         plotted.
         """
-        ke = []
-        times = []
-
-        for ts, step in self._raw_data.items():
-            time = datetime.fromtimestamp(float(ts))
-            times.append(time)
-            ke.append(step['system_info']['energy'])
+        series = (self._dates(), np.asarray(self.trajectory.energy))
+        return self._timeline('system_energy', None, series, points, mode)
 
-        return times, ke
-
-    def system_momentum(self) -> tuple[list[datetime],
-                                       list[float]]:
+    def system_momentum(self, points: int | None = None,
+                        mode: DownsampleMode = DownsampleMode.LTTB
+                        ) -> tuple[np.ndarray, np.ndarray]:
         """
+        Args:
+            points (int | None): The most points to return, None for all.
+            mode (DownsampleMode): How the points are chosen.
         Returns:
-            tuple[list[float], list[float]]: The x, y, and z
+            tuple[np.ndarray, np.ndarray]: The datetime and the magnitude of
+            the momentum
 
         Converts the simulation system momentum data into a format that can be
         plotted.
         """
-        p = []
-        times = []
-
-        for ts, step in self._raw_data.items():
-            times.append(datetime.fromtimestamp(float(ts)))
-            momentum_vec = np.array(step['system_info']['momentum'])
-            momentum = np.linalg.norm(momentum_vec)
-            p.append(momentum)
-
-        return times, p
+        if ('momentum', None) not in self._cache:
+            momentum = np.linalg.norm(self.trajectory.momentum, axis=1)
+            momentum.flags.writeable = False
+            self._cache[('momentum', None)] = (self._dates(), momentum)
+        return self._timeline('system_momentum', None,
+                              self._cache[('momentum', None)], points, mode)
@@ -0,0 +1,1007 @@
+from collections.abc import Iterable, Mapping
+from utils.checkpoint import write_json
+from utils.codec import Codec, Precision, max_error, read
+from utils.json_stream import iter_states
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import numpy as np
+
+
+# a trajectory is a folder of .npy files, one per quantity, and a json
+# header, so every array can be memory mapped with np.load(mmap_mode='r').
+# An encoded array is a .bin file instead, whose header is in the json
+SUFFIX = '.traj'
+FORMAT_VERSION = 2
+
+# (T, N, 3) arrays, one vector per logged time and body
+VECTORS = ['position', 'velocity', 'acceleration']
+
+# (T, N) arrays, one value per logged time and body
+SCALARS = ['mass', 'ke', 'pe']
+
+# arrays kept exact by a lossy codec, the times being the keys of the
+# states and a NaN mass marking a body missing from one
+EXACT = ['time', 'mass']
+
+# the columnar copy SimData keeps beside a json run, as a trajectory
+CACHE_SUFFIX = '.cache'
+
+# the states a writer holds before appending them to its files, and the
+# states that may wait for it before logging blocks the simulation
+CHUNK = 256
+QUEUE_SIZE = 256
+
+# markers passed to a writer's thread between the states
+_FLUSH = object()
+_CLOSE = object()
+
+
+def trajectory_path(filename: str) -> str:
+    """
+    Args:
+        filename (str): The output file of a run, with or without an
+        extension.
+    Returns:
+        str: The folder of the run's trajectory.
+    """
+    root, extension = os.path.splitext(filename)
+    while extension in ['.json', SUFFIX]:
+        filename = root
+        root, extension = os.path.splitext(filename)
+    return filename + SUFFIX
+
+
+def is_trajectory(filename: str) -> bool:
+    """
+    Args:
+        filename (str): The output file of a run, with or without an
+        extension.
+    Returns:
+        bool: Whether the run has been saved as a trajectory.
+    """
+    path = trajectory_path(filename)
+    return os.path.isfile(f'{path}/meta.json') or \
+        os.path.isfile(f'{path}.old/meta.json')
+
+
+class Trajectory:
+    """
+    Args:
+        names (list[str]): The key of each body in the logged states.
+        time (np.ndarray): The (T,) times of the logged states.
+        arrays (dict[str, np.ndarray]): The (T, N, 3) position, velocity
+        and acceleration, the (T, N) mass, kinetic and potential energy, and
+        optionally the (T,) energy and (T, 3) momentum of the system.
+        meta (dict | None): Anything else about the run, such as its config.
+
+    The logged states of a run as one array per quantity. A body missing
+    from a state, merged away or not yet added, has a mass of NaN there.
+    """
+
+    def __init__(self, names: list[str], time: np.ndarray,
+                 arrays: dict[str, np.ndarray],
+                 meta: dict | None = None) -> None:
+        self.names = list(names)
+        self.time = time
+        self.arrays = arrays
+        self.meta = {} if meta is None else meta
+
+        # the name field of each body's state, which for a projectile is
+        # not its key
+        self.labels: list[str] = self.meta.get('labels', self.names)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getattr__(self, key: str) -> np.ndarray:
+        arrays = self.__dict__.get('arrays', {})
+        if key in arrays:
+            return arrays[key]
+        raise AttributeError(key)
+
+    def index(self, name: str) -> int:
+        """
+        Args:
+            name (str): The key of the body.
+        Returns:
+            int: The column of the body in the arrays.
+        """
+        return self.names.index(name)
+
+    def rows(self, start: float | None = None,
+             end: float | None = None) -> slice:
+        """
+        Args:
+            start (float | None): The first time, None for the first state.
+            end (float | None): The last time, None for the last state.
+        Returns:
+            slice: The rows of the states logged from start to end, found
+            by binary search of the times, which must be sorted.
+        """
+        return time_rows(self.time, start, end)
+
+    def window(self, start: float | None = None,
+               end: float | None = None) -> 'Trajectory':
+        """
+        Args:
+            start (float | None): The first time, None for the first state.
+            end (float | None): The last time, None for the last state.
+        Returns:
+            Trajectory: The states logged from start to end. Memory mapped
+            arrays stay memory mapped, so only those rows are read.
+        """
+        rows = self.rows(start, end)
+        return Trajectory(self.names, self.time[rows],
+                          {key: value[rows]
+                           for key, value in self.arrays.items()},
+                          self.meta)
+
+    def sorted(self) -> 'Trajectory':
+        """
+        Returns:
+            Trajectory: The trajectory with its states in time order, itself
+            if they already are.
+        """
+        order = np.argsort(self.time, kind='stable')
+        if np.all(order == np.arange(len(order))):
+            return self
+        return Trajectory(self.names, np.asarray(self.time)[order],
+                          {key: np.asarray(value)[order]
+                           for key, value in self.arrays.items()},
+                          self.meta)
+
+    @classmethod
+    def from_dict(cls, data: dict, meta: dict | None = None) -> 'Trajectory':
+        """
+        Args:
+            data (dict): The logged states, keyed by time, each a dict of
+            Particle.to_json states and optionally the system_info.
+            meta (dict | None): Anything else about the run.
+        Returns:
+            Trajectory: The states as arrays.
+        """
+        return cls.from_states(data.items(), meta)
+
+    @classmethod
+    def from_states(cls, states: Iterable[tuple[float, dict]],
+                    meta: dict | None = None) -> 'Trajectory':
+        """
+        Args:
+            states (Iterable[tuple[float, dict]]): The time and state of
+            each logged state, each a dict of Particle.to_json states, or
+            some of their fields, and optionally the system_info.
+            meta (dict | None): Anything else about the run.
+        Returns:
+            Trajectory: The states as arrays, of the quantities the states
+            have.
+
+        Puts the states into arrays a chunk of rows at a time as they come,
+        so they can be read from a file without holding all of them.
+        """
+        names: dict[str, str] = {}
+        columns: dict[str, int] = {}
+        found = {'mass'}
+        system = False
+        blocks: dict[str, list[np.ndarray]] = {}
+        buffers = _buffers(CHUNK, 1)
+        times: list[float] = []
+        row = 0
+
+        for time, state in states:
+            if row == CHUNK:
+                for key, buffer in buffers.items():
+                    blocks.setdefault(key, []).append(buffer)
+                buffers = _buffers(CHUNK, buffers['mass'].shape[1])
+                row = 0
+            times.append(float(time))
+            for name, body in state.items():
+                if name == 'system_info':
+                    system = True
+                    buffers['energy'][row] = body['energy']
+                    buffers['momentum'][row] = body['momentum']
+                    continue
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = len(names)
+                    names[name] = body.get('name', name)
+                    width = buffers['mass'].shape[1]
+                    if column >= width:
+                        buffers.update({key: _resize(buffers[key], 2 * width)
+                                        for key in VECTORS + SCALARS})
+                for key in VECTORS + SCALARS:
+                    if key in body:
+                        buffers[key][row, column] = body[key]
+                        found.add(key)
+            row += 1
+
+        n = len(names)
+        arrays = {}
+        for key in VECTORS + SCALARS:
+            if key in found:
+                arrays[key] = np.concatenate(
+                    [_resize(block, n) for block in blocks.get(key, [])] +
+                    [_resize(buffers[key][:row], n)])
+        if system:
+            for key in ['energy', 'momentum']:
+                arrays[key] = np.concatenate(blocks.get(key, []) +
+                                             [buffers[key][:row]])
+
+        meta = dict(meta or {})
+        meta['labels'] = list(names.values())
+        return cls(list(names), np.array(times), arrays, meta)
+
+    def state(self, row: int) -> dict:
+        """
+        Args:
+            row (int): The row of the logged state.
+        Returns:
+            dict: The state in the format the simulations log it.
+        """
+        values = {key: value[row].tolist()
+                  for key, value in self.arrays.items()}
+        state = {}
+        for column, name in enumerate(self.names):
+            mass = values['mass'][column]
+            if mass != mass:
+                continue
+            body = {key: values[key][column] for key in
+                    ['position', 'velocity', 'acceleration', 'ke', 'pe']
+                    if key in values}
+            if 'velocity' in values:
+                body['momentum'] = \
+                    (mass * np.array(values['velocity'][column])).tolist()
+            body['name'] = self.labels[column]
+            body['mass'] = mass
+            state[name] = body
+        if 'energy' in values:
+            state['system_info'] = {
+                'energy': values['energy'],
+                'momentum': values['momentum'],
+            }
+        return state
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict: The logged states in the format the simulations log them,
+            keyed by time.
+        """
+        return {time: self.state(row) for row, time in
+                enumerate(np.asarray(self.time).tolist())}
+
+    def save(self, filename: str, codec: Codec | None = None) -> str:
+        """
+        Args:
+            filename (str): The output file of the run, with or without an
+            extension.
+            codec (Codec | None): The codec to encode the arrays with, None
+            to save them as .npy files that can be memory mapped.
+        Returns:
+            str: The folder the trajectory was saved to.
+
+        Writes each array and the header last. The folder is written beside
+        the old one and swapped in, so an interrupted save leaves the old
+        trajectory.
+        """
+        path = trajectory_path(filename)
+        temporary = f'{path}.tmp'
+        old = f'{path}.old'
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+
+        encodings = {}
+        for key, value in [('time', self.time), *self.arrays.items()]:
+            value = np.asarray(value, dtype=float)
+            if codec is None:
+                np.save(f'{temporary}/{key}.npy', value)
+                continue
+            encoded, encodings[key] = \
+                (codec.lossless() if key in EXACT else codec).encode(value)
+            with open(f'{temporary}/{key}.bin', 'wb') as f:
+                f.write(encoded)
+        header = {
+            **self.meta,
+            'format_version': FORMAT_VERSION,
+            'names': self.names,
+            'labels': self.labels,
+            'arrays': list(self.arrays.keys()),
+            'length': len(self),
+        }
+        header.pop('encodings', None)
+        if encodings:
+            header['encodings'] = encodings
+        with open(f'{temporary}/meta.json', 'w') as f:
+            json.dump(header, f, indent=4)
+
+        if os.path.isdir(path):
+            shutil.rmtree(old, ignore_errors=True)
+            os.rename(path, old)
+        os.rename(temporary, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return path
+
+    @classmethod
+    def load(cls, filename: str, mmap: bool = True,
+             window: tuple[float | None, float | None] | None = None
+             ) -> 'Trajectory':
+        """
+        Args:
+            filename (str): The output file of the run, with or without an
+            extension.
+            mmap (bool): Whether to memory map the arrays rather than read
+            them. Encoded arrays are always decoded into memory.
+            window (tuple[float | None, float | None] | None): The first
+            and last time of the states to load, None for all of them.
+        Returns:
+            Trajectory: The trajectory.
+
+        The times are read first and the window found in them, then only
+        its rows are mapped, or decoded from the keyframes holding them.
+        """
+        path = trajectory_path(filename)
+        if not os.path.isfile(f'{path}/meta.json'):
+            # a save was interrupted after moving the old trajectory aside
+            path = f'{path}.old'
+        with open(f'{path}/meta.json', 'r') as f:
+            meta = json.load(f)
+        if meta.get('format_version', 0) > FORMAT_VERSION:
+            raise ValueError(f'{path} was written by a newer version')
+
+        encodings = meta.get('encodings', {})
+
+        def load_array(key: str, rows: slice) -> np.ndarray:
+            if key not in encodings:
+                value = np.load(f'{path}/{key}.npy', mmap_mode='r')[rows]
+                return value if mmap else np.array(value)
+            with open(f'{path}/{key}.bin', 'rb') as f:
+                value = read(f, encodings[key], rows.start, rows.stop)
+            # read only, as a memory mapped array is
+            value.flags.writeable = not mmap
+            return value
+
+        time = load_array('time', slice(None))
+        rows = slice(0, len(time))
+        if window is not None:
+            rows = time_rows(time, *window)
+            time = time[rows]
+        arrays = {key: load_array(key, rows) for key in meta['arrays']}
+        return cls(meta['names'], time, arrays, meta)
+
+
+def time_rows(time: np.ndarray, start: float | None = None,
+              end: float | None = None) -> slice:
+    """
+    Args:
+        time (np.ndarray): The sorted times of the logged states.
+        start (float | None): The first time, None for the first state.
+        end (float | None): The last time, None for the last state.
+    Returns:
+        slice: The rows of the states logged from start to end.
+    """
+    first = 0 if start is None else \
+        int(np.searchsorted(time, start, side='left'))
+    last = len(time) if end is None else \
+        int(np.searchsorted(time, end, side='right'))
+    return slice(first, max(first, last))
+
+
+def _buffers(rows: int, width: int) -> dict[str, np.ndarray]:
+    """
+    Args:
+        rows (int): The rows of each array.
+        width (int): The bodies of each array.
+    Returns:
+        dict[str, np.ndarray]: Arrays of NaN for each quantity.
+    """
+    buffers = {key: np.full((rows, width, 3), np.nan) for key in VECTORS}
+    buffers.update({key: np.full((rows, width), np.nan) for key in SCALARS})
+    buffers['energy'] = np.full(rows, np.nan)
+    buffers['momentum'] = np.full((rows, 3), np.nan)
+    return buffers
+
+
+def _resize(array: np.ndarray, width: int) -> np.ndarray:
+    """
+    Args:
+        array (np.ndarray): The rows of a quantity of the bodies.
+        width (int): The bodies wanted.
+    Returns:
+        np.ndarray: The array with the columns of the first bodies, and
+        columns of NaN for those it does not have.
+    """
+    if array.shape[1] >= width:
+        return array[:, :width]
+    resized = np.full((len(array), width) + array.shape[2:], np.nan)
+    resized[:, :array.shape[1]] = array
+    return resized
+
+
+class TrajectoryStates(Mapping):
+    """
+    Args:
+        trajectory (Trajectory): The trajectory, usually memory mapped.
+
+    The logged states of a trajectory keyed by time, as the simulations log
+    them, made one at a time when they are looked up rather than all at
+    once.
+    """
+
+    def __init__(self, trajectory: Trajectory) -> None:
+        self.trajectory = trajectory
+        self._rows: dict[float, int] | None = None
+
+    def __getitem__(self, time: float) -> dict:
+        if self._rows is None:
+            self._rows = {key: row for row, key in enumerate(self)}
+        return self.trajectory.state(self._rows[time])
+
+    def __iter__(self):
+        return iter(np.asarray(self.trajectory.time).tolist())
+
+    def __len__(self) -> int:
+        return len(self.trajectory)
+
+
+class TrajectoryWriter:
+    """
+    Args:
+        filename (str): The output file of the run, with or without an
+        extension.
+        meta (dict | None): Anything else about the run, such as its config.
+        rows (int | None): The states to keep of a trajectory that is
+        being resumed, None to start a new one.
+        chunk (int): The states held before they are appended to the files.
+        queue_size (int): The states that may wait for the writer.
+        fields (list[str] | None): The quantities of the bodies to keep,
+        None for all. The mass is always kept.
+
+    Streams logged states to a trajectory. The simulation logs a state with
+    writer[time] = state, and a thread puts the states into arrays and
+    appends them to the files in chunks, so the memory used does not grow
+    with the length of the run. The headers are updated on each flush, so
+    the trajectory can be loaded up to the last one even if the process is
+    killed. The bodies are those in the first state, a body may leave but
+    not join.
+    """
+
+    def __init__(self, filename: str, meta: dict | None = None,
+                 rows: int | None = None, chunk: int = CHUNK,
+                 queue_size: int = QUEUE_SIZE,
+                 fields: list[str] | None = None) -> None:
+        self.path = trajectory_path(filename)
+        self.meta = dict(meta or {})
+        self._keys = [key for key in VECTORS + SCALARS
+                      if fields is None or key in fields or key == 'mass']
+        self._chunk = chunk
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._error: BaseException | None = None
+        self._closed = False
+
+        self.names: list[str] = []
+        self._columns: dict[str, int] = {}
+        self._labels: list[str] = []
+        self._files: dict = {}
+        self._offsets: dict[str, int] = {}
+        self._shapes: dict[str, tuple] = {}
+        self._buffers: dict[str, np.ndarray] = {}
+        self._buffered = 0
+        self._written = 0
+
+        if rows is None:
+            for folder in [self.path, f'{self.path}.tmp', f'{self.path}.old']:
+                shutil.rmtree(folder, ignore_errors=True)
+        else:
+            self._reopen(rows)
+        self._count = self._written
+
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f'writer {self.path}')
+        self._thread.start()
+
+    def __setitem__(self, time: float, state: dict) -> None:
+        self.put(time, state)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> 'TrajectoryWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def put(self, time: float, state: dict) -> None:
+        """
+        Args:
+            time (float): The time of the state.
+            state (dict): The logged state, a dict of Particle.to_json
+            states and optionally the system_info.
+        Returns:
+            None
+
+        Queues a state for the writer, waiting if it has fallen behind.
+        """
+        self._raise()
+        if self._closed:
+            raise ValueError(f'{self.path} has been closed')
+        self._queue.put((time, state))
+        self._count += 1
+
+    def flush(self) -> None:
+        """
+        Waits for the queued states to be written and updates the headers,
+        so the trajectory on disk holds every state logged so far.
+        """
+        if not self._closed:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+        self._raise()
+
+    def close(self) -> None:
+        """
+        Writes the queued states and the headers and stops the thread. Safe
+        to call more than once, and after the simulation was interrupted.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        self._raise()
+
+    def states(self) -> TrajectoryStates:
+        """
+        Returns:
+            TrajectoryStates: The states written, memory mapped.
+        """
+        self.close()
+        return TrajectoryStates(Trajectory.load(self.path))
+
+    def _raise(self) -> None:
+        """
+        Raises the error the thread stopped writing on, in the thread that
+        logs the states.
+        """
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        """
+        Takes states off the queue until the writer is closed. After an
+        error the states are dropped so the simulation is never blocked,
+        and those before it are still written.
+        """
+        failed = False
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _FLUSH or item is _CLOSE:
+                    self._write_chunk()
+                    self._write_headers()
+                elif not failed:
+                    self._add(*item)
+            except BaseException as e:
+                if self._error is None:
+                    self._error = e
+                failed = True
+            finally:
+                if item is _CLOSE:
+                    for f in self._files.values():
+                        f.close()
+                self._queue.task_done()
+            if item is _CLOSE:
+                return
+
+    def _shape(self, key: str) -> tuple:
+        """
+        Args:
+            key (str): The quantity.
+        Returns:
+            tuple: The shape of a row of the quantity.
+        """
+        n = len(self.names)
+        if key in VECTORS:
+            return (n, 3)
+        if key in SCALARS:
+            return (n,)
+        if key == 'momentum':
+            return (3,)
+        return ()
+
+    def _open(self, state: dict) -> None:
+        """
+        Args:
+            state (dict): The first state, which sets the bodies.
+        Returns:
+            None
+
+        Creates the files, each with an empty header.
+        """
+        self.names = [name for name in state if name != 'system_info']
+        self._columns = {name: k for k, name in enumerate(self.names)}
+        self._labels = [state[name].get('name', name) for name in self.names]
+        keys = self._keys
+        if 'system_info' in state:
+            keys = keys + ['energy', 'momentum']
+
+        os.makedirs(self.path, exist_ok=True)
+        for key in ['time'] + keys:
+            self._shapes[key] = self._shape(key)
+            f = open(f'{self.path}/{key}.npy', 'w+b')
+            self._write_header(key, f, 0)
+            self._offsets[key] = f.tell()
+            self._files[key] = f
+        self._allocate()
+
+    def _reopen(self, rows: int) -> None:
+        """
+        Args:
+            rows (int): The states to keep.
+        Returns:
+            None
+
+        Opens the files of a trajectory to append to it, dropping the
+        states after the first rows.
+        """
+        if not os.path.isfile(f'{self.path}/meta.json'):
+            raise ValueError(f'{self.path} has no trajectory to resume')
+        with open(f'{self.path}/meta.json', 'r') as f:
+            meta = json.load(f)
+        if 'encodings' in meta:
+            raise ValueError(f'{self.path} is encoded and cannot be '
+                             f'appended to')
+        if meta['length'] < rows:
+            raise ValueError(f'{self.path} has {meta["length"]} states, '
+                             f'not {rows}')
+        self.names = meta['names']
+        self._columns = {name: k for k, name in enumerate(self.names)}
+        self._labels = meta['labels']
+        self._keys = [key for key in VECTORS + SCALARS
+                      if key in meta['arrays']]
+        for key in ['time'] + meta['arrays']:
+            f = open(f'{self.path}/{key}.npy', 'r+b')
+            np.lib.format.read_magic(f)
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+            self._shapes[key] = shape[1:]
+            self._offsets[key] = f.tell()
+            f.truncate(self._offsets[key] + rows * self._row_bytes(key))
+            f.seek(0, os.SEEK_END)
+            self._files[key] = f
+        self._written = rows
+        self._allocate()
+
+    def _allocate(self) -> None:
+        """
+        Makes the arrays the states are put into before being written.
+        """
+        self._buffers = {key: np.full((self._chunk,) + shape, np.nan)
+                         for key, shape in self._shapes.items()}
+
+    def _row_bytes(self, key: str) -> int:
+        """
+        Args:
+            key (str): The quantity.
+        Returns:
+            int: The bytes of one row of the quantity.
+        """
+        return 8 * int(np.prod(self._shapes[key], dtype=int))
+
+    def _add(self, time: float, state: dict) -> None:
+        """
+        Args:
+            time (float): The time of the state.
+            state (dict): The logged state.
+        Returns:
+            None
+
+        Puts a state into the next row of the arrays, writing them once
+        they are full.
+        """
+        if not self._files:
+            self._open(state)
+        row = self._buffered
+        buffers = self._buffers
+        for buffer in buffers.values():
+            buffer[row] = np.nan
+        buffers['time'][row] = time
+        for name, body in state.items():
+            if name == 'system_info':
+                buffers['energy'][row] = body['energy']
+                buffers['momentum'][row] = body['momentum']
+                continue
+            column = self._columns.get(name)
+            if column is None:
+                raise ValueError(f'{name} was not in the first state of '
+                                 f'{self.path}')
+            for key in self._keys:
+                buffers[key][row, column] = body[key]
+        self._buffered += 1
+        if self._buffered == self._chunk:
+            self._write_chunk()
+
+    def _write_chunk(self) -> None:
+        """
+        Appends the states held to the files.
+        """
+        if self._buffered == 0:
+            return
+        for key, f in self._files.items():
+            f.write(self._buffers[key][:self._buffered]
+                    .astype('<f8', copy=False).tobytes())
+        self._written += self._buffered
+        self._buffered = 0
+
+    def _write_header(self, key: str, f, rows: int) -> None:
+        """
+        Args:
+            key (str): The quantity.
+            f: The open file of the quantity.
+            rows (int): The rows written.
+        Returns:
+            None
+
+        Writes the npy header at the start of the file. The header is
+        padded so the number of rows can grow without it changing length.
+        """
+        f.seek(0)
+        np.lib.format.write_array_header_1_0(f, {
+            'descr': '<f8', 'fortran_order': False,
+            'shape': (rows,) + self._shapes[key]})
+        if key in self._offsets and f.tell() != self._offsets[key]:
+            raise ValueError(f'The header of {f.name} changed length')
+
+    def _write_headers(self) -> None:
+        """
+        Updates the headers to the rows written, then the meta.json, which
+        makes the trajectory loadable.
+        """
+        if not self._files:
+            return
+        for key, f in self._files.items():
+            self._write_header(key, f, self._written)
+            f.seek(0, os.SEEK_END)
+            f.flush()
+        arrays = [key for key in self._files if key != 'time']
+        write_json(f'{self.path}/meta.json', {
+            **self.meta,
+            'format_version': FORMAT_VERSION,
+            'names': self.names,
+            'labels': self._labels,
+            'arrays': arrays,
+            'length': self._written,
+        }, indent=4)
+
+
+def cache_path(filename: str) -> str:
+    """
+    Args:
+        filename (str): A run saved as json.
+    Returns:
+        str: The folder of the run's cached trajectory.
+    """
+    return trajectory_path(f'{filename}{CACHE_SUFFIX}')
+
+
+def stream(filename: str, path: str, meta: dict | None = None,
+           objects: list[str] | None = None,
+           fields: list[str] | None = None) -> str:
+    """
+    Args:
+        filename (str): A run saved as json.
+        path (str): The trajectory to write.
+        meta (dict | None): Anything else about the run.
+        objects (list[str] | None): The bodies to keep, None for all.
+        fields (list[str] | None): The quantities of the bodies to keep,
+        None for all.
+    Returns:
+        str: The folder the trajectory was saved to.
+
+    Reads the states of the json one at a time into a writer, so neither
+    the json nor the arrays are held in memory. A run whose states are not
+    in time order, or that has a body join after the first state, is put
+    into arrays in memory instead.
+    """
+    try:
+        with TrajectoryWriter(path, meta, fields=fields) as writer:
+            for time, state in iter_states(filename, objects, fields):
+                writer[time] = state
+        if len(writer) > 0:
+            trajectory = Trajectory.load(writer.path)
+            if trajectory.sorted() is trajectory:
+                return writer.path
+    except ValueError:
+        # a body joined after the first state
+        pass
+    return Trajectory.from_states(iter_states(filename, objects, fields),
+                                  meta).sorted().save(path)
+
+
+def load_cached(filename: str) -> Trajectory:
+    """
+    Args:
+        filename (str): A run saved as json.
+    Returns:
+        Trajectory: The states of the run sorted by time, memory mapped
+        from the cache beside the json if it is up to date.
+
+    The cache is keyed by the size, modification time and hash of the json.
+    If only the time has changed the json is hashed, and the cache is kept
+    if it has the same contents. Otherwise the json is streamed into the
+    cache, or into memory if it cannot be written.
+    """
+    stat = os.stat(filename)
+    path = cache_path(filename)
+    cached = None
+    if is_trajectory(path):
+        cached = Trajectory.load(path)
+        source = cached.meta.get('source', {})
+        if source.get('size') != stat.st_size:
+            cached = None
+        elif source.get('mtime_ns') == stat.st_mtime_ns:
+            return cached
+
+    sha256 = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+              'sha256': sha256.hexdigest()}
+    if cached is not None and \
+            cached.meta['source'].get('sha256') == source['sha256']:
+        try:
+            write_json(f'{path}/meta.json',
+                       {**cached.meta, 'source': source}, indent=4)
+        except OSError:
+            pass
+        return cached
+
+    try:
+        stream(filename, path)
+        # the source is written last, so an interrupted cache is rebuilt
+        trajectory = Trajectory.load(path)
+        write_json(f'{path}/meta.json',
+                   {**trajectory.meta, 'source': source}, indent=4)
+    except OSError:
+        return Trajectory.from_states(iter_states(filename),
+                                      {'source': source}).sorted()
+    return Trajectory.load(path)
+
+
+def convert(filename: str, remove: bool = False,
+            objects: list[str] | None = None,
+            fields: list[str] | None = None) -> str:
+    """
+    Args:
+        filename (str): A run saved as json.
+        remove (bool): Whether to delete the json once converted.
+        objects (list[str] | None): The bodies to keep, None for all.
+        fields (list[str] | None): The quantities of the bodies to keep,
+        None for all.
+    Returns:
+        str: The folder the trajectory was saved to.
+    """
+    title = os.path.splitext(os.path.basename(filename))[0]
+    sim = os.path.basename(os.path.dirname(os.path.abspath(filename)))
+    path = stream(filename, filename, {'title': title, 'sim': sim},
+                  objects, fields)
+    if remove:
+        os.remove(filename)
+    return path
+
+
+def convert_all(folder: str = 'data/sims', remove: bool = False,
+                objects: list[str] | None = None,
+                fields: list[str] | None = None) -> list[str]:
+    """
+    Args:
+        folder (str): The folder to search for runs saved as json.
+        remove (bool): Whether to delete the json once converted.
+        objects (list[str] | None): The bodies to keep, None for all.
+        fields (list[str] | None): The quantities of the bodies to keep,
+        None for all.
+    Returns:
+        list[str]: The trajectories written.
+
+    Converts every json run in the folder, and in the folders within it,
+    that has not been converted.
+    """
+    paths = []
+    for root, folders, files in os.walk(folder):
+        folders[:] = [name for name in folders if not name.endswith(
+            (SUFFIX, f'{SUFFIX}.tmp', f'{SUFFIX}.old'))]
+        for name in sorted(files):
+            filename = os.path.join(root, name)
+            if not name.endswith('.json') or is_trajectory(filename):
+                continue
+            try:
+                paths.append(convert(filename, remove, objects, fields))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                print(f'Skipping {filename}: {e}')
+    return paths
+
+
+def encode(filename: str, codec: Codec | None, output: str | None = None,
+           replace: bool = False) -> dict[str, tuple[float, float]]:
+    """
+    Args:
+        filename (str): A run saved as a trajectory.
+        codec (Codec | None): The codec to encode the arrays with, None to
+        decode them back into .npy files.
+        output (str | None): The trajectory to write, None to replace the
+        one read.
+        replace (bool): Whether a lossy codec may replace the trajectory
+        read, whose lost precision cannot be had back.
+    Returns:
+        dict[str, tuple[float, float]]: The compression ratio and the
+        largest reconstruction error of each array.
+
+    Re-encodes the trajectory. Each ratio is of the full precision array.
+    The errors of every encoding a trajectory has been through are added
+    up in its header, so each error is a bound on the difference from the
+    values the run logged, not from the values read.
+    """
+    lossy = codec is not None and codec.precision != Precision.FLOAT64
+    in_place = output is None or \
+        trajectory_path(output) == trajectory_path(filename)
+    if lossy and in_place and not replace:
+        raise ValueError(f'Encoding {filename} as {codec.to_dict()} in '
+                         f'place would lose precision, write it to an '
+                         f'output or replace it explicitly')
+    trajectory = Trajectory.load(filename, mmap=False)
+    path = trajectory.save(filename if output is None else output, codec)
+    saved = Trajectory.load(path, mmap=False)
+
+    errors = trajectory.meta.get('errors', {})
+    report = {}
+    for key in ['time'] + list(trajectory.arrays):
+        size = os.path.getsize(f'{path}/{key}.bin' if codec is not None
+                               else f'{path}/{key}.npy')
+        value = getattr(trajectory, key)
+        error = errors.get(key, 0.0) + max_error(value, getattr(saved, key))
+        report[key] = (8 * value.size / max(size, 1), error)
+    write_json(f'{path}/meta.json', {
+        **saved.meta,
+        'errors': {key: error for key, (_, error) in report.items()},
+    }, indent=4)
+    return report
+
+
+def encode_all(folder: str = 'data/sims', codec: Codec | None = None,
+               output: str | None = None, replace: bool = False
+               ) -> dict[str, dict[str, tuple[float, float]]]:
+    """
+    Args:
+        folder (str): The folder to search for trajectories.
+        codec (Codec | None): The codec to encode the arrays with, None to
+        decode them back into .npy files.
+        output (str | None): The folder to write the trajectories to, in
+        the same folders they are in within folder, None to replace them.
+        replace (bool): Whether a lossy codec may replace the trajectories.
+    Returns:
+        dict[str, dict[str, tuple[float, float]]]: The report of encode for
+        each trajectory.
+
+    Re-encodes every trajectory in the folder, and in the folders within
+    it, other than the caches of json runs.
+    """
+    paths = []
+    for root, folders, _ in os.walk(folder):
+        for name in sorted(folders):
+            path = os.path.join(root, name)
+            if name.endswith(SUFFIX) and \
+                    not name.endswith(f'{CACHE_SUFFIX}{SUFFIX}') and \
+                    is_trajectory(path):
+                paths.append(path)
+        folders[:] = [name for name in folders if not name.endswith(
+            (SUFFIX, f'{SUFFIX}.tmp', f'{SUFFIX}.old'))]
+
+    reports = {}
+    for path in paths:
+        target = None if output is None else \
+            os.path.join(output, os.path.relpath(path, folder))
+        reports[path] = encode(path, codec, target, replace)
+    return reports
@@ -0,0 +1,136 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+from models.adaptive import DormandPrince
+from models.events import Event, EventDetector, radial_velocity
+from models.orientation import axis_angle, quaternion_multiply
+import numpy as np
+import unittest
+
+
+class TestDormandPrince(unittest.TestCase):
+    def setUp(self):
+        # a very eccentric orbit, which needs small steps at perihelion
+        self.G = 6.67408e-11
+        self.sun_mass = 1.989e30
+        self.perihelion = 1.0e11
+        eccentricity = 0.8
+        semi_major = self.perihelion / (1 - eccentricity)
+        self.period = 2 * np.pi * np.sqrt(semi_major**3 /
+                                          (self.G * self.sun_mass))
+        speed = np.sqrt(self.G * self.sun_mass * (1 + eccentricity) /
+                        self.perihelion)
+
+        self.sun = Particle(position=np.array([0.0, 0.0, 0.0]),
+                            velocity=np.array([0.0, 0.0, 0.0]),
+                            name='sun', mass=self.sun_mass)
+        self.planet = Particle(position=np.array([self.perihelion, 0.0, 0.0]),
+                               velocity=np.array([0.0, speed, 0.0]),
+                               name='planet', mass=1.0)
+        self.system = SolarSystem([self.sun, self.planet],
+                                  UpdateMethod.VERLET)
+        self.system.reset()
+
+    def test_closed_orbit(self):
+        """
+        Tests that the planet returns to perihelion after one period
+        """
+        driver = DormandPrince(self.system, initial_step=1e5, rtol=1e-10)
+        energy = self.system.get_system_energy()
+
+        driver.advance_to(self.period)
+
+        print(driver.stats())
+        separation = self.planet.position - self.sun.position
+        error = np.linalg.norm(separation - [self.perihelion, 0, 0]) / \
+            self.perihelion
+        print(f"Position error: {error}")
+
+        self.assertEqual(driver.time, self.period)
+        self.assertTrue(error < 1e-6)
+        self.assertTrue(np.isclose(self.system.get_system_energy(), energy,
+                                   rtol=1e-8))
+
+    def test_time(self):
+        """
+        Tests that the time and the spin of the system follow the steps of
+        the driver
+        """
+        orientation = self.system.orientation
+        orientation.append(np.array([0.0, 0.0, 1.0]), 1e-5)
+        driver = DormandPrince(self.system, initial_step=1e5, rtol=1e-8)
+        driver.advance_to(self.period / 3)
+
+        self.assertTrue(driver.accepted > 1)
+        self.assertTrue(np.isclose(self.system.time, self.period / 3,
+                                   rtol=1e-12))
+        self.assertTrue(np.isclose(orientation.time, self.period / 3,
+                                   rtol=1e-12))
+        spin = axis_angle(orientation.axis, orientation.rate * self.period / 3)
+        self.assertTrue(np.allclose(
+            orientation.quaternion,
+            quaternion_multiply(spin, orientation.initial), atol=1e-8))
+
+    def test_events(self):
+        """
+        Tests that the apsides are found within the adaptive steps, and that
+        a terminal event stops the driver at it
+        """
+        row = self.system.phase_index('planet')
+        centre = self.system.phase_index('sun')
+        for terminal in [False, True]:
+            self.system.reset()
+            detector = EventDetector(
+                [Event('apoapsis', radial_velocity(row, centre), direction=-1,
+                       terminal=terminal),
+                 Event('periapsis', radial_velocity(row, centre),
+                       direction=1)],
+                self.system.phase_space, self.system.set_phase_space,
+                self.system.advance)
+            driver = DormandPrince(self.system, initial_step=1e5,
+                                   rtol=1e-10)
+            stopped = driver.advance_to(1.25 * self.period, detector)
+
+            times = [record.time for record in detector.records]
+            self.assertEqual(stopped, terminal)
+            self.assertTrue(np.isclose(times[0], self.period / 2,
+                                       rtol=1e-6))
+            if terminal:
+                self.assertEqual(len(times), 1)
+                self.assertTrue(np.isclose(driver.time, times[0]))
+                self.assertTrue(np.isclose(self.system.time, times[0]))
+                self.assertTrue(np.allclose(
+                    self.system.phase_space()[0][row],
+                    detector.records[0].position[row]))
+            else:
+                self.assertEqual([record.name for record in detector.records],
+                                 ['apoapsis', 'periapsis'])
+                self.assertTrue(np.isclose(times[1], self.period, rtol=1e-6))
+                self.assertEqual(driver.time, 1.25 * self.period)
+
+    def test_rejected_steps(self):
+        """
+        Tests that a step that is too large is rejected and retried
+        """
+        driver = DormandPrince(self.system, initial_step=self.period / 4,
+                               rtol=1e-10)
+        driver.step()
+
+        self.assertTrue(driver.rejected > 0)
+        self.assertTrue(driver.time < self.period / 4)
+
+    def test_step_limits(self):
+        """
+        Tests that steps stay within the limits
+        """
+        driver = DormandPrince(self.system, initial_step=1e3, rtol=1e-6,
+                               max_step=2e3)
+        for _ in range(10):
+            self.assertTrue(driver.step() <= 2e3)
+
+        # a minimum step too large for the tolerance is forced through
+        driver = DormandPrince(self.system, initial_step=1e6, rtol=1e-14,
+                               min_step=1e6)
+        driver.step()
+        self.assertEqual(driver.forced, 1)
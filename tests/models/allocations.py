@@ -0,0 +1,135 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, ParticleState, UpdateMethod
+import numpy as np
+import unittest
+import pandas as pd
+import tracemalloc
+import time
+import os
+
+
+class TestAllocations(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+
+    def create_orbit(self, method: UpdateMethod) -> tuple[Particle, Particle]:
+        """
+        Args:
+            method (UpdateMethod): update method
+        Returns:
+            (tuple[Particle, Particle]): a planet and the sun attracting it
+        """
+        sun = Particle(name='sun', mass=1.989e30)
+        planet = Particle(position=np.array([1.496e11, 0.0, 0.0]),
+                          velocity=np.array([0.0, 2.978e4, 0.0]),
+                          name='planet', mass=5.972e24, method=method)
+        planet.set_bodies([sun])
+        planet.init_acceleration()
+        return planet, sun
+
+    def step(self, planet: Particle, deltaT: float) -> None:
+        """
+        Args:
+            planet (Particle): the particle to step
+            deltaT (float): time step
+        Returns:
+            None
+
+        Takes one step with a particle on its own, as ProjectileSim does
+        """
+        if planet.method == UpdateMethod.VERLET:
+            planet.verlet_update_position(deltaT)
+        planet.update_gravitational_acceleration()
+        planet.update(deltaT)
+
+    def test_initial_state(self):
+        """
+        Tests that neither the caller nor the steps can change the state a
+        particle resets to
+        """
+        position = np.array([1.0, 2.0, 3.0])
+        velocity = np.array([4.0, 5.0, 6.0])
+        particle = Particle(position=position, velocity=velocity,
+                            acceleration=np.array([0.0, -9.81, 0.0]))
+        position += 10.0
+        particle.position += 10.0
+        for _ in range(100):
+            particle.update(0.01)
+
+        with self.assertRaises(ValueError):
+            particle.init_position += 1.0
+
+        particle.reset()
+        self.assertTrue(np.array_equal(particle.position, [1.0, 2.0, 3.0]))
+        self.assertTrue(np.array_equal(particle.velocity, [4.0, 5.0, 6.0]))
+
+    def test_moved_state(self):
+        """
+        Tests that a particle keeps stepping its own row after its state
+        grows and moves its buffers
+        """
+        planet, sun = self.create_orbit(UpdateMethod.EULER_CROMER)
+        expected, _ = self.create_orbit(UpdateMethod.EULER_CROMER)
+        self.step(planet, 3600.0)
+        self.step(expected, 3600.0)
+
+        state = ParticleState(capacity=1)
+        planet.attach(state)
+        for k in range(10):
+            state.append(np.full(3, k), np.zeros(3), np.zeros(3),
+                         np.zeros(3), 1.0)
+        for _ in range(10):
+            self.step(planet, 3600.0)
+            self.step(expected, 3600.0)
+
+        self.assertTrue(np.array_equal(state.position[0], planet.position))
+        self.assertTrue(np.array_equal(planet.position, expected.position))
+        self.assertTrue(np.array_equal(state.position[1], np.zeros(3)))
+
+    def test_allocations(self):
+        """
+        Benchmarks the memory allocated while stepping a particle around
+        the sun with each method
+        """
+        steps = 1000
+        for method in [UpdateMethod.EULER, UpdateMethod.EULER_CROMER,
+                       UpdateMethod.VERLET, UpdateMethod.YOSHIDA4,
+                       UpdateMethod.FOREST_RUTH]:
+            planet, _ = self.create_orbit(method)
+            self.step(planet, 3600.0)
+
+            # the peak is the most memory held at once by temporaries, and
+            # what is left afterwards is what the steps keep
+            tracemalloc.start()
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            for _ in range(steps):
+                self.step(planet, 3600.0)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            start_time = time.perf_counter()
+            for _ in range(steps):
+                self.step(planet, 3600.0)
+            elapsed = (time.perf_counter() - start_time) / steps
+
+            self.df[method.name] = [peak - start, current - start,
+                                    f"{elapsed * 1e6:.1f}"]
+
+            # a few scalars, but no arrays are made for each step
+            self.assertTrue(peak - start < 512)
+            self.assertTrue(current - start < 1024)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Peak temporary memory (bytes)',
+            'Memory kept after 1000 steps (bytes)',
+            'Time per step (us)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/allocations.tex')
@@ -0,0 +1,107 @@
+import sys
+sys.path.append('src')
+from models.barnes_hut import barnes_hut_acceleration
+from models.particle import ParticleState
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestBarnesHut(unittest.TestCase):
+    def create_state(self, n: int, seed: int = 0) -> ParticleState:
+        """
+        Args:
+            n (int): number of particles
+            seed (int): random seed
+        Returns:
+            (ParticleState): a sun with a clustered cloud of bodies
+        """
+        rng = np.random.default_rng(seed)
+        position = rng.normal(size=(n, 3)) * 1e11
+        position[:n // 2] *= 0.05
+        mass = rng.uniform(1e20, 1e25, n)
+        mass[0] = 2e30
+
+        state = ParticleState(capacity=n)
+        for i in range(n):
+            state.append(position[i], np.zeros(3), np.zeros(3), np.zeros(3),
+                         mass[i])
+        return state
+
+    def relative_error(self, state: ParticleState, theta: float) -> np.ndarray:
+        """
+        Args:
+            state (ParticleState): the particles
+            theta (float): opening angle
+        Returns:
+            (np.ndarray): relative error of each particle's acceleration
+        """
+        direct = state.compute_acceleration()
+        approx = barnes_hut_acceleration(state.position, state.mass, state.G,
+                                         theta)
+        return np.linalg.norm(approx - direct, axis=1) / \
+            np.linalg.norm(direct, axis=1)
+
+    def test_zero_opening_angle_is_exact(self):
+        """
+        Tests that opening every node reproduces the direct sum
+        """
+        error = self.relative_error(self.create_state(500), 0.0)
+        self.assertTrue(np.max(error) < 1e-12)
+
+    def test_tolerance(self):
+        """
+        Tests the documented tolerance for an opening angle of 0.5
+        """
+        error = self.relative_error(self.create_state(1000), 0.5)
+
+        print(f"Max relative error: {np.max(error)}")
+        print(f"Median relative error: {np.median(error)}")
+
+        self.assertTrue(np.max(error) < 2e-2)
+        self.assertTrue(np.median(error) < 1e-3)
+
+    def test_coincident_particles(self):
+        """
+        Tests particles that share a cell at the maximum depth
+        """
+        state = self.create_state(50)
+        state.position[1] = state.position[2] + 1e-3
+
+        error = self.relative_error(state, 0.5)
+        self.assertTrue(np.all(np.isfinite(error)))
+
+    def test_benchmark(self):
+        """
+        Times the direct sum against Barnes-Hut to find where it starts to
+        win
+        """
+        sizes = [100, 300, 1000, 2000, 3000]
+        df = pd.DataFrame()
+        crossover = None
+
+        for n in sizes:
+            state = self.create_state(n)
+
+            start = time.perf_counter()
+            state.compute_acceleration()
+            direct_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            barnes_hut_acceleration(state.position, state.mass, state.G)
+            barnes_hut_time = time.perf_counter() - start
+
+            if crossover is None and barnes_hut_time < direct_time:
+                crossover = n
+
+            df[n] = [f"{direct_time * 1e3:.2f}",
+                     f"{barnes_hut_time * 1e3:.2f}"]
+
+        df.index = ['Direct sum (ms)', 'Barnes-Hut (ms)']
+        print(df)
+        print(f"Barnes-Hut is faster from N = {crossover}")
+
+        os.makedirs('data/tests', exist_ok=True)
+        df.to_latex('data/tests/barnes_hut.tex')
@@ -0,0 +1,158 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestBlockSteps(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.G = 6.67408e-11
+        cls.day = 86400.0
+
+    def circular(self, name: str, mass: float, centre: Particle | None,
+                 radius: float, central_mass: float,
+                 phase: float) -> Particle:
+        """
+        Args:
+            name (str): name of the particle
+            mass (float): mass of the particle
+            centre (Particle | None): the particle orbited, None for the
+            origin
+            radius (float): orbital radius
+            central_mass (float): mass of the particle orbited
+            phase (float): angle along the orbit
+        Returns:
+            (Particle): a particle on a circular orbit
+        """
+        speed = np.sqrt(self.G * central_mass / radius)
+        position = radius * np.array([np.cos(phase), np.sin(phase), 0.0])
+        velocity = speed * np.array([-np.sin(phase), np.cos(phase), 0.0])
+        if centre is not None:
+            position += centre.position
+            velocity += centre.velocity
+        return Particle(position=position, velocity=velocity, name=name,
+                        mass=mass)
+
+    def create_system(self) -> SolarSystem:
+        """
+        Returns:
+            (SolarSystem): the Sun, the planets and the Galilean moons
+        """
+        sun_mass = 1.989e30
+        jupiter_mass = 1.898e27
+        sun = Particle(position=np.zeros(3), velocity=np.zeros(3),
+                       name='sun', mass=sun_mass)
+        jupiter = self.circular('jupiter', jupiter_mass, None, 7.785e11,
+                                sun_mass, 0.0)
+        particles = [sun, jupiter]
+
+        planets = [(3.30e23, 5.79e10), (4.87e24, 1.08e11),
+                   (5.97e24, 1.50e11), (6.42e23, 2.28e11),
+                   (5.68e26, 1.43e12), (8.68e25, 2.87e12),
+                   (1.02e26, 4.50e12)]
+        for k, (mass, radius) in enumerate(planets):
+            particles.append(self.circular(f'planet {k}', mass, None, radius,
+                                           sun_mass, k + 1.0))
+
+        moons = [(8.93e22, 4.22e8), (4.80e22, 6.71e8),
+                 (1.48e23, 1.07e9), (1.08e23, 1.88e9)]
+        for k, (mass, radius) in enumerate(moons):
+            particles.append(self.circular(f'moon {k}', mass, jupiter,
+                                           radius, jupiter_mass, k + 1.0))
+
+        system = SolarSystem(particles, UpdateMethod.VERLET)
+        system.reset()
+        return system
+
+    def test_single_level(self):
+        """
+        Tests that block steps with one level are the Verlet method
+        """
+        verlet = self.create_system()
+        blocks = self.create_system()
+        blocks.set_block_steps(0)
+        for _ in range(10):
+            verlet.advance(100.0)
+            blocks.advance(100.0)
+
+        for name in ['sun', 'jupiter', 'moon 0', 'planet 6']:
+            self.assertTrue(np.allclose(
+                blocks.get_particle(name).position,
+                verlet.get_particle(name).position, rtol=1e-12))
+
+        # a single level is stepped together, without block steps
+        self.assertIsNone(blocks.block_steps)
+
+    def test_mixed_system(self):
+        """
+        Tests that the moons substep while the planets take the largest
+        step, with far fewer force evaluations than stepping everything at
+        the moons' step
+        """
+        max_level = 9
+        days = 30
+
+        reference = self.create_system()
+        initial = reference.get_system_energy()
+        start = time.process_time()
+        for _ in range(days * 2**max_level):
+            reference.advance(self.day / 2**max_level)
+        reference_time = time.process_time() - start
+
+        system = self.create_system()
+        system.set_block_steps(max_level, eta=0.01)
+        start = time.process_time()
+        for _ in range(days):
+            system.advance(self.day)
+        block_time = time.process_time() - start
+
+        stats = system.block_steps.stats()
+        print(stats)
+        ratio = stats['single_step_evaluations'] / stats['evaluations']
+        energy_error = abs(system.get_system_energy() / initial - 1)
+
+        def moon_offset(s: SolarSystem) -> np.ndarray:
+            return s.get_particle('moon 0').position - \
+                s.get_particle('jupiter').position
+        moon_error = np.linalg.norm(
+            moon_offset(system) - moon_offset(reference)) / \
+            np.linalg.norm(moon_offset(reference))
+
+        # the sun, jupiter, the planets and the moons
+        levels = system.block_steps.levels[0]
+        self.assertEqual(levels[0], 0)
+        self.assertTrue(np.max(levels[2:9]) < np.min(levels[9:]))
+        self.assertTrue(np.all(np.diff(levels[9:]) < 0))
+        self.assertTrue(ratio > 5)
+        self.assertTrue(moon_error < 1e-4)
+        self.assertTrue(energy_error < 1e-6)
+
+        self.df['Single step'] = [
+            f"{self.day / 2**max_level:.0f}",
+            stats['single_step_evaluations'],
+            f"{reference_time:.2f}",
+        ]
+        self.df['Block steps'] = [
+            f"{self.day / 2**max_level:.0f}-{self.day:.0f}",
+            stats['evaluations'],
+            f"{block_time:.2f}",
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Step (s)',
+            'Force evaluations',
+            'CPU time (s)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/block_steps.tex')
@@ -0,0 +1,199 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+from models.collisions import CollisionOutcome, find_contacts, grid_pairs, \
+    sweep_and_prune_pairs
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestCollisions(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+
+    def create_debris(self, n: int, seed: int = 12
+                      ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            n (int): number of bodies
+            seed (int): random seed
+        Returns:
+            (tuple[np.ndarray, np.ndarray]): positions and radii of debris at
+            the same density whatever the number of bodies
+        """
+        rng = np.random.default_rng(seed)
+        side = 1e6 * n**(1 / 3)
+        position = rng.uniform(0, side, (n, 3))
+        radius = rng.uniform(1e4, 1e5, n)
+        return position, radius
+
+    def brute_force(self, position: np.ndarray,
+                    radius: np.ndarray) -> set[tuple[int, int]]:
+        """
+        Args:
+            position (np.ndarray): positions
+            radius (np.ndarray): radii
+        Returns:
+            (set[tuple[int, int]]): every touching pair
+        """
+        separation = position[np.newaxis, :, :] - position[:, np.newaxis, :]
+        distance = np.linalg.norm(separation, axis=2)
+        touching = distance <= radius[:, np.newaxis] + radius[np.newaxis, :]
+        i, j = np.nonzero(np.triu(touching, 1))
+        return set(zip(i.tolist(), j.tolist()))
+
+    def test_broad_phases(self):
+        """
+        Tests that the grid and sweep and prune find every touching pair
+        """
+        position, radius = self.create_debris(2000)
+        # a few bodies much larger than the rest
+        radius[:5] = 1e6
+        expected = self.brute_force(position, radius)
+        self.assertTrue(len(expected) > 0)
+
+        i, j = find_contacts(position, radius)
+        self.assertEqual(set(zip(i.tolist(), j.tolist())), expected)
+
+        for pairs in [grid_pairs(position, radius),
+                      sweep_and_prune_pairs(position, radius)]:
+            i, j = pairs
+            separation = position[j] - position[i]
+            touching = np.linalg.norm(separation, axis=1) <= \
+                radius[i] + radius[j]
+            found = set(zip(np.minimum(i, j)[touching].tolist(),
+                            np.maximum(i, j)[touching].tolist()))
+            self.assertEqual(found, expected)
+            # each candidate pair is only given once
+            self.assertEqual(len(set(zip(i.tolist(), j.tolist()))), len(i))
+
+    def test_grid_fallback(self):
+        """
+        Tests that the grid gives way to sweep and prune when one body is
+        large enough to put everything in a few cells
+        """
+        position, radius = self.create_debris(2000)
+        radius[0] = 1e8
+        self.assertIsNone(grid_pairs(position, radius))
+        i, j = find_contacts(position, radius)
+        self.assertEqual(set(zip(i.tolist(), j.tolist())),
+                         self.brute_force(position, radius))
+
+    def create_pair(self, outcome: CollisionOutcome,
+                    test: bool = False) -> SolarSystem:
+        """
+        Args:
+            outcome (CollisionOutcome): collision outcome
+            test (bool): whether the second body is a test particle
+        Returns:
+            (SolarSystem): two bodies heading for each other
+        """
+        a = Particle(position=np.array([-1e7, 0.0, 0.0]),
+                     velocity=np.array([1e4, 0.0, 0.0]), name='a',
+                     mass=3e22, radius=1e6)
+        b = Particle(position=np.array([1e7, 1e5, 0.0]),
+                     velocity=np.array([-1e4, 0.0, 0.0]), name='b',
+                     mass=1e22, radius=1e6)
+        if test:
+            system = SolarSystem([a], UpdateMethod.VERLET,
+                                 test_particles=[b])
+        else:
+            system = SolarSystem([a, b], UpdateMethod.VERLET)
+        system.set_collisions(outcome)
+        system.reset()
+        return system
+
+    def test_merge(self):
+        """
+        Tests that merging keeps the mass, momentum and volume
+        """
+        system = self.create_pair(CollisionOutcome.MERGE)
+        momentum = system.get_system_momentum()
+        system.advance(10.0, 200)
+
+        self.assertEqual(len(system.collisions), 1)
+        self.assertEqual(system.massive_particles()[0].name, 'a')
+        merged = system.get_particle('a')
+        self.assertEqual(len(system.massive_particles()), 1)
+        self.assertEqual(merged.mass, 4e22)
+        self.assertTrue(np.isclose(merged.radius, 2**(1 / 3) * 1e6))
+        self.assertTrue(np.allclose(system.get_system_momentum(), momentum,
+                                    atol=1e-6 * np.linalg.norm(momentum)))
+
+        # a test particle is absorbed without changing the massive body
+        system = self.create_pair(CollisionOutcome.MERGE, test=True)
+        system.advance(10.0, 200)
+        self.assertEqual(len(system.collisions), 1)
+        self.assertEqual(system.get_particle('a').mass, 3e22)
+        self.assertEqual(len(system.states[1]), 0)
+
+    def test_bounce(self):
+        """
+        Tests that an elastic bounce keeps the momentum and kinetic energy
+        and separates the bodies
+        """
+        system = self.create_pair(CollisionOutcome.BOUNCE)
+        system.set_compiled(False)
+        momentum = system.get_system_momentum()
+        kinetic = system.get_system_kinetic_energy()
+
+        # far enough that the collision is over and the bodies are apart
+        system.advance(1.0, 2000)
+        self.assertEqual(len(system.collisions), 1)
+        a, b = system.get_particle('a'), system.get_particle('b')
+        self.assertTrue(a.velocity[0] < b.velocity[0])
+        self.assertTrue(np.allclose(system.get_system_momentum(), momentum,
+                                    atol=1e-6 * np.linalg.norm(momentum)))
+        self.assertTrue(np.isclose(system.get_system_kinetic_energy(),
+                                   kinetic, rtol=1e-2))
+
+    def test_stop(self):
+        """
+        Tests that the system stops at the first collision
+        """
+        system = self.create_pair(CollisionOutcome.STOP)
+        self.assertTrue(system.advance(10.0, 200))
+        self.assertTrue(system.stopped)
+        stop_time = system.time
+        self.assertTrue(stop_time < 2000.0)
+        self.assertTrue(system.advance(10.0, 10))
+        self.assertEqual(system.time, stop_time)
+
+    def test_scaling(self):
+        """
+        Benchmarks the broad phase, which should grow about linearly with
+        the number of bodies at a fixed density
+        """
+        times = []
+        sizes = [1000, 10000, 100000]
+        for n in sizes:
+            position, radius = self.create_debris(n)
+            find_contacts(position, radius)
+            start = time.perf_counter()
+            for _ in range(3):
+                i, _ = find_contacts(position, radius)
+            elapsed = (time.perf_counter() - start) / 3
+            times.append(elapsed)
+            self.df[f'{n} bodies'] = [f"{elapsed * 1e3:.2f}",
+                                      f"{elapsed / n * 1e6:.2f}", len(i)]
+
+        # per body cost may only grow with the log of the sort
+        self.assertTrue(times[-1] / sizes[-1] <
+                        8 * times[0] / sizes[0])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Time (ms)',
+            'Time per body (us)',
+            'Contacts',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/collisions.tex')
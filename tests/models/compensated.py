@@ -0,0 +1,128 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, ParticleState, UpdateMethod
+from models.solar_system import SolarSystem
+from fractions import Fraction
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestCompensated(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.G = 6.67408e-11
+        cls.sun_mass = 1.989e30
+        cls.radius = 1.496e11
+
+    def test_drift(self):
+        """
+        Tests that a body drifting far from the origin keeps its exact
+        position with compensation, and loses it without
+        """
+        steps = 315582
+        increment = 1e6 / 3
+        exact = Fraction(1e12) + steps * Fraction(increment)
+
+        errors = []
+        for compensated in [False, True]:
+            state = ParticleState()
+            state.append(np.array([1e12, 0.0, 0.0]),
+                         np.array([increment, 0.0, 0.0]), np.zeros(3),
+                         np.zeros(3), 1.0)
+            state.compensated = compensated
+            for _ in range(steps):
+                state.euler_update(1.0)
+            errors.append(abs(float(Fraction(state.position[0, 0]) - exact)))
+
+        print(f"Drift error, plain: {errors[0]}, compensated: {errors[1]}")
+        self.assertTrue(errors[0] > 1.0)
+        self.assertTrue(errors[1] < 1e-3)
+
+    def test_particle(self):
+        """
+        Tests that a particle on its own can compensate
+        """
+        particle = Particle(position=np.array([1e12, 0.0, 0.0]),
+                            velocity=np.array([1e6 / 3, 0.0, 0.0]))
+        particle.set_compensated(True)
+        for _ in range(10000):
+            particle.update(1.0)
+        exact = Fraction(1e12) + 10000 * Fraction(1e6 / 3)
+        self.assertTrue(abs(float(Fraction(particle.position[0]) - exact))
+                        < 1e-3)
+
+        particle.reset()
+        self.assertEqual(particle._state.position_error[0, 0], 0.0)
+
+    def orbit_error(self, deltaT: float, duration: float,
+                    compensated: bool) -> tuple[float, float]:
+        """
+        Args:
+            deltaT (float): time step
+            duration (float): time to run for
+            compensated (bool): whether to compensate
+        Returns:
+            (tuple[float, float]): the distance from the exact circular orbit
+            at the end and the CPU time
+        """
+        omega = np.sqrt(self.G * self.sun_mass / self.radius**3)
+        sun = Particle(position=np.zeros(3), velocity=np.zeros(3),
+                       name='sun', mass=self.sun_mass)
+        planet = Particle(position=np.array([self.radius, 0.0, 0.0]),
+                          velocity=np.array([0.0, omega * self.radius, 0.0]),
+                          name='planet', mass=1.0)
+        system = SolarSystem([sun], UpdateMethod.YOSHIDA4,
+                             test_particles=[planet])
+        system.set_compensated(compensated)
+        system.reset()
+
+        steps = int(round(duration / deltaT))
+        start = time.process_time()
+        system.advance(deltaT, steps)
+        elapsed = time.process_time() - start
+
+        angle = omega * steps * deltaT
+        exact = self.radius * np.array([np.cos(angle), np.sin(angle), 0.0])
+        return float(np.linalg.norm(planet.position - exact)), elapsed
+
+    def test_benchmark(self):
+        """
+        Benchmarks the largest Yoshida-4 step that keeps a quarter year
+        orbit as accurate as plain summation at 100 s
+        """
+        duration = 7.8e6
+        target = None
+        largest = None
+        for deltaT in [100.0, 400.0, 1600.0, 3200.0]:
+            plain, plain_time = self.orbit_error(deltaT, duration, False)
+            compensated, compensated_time = self.orbit_error(
+                deltaT, duration, True)
+            if target is None:
+                target = plain
+            if compensated <= target:
+                largest = deltaT
+            self.df[f'dt={deltaT:.0f}s'] = [
+                f"{plain:.2e}", f"{compensated:.2e}",
+                f"{plain_time:.2f}", f"{compensated_time:.2f}"
+            ]
+
+        print(f"Largest compensated step with the error of plain "
+              f"summation at 100s: {largest}s")
+        self.assertTrue(largest >= 400.0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Plain error (m)',
+            'Compensated error (m)',
+            'Plain CPU time (s)',
+            'Compensated CPU time (s)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/compensated.tex')
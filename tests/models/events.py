@@ -0,0 +1,175 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+from models.events import Event, EventDetector, height, radial_velocity, \
+    separation
+from sims.projectile import ProjectileSim
+from utils.config import ProjectileConfig
+import numpy as np
+import unittest
+import pandas as pd
+import os
+
+
+class TestEvents(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.G = 6.67408e-11
+        cls.sun_mass = 1.989e30
+
+    def create_config(self, method: UpdateMethod,
+                      deltaT: float) -> ProjectileConfig:
+        """
+        Args:
+            method (UpdateMethod): update method
+            deltaT (float): time step
+        Returns:
+            (ProjectileConfig): config for a projectile launched upwards
+        """
+        return ProjectileConfig({
+            'deltaT': deltaT,
+            'method': method.name.lower(),
+            'steps': 100000,
+            'log_interval': 100,
+            'gravity': -9.81,
+            'mass': 1.0,
+            'position': [0.0, 0.0, 0.0],
+            'velocity': [20.0, 50.0, 0.0],
+        })
+
+    def test_impact(self):
+        """
+        Tests that the projectile lands at the analytical time and place,
+        even with coarse steps
+        """
+        flight_time = 2 * 50.0 / 9.81
+        for deltaT in [0.3, 0.1, 0.01]:
+            config = self.create_config(UpdateMethod.VERLET, deltaT)
+            sim = ProjectileSim(config)
+            sim.save = lambda: sim.output_file
+            _, data = sim.run()
+
+            record = sim.event_records[-1]
+            self.assertEqual(record.name, 'ground')
+            self.assertTrue(np.isclose(record.time, flight_time, rtol=1e-10))
+            self.assertTrue(np.isclose(record.position[0],
+                                       20.0 * flight_time, rtol=1e-10))
+
+            # the last state logged is the impact
+            last = list(data.keys())[-1]
+            self.assertEqual(last, record.time)
+            self.assertTrue(abs(data[last]['projectile']['position'][1])
+                            < 1e-9)
+            self.df[f'Projectile dt={deltaT}'] = [
+                f"{abs(record.time - flight_time):.2e}"
+            ]
+
+    def test_bounce(self):
+        """
+        Tests that a handler can change the state, bouncing the projectile
+        with half of its vertical speed
+        """
+        config = self.create_config(UpdateMethod.VERLET, 0.1)
+        sim = ProjectileSim(config)
+        sim.save = lambda: sim.output_file
+
+        def bounce(record) -> bool:
+            record.velocity[1] *= -0.5
+            return True
+
+        def stop(position: np.ndarray, velocity: np.ndarray) -> float:
+            return len(sim.event_records) - 2.5
+
+        sim.events = [
+            Event('bounce', height(), direction=-1, handler=bounce),
+            Event('stop', stop, direction=1, terminal=True),
+        ]
+        sim.steps = 200
+        sim.run()
+
+        bounces = [record.time for record in sim.event_records
+                   if record.name == 'bounce']
+        flight_time = 2 * 50.0 / 9.81
+        self.assertTrue(np.isclose(bounces[0], flight_time, rtol=1e-10))
+        self.assertTrue(np.isclose(bounces[1], 1.5 * flight_time,
+                                   rtol=1e-10))
+
+    def test_periapsis(self):
+        """
+        Tests that the apsides of an eccentric orbit are found at the
+        analytical times, far more precisely than the step
+        """
+        perihelion = 1.0e11
+        eccentricity = 0.5
+        semi_major = perihelion / (1 - eccentricity)
+        period = 2 * np.pi * np.sqrt(semi_major**3 /
+                                     (self.G * self.sun_mass))
+        speed = np.sqrt(self.G * self.sun_mass * (1 + eccentricity) /
+                        perihelion)
+
+        # starting at perihelion, apoapsis is half an orbit later
+        sun = Particle(position=np.zeros(3), velocity=np.zeros(3),
+                       name='sun', mass=self.sun_mass)
+        planet = Particle(position=np.array([perihelion, 0.0, 0.0]),
+                          velocity=np.array([0.0, speed, 0.0]),
+                          name='planet', mass=1.0)
+        system = SolarSystem([sun, planet], UpdateMethod.VERLET)
+        system.set_compiled(False)
+        system.reset()
+
+        row = system.phase_index('planet')
+        centre = system.phase_index('sun')
+        detector = EventDetector(
+            [Event('periapsis', radial_velocity(row, centre), direction=1),
+             Event('apoapsis', radial_velocity(row, centre), direction=-1)],
+            system.phase_space, system.set_phase_space, system.advance)
+
+        deltaT = period / 2000
+        for _ in range(3000):
+            detector.step(deltaT)
+
+        names = [record.name for record in detector.records]
+        times = np.array([record.time for record in detector.records])
+        self.assertEqual(names, ['apoapsis', 'periapsis'])
+        # the error left is the period error of the integrator itself
+        self.assertTrue(np.all(np.abs(times - [period / 2, period]) <
+                               0.1 * deltaT))
+        self.df['Periapsis'] = [f"{abs(times[1] - period) / deltaT:.2e} dt"]
+
+    def test_collision(self):
+        """
+        Tests that two bodies falling together stop when their surfaces
+        touch
+        """
+        a = Particle(position=np.array([-1e7, 0.0, 0.0]),
+                     velocity=np.zeros(3), name='a', mass=1e24)
+        b = Particle(position=np.array([1e7, 0.0, 0.0]),
+                     velocity=np.zeros(3), name='b', mass=1e24)
+        system = SolarSystem([a, b], UpdateMethod.VERLET)
+        system.set_compiled(False)
+        system.reset()
+
+        radius = 2e6
+        detector = EventDetector(
+            [Event('collision', separation(0, 1, radius), direction=-1,
+                   terminal=True)],
+            system.phase_space, system.set_phase_space, system.advance)
+        for _ in range(100000):
+            if detector.step(10.0):
+                break
+
+        gap = np.linalg.norm(a.position - b.position) - radius
+        self.assertEqual(detector.records[-1].name, 'collision')
+        self.assertTrue(abs(gap) < 1e-3 * radius)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Event time error',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/events.tex')
@@ -0,0 +1,123 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestIntegrators(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+
+        # an eccentric orbit of an Earth mass planet around the Sun
+        cls.G = 6.67408e-11
+        cls.sun_mass = 1.989e30
+        cls.perihelion = 1.0e11
+        cls.eccentricity = 0.3
+        semi_major = cls.perihelion / (1 - cls.eccentricity)
+        cls.period = 2 * np.pi * np.sqrt(semi_major**3 /
+                                         (cls.G * cls.sun_mass))
+        cls.base_dt = cls.period / 20000
+
+    def create_system(self, method: UpdateMethod) -> SolarSystem:
+        """
+        Args:
+            method (UpdateMethod): update method
+        Returns:
+            (SolarSystem): the sun and planet at perihelion
+        """
+        speed = np.sqrt(self.G * self.sun_mass * (1 + self.eccentricity) /
+                        self.perihelion)
+        sun = Particle(position=np.array([0.0, 0.0, 0.0]),
+                       velocity=np.array([0.0, 0.0, 0.0]),
+                       name='sun', mass=self.sun_mass)
+        planet = Particle(position=np.array([self.perihelion, 0.0, 0.0]),
+                          velocity=np.array([0.0, speed, 0.0]),
+                          name='planet', mass=5.972e24)
+        system = SolarSystem([sun, planet], method)
+        system.reset()
+        return system
+
+    def energy_error(self, method: UpdateMethod,
+                     dt: float) -> tuple[float, float]:
+        """
+        Args:
+            method (UpdateMethod): update method
+            dt (float): time step
+        Returns:
+            (float, float): max relative energy error over one orbit and
+            the CPU time taken
+        """
+        system = self.create_system(method)
+        initial = system.get_system_energy()
+        steps = int(round(self.period / dt))
+
+        max_error = 0.0
+        cpu_time = 0.0
+        for _ in range(steps):
+            start = time.process_time()
+            system.advance(dt)
+            cpu_time += time.process_time() - start
+
+            error = abs((system.get_system_energy() - initial) / initial)
+            max_error = max(max_error, error)
+
+        return max_error, cpu_time
+
+    def record(self, method: UpdateMethod, multiple: int) -> float:
+        """
+        Args:
+            method (UpdateMethod): update method
+            multiple (int): step size as a multiple of the base step
+        Returns:
+            (float): max relative energy error
+        """
+        error, cpu_time = self.energy_error(method, multiple * self.base_dt)
+        self.df[f'{method.name} x{multiple}'] = [
+            f"{multiple * self.base_dt:.0f}",
+            f"{error:.2e}",
+            f"{cpu_time:.3f}",
+        ]
+        return error
+
+    def test_fourth_order_step_size(self):
+        """
+        Tests that the fourth order methods keep the energy error of the
+        Verlet method with much larger steps
+        """
+        self.record(UpdateMethod.EULER, 1)
+        self.record(UpdateMethod.EULER_CROMER, 1)
+        verlet_error = self.record(UpdateMethod.VERLET, 1)
+
+        for method in [UpdateMethod.YOSHIDA4, UpdateMethod.FOREST_RUTH]:
+            for multiple in [10, 20, 50]:
+                error = self.record(method, multiple)
+                if multiple <= 20:
+                    self.assertTrue(error < verlet_error)
+
+    def test_fourth_order_convergence(self):
+        """
+        Tests that halving the step reduces the error about sixteen times
+        """
+        for method in [UpdateMethod.YOSHIDA4, UpdateMethod.FOREST_RUTH]:
+            coarse, _ = self.energy_error(method, 100 * self.base_dt)
+            fine, _ = self.energy_error(method, 50 * self.base_dt)
+            print(f"{method.name} convergence ratio: {coarse / fine}")
+            self.assertTrue(coarse / fine > 10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Step (s)',
+            'Max energy error',
+            'CPU time (s)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/integrators.tex')
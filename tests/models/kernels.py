@@ -0,0 +1,134 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+from models.kernels import kernels_available
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestKernels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.G = 6.67408e-11
+        cls.sun_mass = 1.989e30
+
+    def create_system(self, n: int, method: UpdateMethod,
+                      compiled: bool, test_particles: int = 0
+                      ) -> SolarSystem:
+        """
+        Args:
+            n (int): number of massive bodies, including the sun
+            method (UpdateMethod): update method
+            compiled (bool): whether to use the compiled kernels
+            test_particles (int): number of test particles
+        Returns:
+            (SolarSystem): bodies on roughly circular orbits of the sun
+        """
+        rng = np.random.default_rng(281)
+
+        def orbit(name: str, mass: float) -> Particle:
+            radius = rng.uniform(5e10, 5e12)
+            phase = rng.uniform(0, 2 * np.pi)
+            speed = np.sqrt(self.G * self.sun_mass / radius)
+            return Particle(
+                position=np.array([radius * np.cos(phase),
+                                   radius * np.sin(phase),
+                                   rng.normal() * 1e9]),
+                velocity=np.array([-speed * np.sin(phase),
+                                   speed * np.cos(phase), 0.0]),
+                name=name, mass=mass)
+
+        particles = [Particle(position=np.zeros(3), velocity=np.zeros(3),
+                              name='sun', mass=self.sun_mass)]
+        particles += [orbit(f'body {k}', rng.uniform(1e20, 1e26))
+                      for k in range(n - 1)]
+        tests = [orbit(f'test {k}', 1.0) for k in range(test_particles)]
+
+        system = SolarSystem(particles, method, test_particles=tests)
+        system.set_compiled(compiled)
+        system.reset()
+        return system
+
+    @unittest.skipUnless(kernels_available(), 'Numba is not installed')
+    def test_matches_numpy(self):
+        """
+        Tests that the compiled kernels follow the NumPy steps
+        """
+        for method in [UpdateMethod.EULER, UpdateMethod.EULER_CROMER,
+                       UpdateMethod.VERLET]:
+            compiled = self.create_system(9, method, True, test_particles=3)
+            numpy = self.create_system(9, method, False, test_particles=3)
+            compiled.advance(3600.0, 1000)
+            for _ in range(1000):
+                numpy.advance(3600.0)
+
+            for name in ['sun', 'body 3', 'test 0']:
+                self.assertTrue(np.allclose(
+                    compiled.get_particle(name).position,
+                    numpy.get_particle(name).position, rtol=1e-10))
+            self.assertTrue(np.isclose(compiled.get_system_energy(),
+                                       numpy.get_system_energy(),
+                                       rtol=1e-10))
+
+    def test_fallback(self):
+        """
+        Tests that methods without a kernel still advance the system
+        """
+        system = self.create_system(9, UpdateMethod.YOSHIDA4, True)
+        reference = self.create_system(9, UpdateMethod.YOSHIDA4, False)
+        system.advance(3600.0, 10)
+        for _ in range(10):
+            reference.advance(3600.0)
+        self.assertTrue(np.array_equal(system.get_particle('body 0').position,
+                                       reference.get_particle(
+                                           'body 0').position))
+
+    def steps_per_second(self, n: int, compiled: bool, steps: int) -> float:
+        """
+        Args:
+            n (int): number of bodies
+            compiled (bool): whether to use the compiled kernels
+            steps (int): number of steps to time
+        Returns:
+            (float): Verlet steps per second
+        """
+        system = self.create_system(n, UpdateMethod.VERLET, compiled)
+
+        # the first call compiles the kernels
+        system.advance(1.0, 2)
+
+        start = time.perf_counter()
+        system.advance(3600.0, steps)
+        return steps / (time.perf_counter() - start)
+
+    def test_benchmark(self):
+        """
+        Benchmarks the steps per second of each backend
+        """
+        for n, steps in [(9, 20000), (16, 20000), (1000, 20)]:
+            numpy = self.steps_per_second(n, False, steps // 10)
+            row = [f"{numpy:.1f}"]
+            if kernels_available():
+                compiled = self.steps_per_second(n, True, steps)
+                row += [f"{compiled:.1f}", f"{compiled / numpy:.1f}"]
+                self.assertTrue(compiled > numpy)
+            else:
+                row += ['-', '-']
+            self.df[f'{n} bodies'] = row
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'NumPy steps/s',
+            'Compiled steps/s',
+            'Speed up',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/kernels.tex')
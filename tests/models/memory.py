@@ -0,0 +1,109 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, ParticleState, UpdateMethod
+from models.planet import Planet
+import numpy as np
+import unittest
+import pandas as pd
+import tracemalloc
+import time
+import gc
+import os
+
+
+class TestMemory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+
+    def create_bodies(self, n: int, shared: bool) -> tuple[int, float]:
+        """
+        Args:
+            n (int): number of bodies
+            shared (bool): whether the bodies are made in a shared state,
+            rather than made on their own and then attached to it
+        Returns:
+            (tuple[int, float]): the memory held by the bodies and their
+            state (bytes) and the time taken to make them (s)
+        """
+        rng = np.random.default_rng(1)
+        position = rng.normal(size=(n, 3))
+        velocity = rng.normal(size=(n, 3))
+        names = [str(k) for k in range(n)]
+
+        gc.collect()
+        tracemalloc.start()
+        start_memory, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        state = ParticleState(capacity=n)
+        bodies = []
+        for k in range(n):
+            if shared:
+                body = Particle(position[k], velocity[k], name=names[k],
+                                state=state)
+            else:
+                body = Particle(position[k], velocity[k], name=names[k])
+                body.attach(state)
+            bodies.append(body)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.assertEqual(len(state), n)
+        # the names are counted with the bodies, only the list is not
+        return memory - start_memory - sys.getsizeof(bodies), elapsed
+
+    def test_bytes_per_body(self):
+        """
+        Measures the memory of 100,000 bodies, each a particle object and a
+        row of a shared state
+        """
+        n = 100000
+        row = sum(buffer.nbytes for buffer in [
+            np.zeros((n, 3))] * 6 + [np.zeros(n), np.zeros((n, 3, 3))]) / n
+        for shared in [True, False]:
+            memory, elapsed = self.create_bodies(n, shared)
+            name = 'Made in the state' if shared else 'Attached'
+            self.df[name] = [f"{memory / n:.0f}", f"{row:.0f}",
+                             f"{memory / n - row:.0f}", f"{elapsed:.2f}"]
+            print(f"{name}: {memory / n:.0f} bytes per body")
+
+            # the rows of the state are most of it
+            self.assertTrue(memory / n < 2 * row)
+
+    def test_slots(self):
+        """
+        Tests that particles and planets have no __dict__ and still step
+        with their own methods
+        """
+        particle = Particle(velocity=np.array([1.0, 0.0, 0.0]),
+                            method=UpdateMethod.VERLET)
+        planet = Planet(position=np.zeros(3), velocity=np.zeros(3),
+                        acceleration=np.zeros(3), name='planet', mass=1.0,
+                        radius=1.0, axis=np.array([0.0, 0.0, 1.0]),
+                        tangential_velocity=1.0,
+                        null_island=np.array([1.0, 0.0, 0.0]))
+        for body in [particle, planet]:
+            self.assertFalse(hasattr(body, '__dict__'))
+            with self.assertRaises(AttributeError):
+                body.colour = 'red'
+
+        particle.verlet_update_position(1.0)
+        particle.update(1.0)
+        planet.update(np.pi / 2)
+        self.assertTrue(np.allclose(particle.position, [1.0, 0.0, 0.0]))
+        self.assertTrue(np.allclose(planet.null_island, [0.0, 1.0, 0.0]))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Memory per body (bytes)',
+            'State row (bytes)',
+            'Particle object (bytes)',
+            'Time for 100,000 bodies, traced (s)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/memory.tex')
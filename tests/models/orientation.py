@@ -0,0 +1,157 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.planet import Planet
+from models.solar_system import SolarSystem
+from models.orientation import Orientation, surface_point, \
+    latitude_longitude
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestOrientation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+
+    def create_planet(self, axis: np.ndarray) -> Planet:
+        """
+        Args:
+            axis (np.ndarray): spin axis
+        Returns:
+            (Planet): an Earth sized planet spinning once a day
+        """
+        radius = 6.371e6
+        return Planet(position=np.array([1.5e11, 0.0, 0.0]),
+                      velocity=np.array([0.0, 3e4, 0.0]),
+                      acceleration=np.zeros(3), name='earth', mass=5.97e24,
+                      radius=radius, axis=axis,
+                      tangential_velocity=2 * np.pi * radius / 86400.0,
+                      null_island=np.array([1.0, 0.0, 0.0]))
+
+    def test_planet_spin(self):
+        """
+        Tests that null island turns about a tilted axis and the poles
+        follow the planet
+        """
+        tilt = np.radians(23.44)
+        axis = np.array([0.0, -np.sin(tilt), np.cos(tilt)])
+        planet = self.create_planet(axis)
+        start = planet.null_island.copy()
+        self.assertTrue(np.isclose(start @ axis, 0.0))
+        self.assertTrue(np.isclose(np.linalg.norm(start), planet.radius))
+
+        # a quarter of a day turns null island a quarter turn east
+        for _ in range(6):
+            planet.update(3600.0)
+        expected = np.cross(axis, start)
+        self.assertTrue(np.allclose(planet.null_island, expected,
+                                    atol=1e-6 * planet.radius))
+        self.assertTrue(np.allclose(planet.north_pole - planet.position,
+                                    planet.radius * axis))
+
+        planet.reset()
+        self.assertTrue(np.allclose(planet.null_island, start))
+
+    def test_closed_form(self):
+        """
+        Tests that stepping every body together matches the orientation
+        found directly for any time
+        """
+        rng = np.random.default_rng(7)
+        orientation = Orientation()
+        for _ in range(100):
+            orientation.append(rng.normal(size=3), rng.uniform(-1e-4, 1e-4),
+                               rng.normal(size=3))
+
+        for _ in range(1000):
+            orientation.advance(60.0)
+        direct = orientation.at(np.array([60000.0]))[0]
+
+        points = surface_point(rng.uniform(-90, 90, (100, 4)),
+                               rng.uniform(-180, 180, (100, 4)))
+        self.assertTrue(np.allclose(orientation.to_world(points),
+                                    orientation.to_world(points,
+                                                         [60000.0])[0],
+                                    atol=1e-9))
+        # q and -q are the same rotation
+        self.assertTrue(np.allclose(np.abs(np.einsum(
+            'ij,ij->i', direct, orientation.quaternion)), 1.0))
+
+    def test_sub_solar_point(self):
+        """
+        Tests that the sub-solar point moves west once a day
+        """
+        planet = self.create_planet(np.array([0.0, 0.0, 1.0]))
+        sun = Particle(position=np.zeros(3), velocity=np.zeros(3),
+                       name='sun', mass=1.989e30)
+        system = SolarSystem([sun, planet], UpdateMethod.VERLET)
+        system.reset()
+
+        times = np.linspace(0, 86400.0, 25)
+        direction = np.broadcast_to(-planet.position, (25, 1, 3))
+        latitude, longitude = system.orientation.sub_points(direction, times)
+
+        # at midnight on null island, then 15 degrees west every hour
+        expected = 180.0 - times / 240.0
+        self.assertTrue(np.allclose(latitude, 0.0))
+        self.assertTrue(np.allclose(
+            np.angle(np.exp(1j * np.radians(longitude[:, 0] - expected))),
+            0.0, atol=1e-9))
+
+        # the system spins its planets as it advances, the planet moving a
+        # quarter of a degree around the sun meanwhile
+        system.advance(3600.0, 6)
+        _, longitude = latitude_longitude(system.orientation.to_body(
+            (sun.position - planet.position)[np.newaxis]))
+        self.assertTrue(np.isclose(longitude[0], 90.0, atol=0.5))
+
+    def test_benchmark(self):
+        """
+        Benchmarks spinning many planets with a matrix each against one
+        batched rotation
+        """
+        n, steps = 1000, 100
+        rng = np.random.default_rng(3)
+        axis = rng.normal(size=(n, 3))
+        axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+        rate = rng.uniform(1e-6, 1e-4, n)
+
+        # the old approach, a rotation matrix per planet per step
+        vectors = np.cross(axis, rng.normal(size=(n, 3)))
+        start = time.perf_counter()
+        for _ in range(steps):
+            for k in range(n):
+                angle = rate[k] * 60.0
+                x, y, z = axis[k]
+                c, s = np.cos(angle), np.sin(angle)
+                matrix = c * np.eye(3) + s * np.array(
+                    [[0, -z, y], [z, 0, -x], [-y, x, 0]]) + \
+                    (1 - c) * np.outer(axis[k], axis[k])
+                vectors[k] = matrix @ vectors[k]
+        loop = time.perf_counter() - start
+
+        orientation = Orientation(capacity=n)
+        for k in range(n):
+            orientation.append(axis[k], rate[k])
+        start = time.perf_counter()
+        for _ in range(steps):
+            orientation.advance(60.0)
+        batched = time.perf_counter() - start
+
+        self.df['Per planet matrices'] = [f"{loop * 1e3:.1f}"]
+        self.df['Batched quaternions'] = [f"{batched * 1e3:.1f}"]
+        self.assertTrue(batched < loop)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Time for 1000 planets, 100 steps (ms)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/orientation.tex')
@@ -0,0 +1,148 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+import numpy as np
+import unittest
+
+
+class TestParticleState(unittest.TestCase):
+    def create_particles(self) -> list[Particle]:
+        """
+        Returns:
+            (list[Particle]): a star with two planets
+
+        Creates a small system with its accelerations initialized.
+        """
+        particles = [
+            Particle(position=np.array([0.0, 0.0, 0.0]),
+                     velocity=np.array([0.0, 0.0, 0.0]),
+                     name='star', mass=2e30),
+            Particle(position=np.array([1.5e11, 0.0, 0.0]),
+                     velocity=np.array([0.0, 3e4, 0.0]),
+                     name='inner', mass=6e24),
+            Particle(position=np.array([0.0, 7.8e11, 1e9]),
+                     velocity=np.array([-1.3e4, 0.0, 0.0]),
+                     name='outer', mass=1.9e27),
+        ]
+        for particle in particles:
+            others = particles.copy()
+            others.remove(particle)
+            particle.set_bodies(others)
+        for particle in particles:
+            particle.init_acceleration()
+        return particles
+
+    def test_matches_particle_updates(self):
+        """
+        Tests the vectorized step against stepping each particle on its own
+        """
+        reference = self.create_particles()
+        system = SolarSystem(self.create_particles(), UpdateMethod.VERLET)
+
+        dt = 3600.0
+        for _ in range(100):
+            for particle in reference:
+                particle.verlet_update_position(dt)
+            for particle in reference:
+                particle.update_gravitational_acceleration()
+            for particle in reference:
+                particle.verlet_update_velocity(dt)
+            system.advance(dt)
+
+        for particle in reference:
+            actual = system.get_particle(particle.name)
+            self.assertTrue(np.allclose(actual.position, particle.position,
+                                        rtol=1e-12))
+            self.assertTrue(np.allclose(actual.velocity, particle.velocity,
+                                        rtol=1e-12))
+
+    def test_particles_are_views(self):
+        """
+        Tests that particles read and write the shared state
+        """
+        system = SolarSystem(self.create_particles(), UpdateMethod.EULER)
+        system.advance(60.0)
+
+        inner = system.get_particle('inner')
+        self.assertTrue(np.array_equal(inner.position,
+                                       system._state.position[inner.index]))
+
+        inner.velocity += 1.0
+        self.assertTrue(np.array_equal(inner.velocity,
+                                       system._state.velocity[inner.index]))
+
+    def test_remove_particle(self):
+        """
+        Tests that removing a particle keeps the other rows in place
+        """
+        system = SolarSystem(self.create_particles(), UpdateMethod.EULER)
+        outer_position = system.get_particle('outer').position.copy()
+
+        system.remove_particle('inner')
+
+        self.assertEqual(len(system._state), 2)
+        self.assertTrue(np.array_equal(system.get_particle('outer').position,
+                                       outer_position))
+
+    def test_test_particles(self):
+        """
+        Tests that test particles feel the massive particles without
+        changing their motion
+        """
+        debris = [
+            Particle(position=np.array([1.5e11 + 4e8 * i, 1e9, 0.0]),
+                     velocity=np.array([0.0, 2.9e4, 0.0]),
+                     name=f'debris_{i}', mass=1e3)
+            for i in range(5)
+        ]
+        system = SolarSystem(self.create_particles(), UpdateMethod.VERLET,
+                             test_particles=debris)
+        reference = SolarSystem(self.create_particles(), UpdateMethod.VERLET)
+
+        # the same debris as massless members of a full system
+        massless = SolarSystem(
+            self.create_particles() + [
+                Particle(position=particle.position.copy(),
+                         velocity=particle.velocity.copy(),
+                         name=particle.name, mass=0.0)
+                for particle in debris
+            ], UpdateMethod.VERLET)
+        massless.reset()
+        system.reset()
+        reference.reset()
+
+        for _ in range(100):
+            system.advance(3600.0)
+            reference.advance(3600.0)
+            massless.advance(3600.0)
+
+        for name in ['star', 'inner', 'outer']:
+            self.assertTrue(np.array_equal(
+                system.get_particle(name).position,
+                reference.get_particle(name).position))
+
+        for particle in debris:
+            expected = massless.get_particle(particle.name)
+            self.assertTrue(np.allclose(particle.position, expected.position,
+                                        rtol=1e-12))
+
+    def test_potential_energy(self):
+        """
+        Tests the cached pair energies against the particle calculations
+        """
+        system = SolarSystem(self.create_particles(), UpdateMethod.VERLET)
+        system.advance(3600.0)
+        state = system.get_state()
+
+        total = 0.0
+        for name in ['star', 'inner', 'outer']:
+            particle = system.get_particle(name)
+            self.assertTrue(np.isclose(state[name]['pe'],
+                                       particle.potential_energy(),
+                                       rtol=1e-12))
+            total += particle.potential_energy()
+
+        # the system energy counts each pair once
+        self.assertTrue(np.isclose(system.get_system_potential_energy(),
+                                   total / 2, rtol=1e-12))
@@ -0,0 +1,142 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.solar_system import SolarSystem
+from models.wisdom_holman import kepler_drift
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestWisdomHolman(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.G = 6.67408e-11
+        cls.sun_mass = 1.989e30
+        cls.mu = cls.G * cls.sun_mass
+        cls.day = 86400.0
+
+    def create_system(self, method: UpdateMethod) -> SolarSystem:
+        """
+        Args:
+            method (UpdateMethod): update method
+        Returns:
+            (SolarSystem): the Sun and eight planets on eccentric orbits
+        """
+        planets = [(3.30e23, 5.79e10, 0.21), (4.87e24, 1.08e11, 0.01),
+                   (5.97e24, 1.50e11, 0.02), (6.42e23, 2.28e11, 0.09),
+                   (1.90e27, 7.79e11, 0.05), (5.68e26, 1.43e12, 0.06),
+                   (8.68e25, 2.87e12, 0.05), (1.02e26, 4.50e12, 0.01)]
+        particles = [Particle(position=np.zeros(3), velocity=np.zeros(3),
+                              name='sun', mass=self.sun_mass)]
+        for k, (mass, semi_major, eccentricity) in enumerate(planets):
+            # start each planet at perihelion, spread around the Sun
+            perihelion = semi_major * (1 - eccentricity)
+            speed = np.sqrt(self.mu * (1 + eccentricity) / perihelion)
+            phase = 2.0 * k
+            direction = np.array([np.cos(phase), np.sin(phase), 0.0])
+            normal = np.array([-np.sin(phase), np.cos(phase), 0.0])
+            particles.append(Particle(position=perihelion * direction,
+                                      velocity=speed * normal,
+                                      name=f'planet {k}', mass=mass))
+
+        system = SolarSystem(particles, method)
+        system.reset()
+        return system
+
+    def test_kepler_period(self):
+        """
+        Tests that bound orbits return to their start after one period and
+        that hyperbolic orbits keep their energy
+        """
+        perihelion = 1.0e11
+        for eccentricity in [0.0, 0.5, 0.9]:
+            semi_major = perihelion / (1 - eccentricity)
+            period = 2 * np.pi * np.sqrt(semi_major**3 / self.mu)
+            speed = np.sqrt(self.mu * (1 + eccentricity) / perihelion)
+            position = np.array([[perihelion, 0.0, 0.0]])
+            velocity = np.array([[0.0, speed, 0.0]])
+
+            for _ in range(7):
+                kepler_drift(position, velocity, self.mu, period / 7)
+            error = np.linalg.norm(position[0] - [perihelion, 0, 0]) / \
+                perihelion
+            self.assertTrue(error < 1e-11)
+
+        speed = np.sqrt(self.mu * 2.5 / perihelion)
+        position = np.array([[perihelion, 0.0, 0.0]])
+        velocity = np.array([[0.0, speed, 0.0]])
+        energy = 0.5 * speed**2 - self.mu / perihelion
+        kepler_drift(position, velocity, self.mu, 1e8)
+        new_energy = 0.5 * np.sum(velocity**2) - \
+            self.mu / np.linalg.norm(position)
+        self.assertTrue(np.isclose(new_energy, energy, rtol=1e-12))
+
+    def energy_error(self, method: UpdateMethod, dt: float,
+                     years: float) -> tuple[float, float]:
+        """
+        Args:
+            method (UpdateMethod): update method
+            dt (float): time step
+            years (float): length of the run
+        Returns:
+            (float, float): max relative energy error and the CPU time taken
+        """
+        system = self.create_system(method)
+        initial = system.get_system_energy()
+        steps = int(years * 365.25 * self.day / dt)
+
+        max_error = 0.0
+        cpu_time = 0.0
+        for step in range(steps):
+            start = time.process_time()
+            system.advance(dt)
+            cpu_time += time.process_time() - start
+            if step % 20 == 0:
+                error = abs(system.get_system_energy() / initial - 1)
+                max_error = max(max_error, error)
+
+        self.df[f'{method.name} {dt / self.day:.0f} d'] = [
+            f"{dt / self.day:.0f}",
+            steps,
+            f"{max_error:.2e}",
+            f"{cpu_time:.2f}",
+        ]
+        return max_error, cpu_time
+
+    def test_day_steps(self):
+        """
+        Tests that Wisdom-Holman steps of days keep a smaller energy error
+        than the other methods at the same step
+        """
+        years = 20
+        wisdom_holman, _ = self.energy_error(UpdateMethod.WISDOM_HOLMAN,
+                                             4 * self.day, years)
+        verlet, _ = self.energy_error(UpdateMethod.VERLET, 4 * self.day,
+                                      years)
+        yoshida, _ = self.energy_error(UpdateMethod.YOSHIDA4, 4 * self.day,
+                                       years)
+        coarse, _ = self.energy_error(UpdateMethod.WISDOM_HOLMAN,
+                                      16 * self.day, years)
+
+        print(f"Energy error: Wisdom-Holman {wisdom_holman}, "
+              f"Verlet {verlet}, Yoshida-4 {yoshida}")
+        self.assertTrue(wisdom_holman < verlet / 10)
+        self.assertTrue(wisdom_holman < yoshida)
+        self.assertTrue(coarse < 1e-6)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Step (days)',
+            'Steps',
+            'Max energy error',
+            'CPU time (s)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/wisdom_holman.tex')
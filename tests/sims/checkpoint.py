@@ -0,0 +1,193 @@
+import sys
+sys.path.append('src')
+from models.particle import Particle, UpdateMethod
+from models.planet import Planet
+from models.solar_system import SolarSystem
+from sims.earth_orbit import EarthOrbit
+from sims.projectile import ProjectileSim
+from utils.config import EarthOrbitConfig, ProjectileConfig
+from utils.checkpoint import latest_checkpoint, load_checkpoint, \
+    checkpoint_folder, config_hash
+from unittest import mock
+import numpy as np
+import unittest
+import pandas as pd
+import tempfile
+import shutil
+import os
+
+
+class TestCheckpoint(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        os.makedirs('data/sims/projectile', exist_ok=True)
+        # the checkpoints are written to a folder removed after the tests
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.patch = mock.patch('utils.checkpoint.CHECKPOINT_DIR',
+                               cls.directory.name)
+        cls.patch.start()
+
+    def interrupt(self, sim, kind: str, title: str) -> tuple[str, list]:
+        """
+        Args:
+            sim: a simulation with a save_checkpoint method
+            kind (str): the kind of simulation
+            title (str): the title of the run
+        Returns:
+            (tuple[str, list]): the checkpoint to resume from, and its step
+            and size for the table
+
+        Runs the simulation until its first checkpoint, then stops it as
+        if the process had been killed.
+        """
+        shutil.rmtree(checkpoint_folder(kind, title), ignore_errors=True)
+        save = sim.save_checkpoint
+
+        def save_and_stop(taken: int) -> None:
+            save(taken)
+            raise KeyboardInterrupt
+
+        sim.save_checkpoint = save_and_stop
+        with self.assertRaises(KeyboardInterrupt):
+            sim.run()
+        checkpoint = latest_checkpoint(kind, title)
+        header, _ = load_checkpoint(checkpoint)
+        return checkpoint, [header['step'],
+                            f"{os.path.getsize(checkpoint) / 1024:.1f}"]
+
+    def compare_runs(self, name: str, expected: dict, resumed: dict,
+                     row: list) -> None:
+        """
+        Args:
+            name (str): the column of the table
+            expected (dict): the data of an uninterrupted run
+            resumed (dict): the data of the interrupted and resumed run
+            row (list): the step and size of the checkpoint
+        Returns:
+            None
+        """
+        self.assertEqual(list(expected.keys()), list(resumed.keys()))
+        self.assertEqual(expected, resumed)
+        self.df[name] = row + [len(expected)]
+
+    def test_earth_orbit(self):
+        """
+        Tests that an interrupted Verlet orbit continues exactly as one
+        that was never stopped
+        """
+        raw = {'radius': 1e7, 'deltaT': 10.0, 'method': 'verlet',
+               'log_interval': 10, 'checkpoint_interval': 300}
+        config = EarthOrbitConfig(raw)
+        _, expected = EarthOrbit(EarthOrbitConfig(
+            {**raw, 'checkpoint_interval': 0}), 'checkpoint_reference').run()
+
+        checkpoint, row = self.interrupt(EarthOrbit(config, 'checkpoint_test'),
+                                         'earth_orbit', 'checkpoint_test')
+        _, resumed = EarthOrbit(config, checkpoint=checkpoint).run()
+        self.compare_runs('Earth orbit', expected, resumed, row)
+
+    def test_projectile(self):
+        """
+        Tests that an interrupted projectile still lands at the same time
+        """
+        raw = {'deltaT': 0.01, 'method': 'verlet', 'steps': 2000,
+               'log_interval': 10, 'checkpoint_interval': 250,
+               'gravity': -9.81}
+        config = ProjectileConfig(raw)
+        _, expected = ProjectileSim(ProjectileConfig(
+            {**raw, 'checkpoint_interval': 0}), 'checkpoint_reference').run()
+
+        checkpoint, row = self.interrupt(
+            ProjectileSim(config, 'checkpoint_test'), 'projectile',
+            'checkpoint_test')
+        sim = ProjectileSim(config, checkpoint=checkpoint)
+        _, resumed = sim.run()
+        self.assertEqual(sim.event_records[-1].name, 'ground')
+        self.compare_runs('Projectile', expected, resumed, row)
+
+    def test_solar_system(self):
+        """
+        Tests that a restored system with planets, test particles and
+        compensated summation takes exactly the same steps
+        """
+        def create_system() -> SolarSystem:
+            sun = Particle(position=np.zeros(3), velocity=np.zeros(3),
+                           name='sun', mass=1.989e30)
+            earth = Planet(position=np.array([1.496e11, 0.0, 0.0]),
+                           velocity=np.array([0.0, 2.978e4, 0.0]),
+                           acceleration=np.zeros(3), name='earth',
+                           mass=5.972e24, radius=6.371e6,
+                           axis=np.array([0.0, 0.0, 1.0]),
+                           tangential_velocity=465.1,
+                           null_island=np.array([1.0, 0.0, 0.0]))
+            probe = Particle(position=np.array([0.0, 2e11, 0.0]),
+                             velocity=np.array([-2.5e4, 0.0, 0.0]),
+                             name='probe', mass=1.0)
+            system = SolarSystem([sun, earth], UpdateMethod.VERLET,
+                                 test_particles=[probe])
+            system.set_compiled(False)
+            system.set_compensated(True)
+            system.reset()
+            return system
+
+        system = create_system()
+        system.advance(3600.0, 500)
+        checkpoint = system.checkpoint()
+        system.advance(3600.0, 500)
+
+        restored = create_system()
+        restored.restore(checkpoint)
+        restored.advance(3600.0, 500)
+        for name in ['sun', 'earth', 'probe']:
+            self.assertTrue(np.array_equal(
+                system.get_particle(name).position,
+                restored.get_particle(name).position))
+        self.assertTrue(np.array_equal(system.orientation.quaternion,
+                                       restored.orientation.quaternion))
+        self.assertEqual(system.time, restored.time)
+
+    def test_config_hash(self):
+        """
+        Tests that only the steps and checkpoints may change on resuming
+        """
+        config = ProjectileConfig({'steps': 100}).to_dict()
+        longer = ProjectileConfig({'steps': 1000,
+                                   'checkpoint_interval': 10}).to_dict()
+        heavier = ProjectileConfig({'steps': 100, 'mass': 2.0}).to_dict()
+        self.assertEqual(config_hash(config), config_hash(longer))
+        self.assertNotEqual(config_hash(config), config_hash(heavier))
+
+        sim = ProjectileSim(ProjectileConfig(
+            {'deltaT': 0.1, 'checkpoint_interval': 5}), 'checkpoint_hash')
+        sim.run()
+        with self.assertRaises(ValueError):
+            ProjectileSim(ProjectileConfig({'deltaT': 0.2}),
+                          checkpoint=latest_checkpoint('projectile',
+                                                       'checkpoint_hash'))
+
+    def test_adaptive(self):
+        """
+        Tests that adaptive runs, which are not checkpointed, refuse a
+        checkpoint interval and cannot be resumed
+        """
+        raw = {'radius': 1e7, 'deltaT': 10.0, 'adaptive': True}
+        with self.assertRaises(ValueError):
+            EarthOrbitConfig({**raw, 'checkpoint_interval': 300})
+        with self.assertRaises(ValueError):
+            EarthOrbit(EarthOrbitConfig(raw), 'checkpoint_adaptive',
+                       checkpoint='checkpoint_adaptive.npz')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patch.stop()
+        cls.directory.cleanup()
+        cls.df.index = [
+            'Interrupted after (steps)',
+            'Checkpoint size (KiB)',
+            'Logged states',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/checkpoint.tex')
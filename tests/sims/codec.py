@@ -0,0 +1,187 @@
+import sys
+sys.path.append('src')
+from utils.codec import Codec, Compression, Precision, Prediction, max_error
+from utils.trajectory import Trajectory, TrajectoryWriter, encode
+import numpy as np
+import unittest
+import pandas as pd
+import tempfile
+import os
+
+
+class TestCodec(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.folder = cls.directory.name
+
+    def create_trajectory(self, n: int) -> Trajectory:
+        """
+        Args:
+            n (int): number of states
+        Returns:
+            (Trajectory): two bodies on ellipses logged once an hour, the
+            second merged away half way through
+        """
+        t = 3600.0 * np.arange(n)
+        arrays = {key: np.zeros((n, 2, 3)) for key in
+                  ['position', 'velocity', 'acceleration']}
+        for column, (a, period) in enumerate([(1.5e11, 3.15e7),
+                                              (2.3e11, 5.9e7)]):
+            angle = 2 * np.pi * t / period
+            w = 2 * np.pi / period
+            arrays['position'][:, column, 0] = a * np.cos(angle)
+            arrays['position'][:, column, 1] = 0.9 * a * np.sin(angle)
+            arrays['velocity'][:, column, 0] = -a * w * np.sin(angle)
+            arrays['velocity'][:, column, 1] = 0.9 * a * w * np.cos(angle)
+            arrays['acceleration'][:, column] = \
+                -w ** 2 * arrays['position'][:, column]
+        arrays['mass'] = np.array([[5.97e24, 6.42e23]] * n)
+        arrays['ke'] = 0.5 * arrays['mass'] * \
+            np.sum(arrays['velocity'] ** 2, axis=2)
+        arrays['pe'] = -1e33 / np.linalg.norm(arrays['position'], axis=2)
+        for key in arrays:
+            arrays[key][n // 2:, 1] = np.nan
+        arrays['energy'] = np.nansum(arrays['ke'] + arrays['pe'], axis=1)
+        arrays['momentum'] = np.nansum(
+            arrays['mass'][:, :, np.newaxis] * arrays['velocity'], axis=1)
+        return Trajectory(['earth', 'mars'], t, arrays)
+
+    def test_lossless(self):
+        """
+        Tests that every prediction and compression gives back each bit of
+        the float64 values, and the missing body
+        """
+        values = self.create_trajectory(500).position
+        for prediction in Prediction:
+            for compression in Compression:
+                codec = Codec(Precision.FLOAT64, prediction, compression)
+                encoded, header = codec.encode(values)
+                decoded = codec.decode(encoded, header)
+                self.assertTrue(np.array_equal(decoded.view(np.int64),
+                                               values.view(np.int64)))
+        self.assertTrue(np.array_equal(
+            codec.decode(*codec.encode(np.empty((0, 2, 3)))),
+            np.empty((0, 2, 3))))
+
+    def test_error_bound(self):
+        """
+        Tests that float32 and quantized values are within their bound, and
+        that a lossy trajectory keeps its times and masses exact
+        """
+        trajectory = self.create_trajectory(500)
+        rng = np.random.default_rng(4)
+        arrays = dict(trajectory.arrays)
+        arrays['random'] = rng.uniform(-4.5e12, 4.5e12, (2000, 3))
+        for tolerance in [1e-6, 1e-9, 1e-12, 1e-14]:
+            codec = Codec(Precision.QUANTIZED, tolerance=tolerance)
+            for key, value in arrays.items():
+                decoded = codec.decode(*codec.encode(value))
+                bound = tolerance * np.nanmax(np.abs(value))
+                self.assertTrue(max_error(value, decoded) <= bound, key)
+
+        codec = Codec(Precision.FLOAT32)
+        value = trajectory.velocity
+        decoded = codec.decode(*codec.encode(value))
+        self.assertTrue(max_error(value, decoded) <=
+                        2 ** -24 * np.nanmax(np.abs(value)))
+
+        path = trajectory.save(f'{self.folder}/lossy', codec)
+        saved = Trajectory.load(path)
+        self.assertTrue(np.array_equal(saved.time, trajectory.time))
+        self.assertTrue(np.array_equal(saved.mass, trajectory.mass,
+                                       equal_nan=True))
+        self.assertFalse(saved.position.flags.writeable)
+        with self.assertRaises(ValueError):
+            TrajectoryWriter(path, rows=10)
+        for tolerance in [0.0, 1e-16]:
+            with self.assertRaises(ValueError):
+                Codec(tolerance=tolerance)
+
+    def test_ratio(self):
+        """
+        Re-encodes a year of hourly states with each codec and compares the
+        size and worst error of the positions and velocities
+        """
+        trajectory = self.create_trajectory(8766)
+        cases = {
+            'float64 zlib': Codec(Precision.FLOAT64, Prediction.NONE),
+            'float64 linear zlib': Codec(),
+            'float64 linear lzma': Codec(compression=Compression.LZMA),
+            'float32 linear zlib': Codec(Precision.FLOAT32),
+            'quantized 1e-9 delta zlib': Codec(Precision.QUANTIZED,
+                                               Prediction.DELTA),
+            'quantized 1e-9 linear zlib': Codec(Precision.QUANTIZED),
+            'quantized 1e-9 linear lzma': Codec(Precision.QUANTIZED,
+                                                compression=Compression.LZMA),
+        }
+        ratios = {}
+        path = trajectory.save(f'{self.folder}/year')
+        for name, codec in cases.items():
+            report = encode(path, codec, f'{self.folder}/year_encoded')
+            self.assertEqual(report['time'][1], 0.0)
+            self.assertEqual(report['mass'][1], 0.0)
+            ratios[name] = report['position'][0]
+            self.df[name] = [f"{report['position'][0]:.2f}",
+                             f"{report['position'][1]:.2e}",
+                             f"{report['velocity'][0]:.2f}",
+                             f"{report['velocity'][1]:.2e}"]
+
+        # linear prediction helps, and dropping precision helps more
+        self.assertTrue(ratios['float64 linear zlib'] >
+                        ratios['float64 zlib'])
+        self.assertTrue(ratios['quantized 1e-9 linear zlib'] >
+                        ratios['quantized 1e-9 delta zlib'] >
+                        ratios['float64 linear zlib'])
+        self.assertTrue(ratios['float32 linear zlib'] >
+                        ratios['float64 linear zlib'])
+
+        # the original is kept, and decoding keeps the error of the last
+        # encoding
+        self.assertTrue(np.array_equal(Trajectory.load(path).position,
+                                       trajectory.position, equal_nan=True))
+        encoded = f'{self.folder}/year_encoded'
+        error = encode(encoded, None)['position'][1]
+        self.assertEqual(error, report['position'][1])
+        self.assertIsInstance(Trajectory.load(encoded).position, np.memmap)
+
+    def test_in_place(self):
+        """
+        Tests that a lossy encoding replaces a trajectory only when asked
+        to, and that the errors of encoding it again are added up
+        """
+        trajectory = self.create_trajectory(500)
+        path = trajectory.save(f'{self.folder}/in_place')
+        with self.assertRaises(ValueError):
+            encode(path, Codec(Precision.FLOAT32))
+        with self.assertRaises(ValueError):
+            encode(path, Codec(Precision.FLOAT32), path)
+        self.assertIsInstance(Trajectory.load(path).position, np.memmap)
+        encode(path, Codec())
+
+        first = encode(path, Codec(Precision.QUANTIZED, tolerance=1e-6),
+                       replace=True)
+        second = encode(path, Codec(Precision.FLOAT32), replace=True)
+        error = max_error(trajectory.position,
+                          Trajectory.load(path).position)
+        self.assertTrue(second['position'][1] > first['position'][1])
+        self.assertTrue(error <= second['position'][1])
+        self.assertEqual(second['time'][1], 0.0)
+        self.assertEqual(Trajectory.load(path).meta['errors']['position'],
+                         second['position'][1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        # a year of hourly states of two bodies
+        cls.df.index = [
+            'Position ratio',
+            'Position max error (m)',
+            'Velocity ratio',
+            'Velocity max error (m/s)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/codec.tex')
@@ -0,0 +1,135 @@
+import sys
+sys.path.append('src')
+from utils.plots.downsample import DownsampleMode, lttb, min_max
+from utils.plots.prep_data import SimData
+from utils.trajectory import Trajectory
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+import numpy as np
+import unittest
+import pandas as pd
+import tempfile
+import time
+import os
+
+
+class TestDownsample(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.folder = cls.directory.name
+
+    def create_energy(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            n (int): number of samples
+        Returns:
+            (tuple[np.ndarray, np.ndarray]): the times and a slowly
+            oscillating energy with a spike at one sample, as a close
+            encounter gives
+        """
+        t = np.linspace(0.0, 3.15e7, n)
+        energy = -1e33 * (1.0 + 1e-6 * np.sin(t / 1e6))
+        energy[n // 3] += 5e28
+        return t, energy
+
+    def create_data(self, n: int) -> SimData:
+        """
+        Args:
+            n (int): number of states
+        Returns:
+            (SimData): a run of a body on a circle and a system with the
+            energy of create_energy
+        """
+        t, energy = self.create_energy(n)
+        angle = 2 * np.pi * t / t[-1]
+        position = np.zeros((n, 1, 3))
+        position[:, 0, 0] = np.cos(angle)
+        position[:, 0, 1] = np.sin(angle)
+        arrays = {key: np.zeros((n, 1, 3))
+                  for key in ['velocity', 'acceleration']}
+        arrays.update({key: np.ones((n, 1)) for key in ['mass', 'ke', 'pe']})
+        arrays['position'] = position
+        arrays['energy'] = energy
+        arrays['momentum'] = np.zeros((n, 3))
+        trajectory = Trajectory(['body'], t, arrays)
+        trajectory.save(f'{self.folder}/downsample')
+        return SimData(f'{self.folder}/downsample.traj')
+
+    def test_indices(self):
+        """
+        Tests that both modes keep the first and last samples and the spike,
+        in order and at most the points asked for
+        """
+        t, energy = self.create_energy(100000)
+        for indices in [lttb(t, energy, 1000), min_max([energy], 1000)]:
+            self.assertTrue(len(indices) <= 1000)
+            self.assertTrue(np.all(np.diff(indices) > 0))
+            self.assertEqual(indices[0], 0)
+            self.assertEqual(indices[-1], len(t) - 1)
+            self.assertIn(len(t) // 3, indices)
+
+        self.assertEqual(len(lttb(t, energy, 1000)), 1000)
+        self.assertTrue(np.array_equal(lttb(t, energy, 10**6),
+                                       np.arange(len(t))))
+
+    def test_sim_data(self):
+        """
+        Tests that SimData keeps the shape of a path and the extremes of the
+        energy, and keeps each downsampled series
+        """
+        data = self.create_data(100000)
+        x, y, _ = data.position('body', points=500)
+        self.assertEqual(len(x), 500)
+        self.assertTrue(np.allclose(np.hypot(x, y), 1.0))
+        self.assertTrue(x.max() > 0.999 and x.min() < -0.999)
+        self.assertIs(data.position('body', points=500)[0], x)
+
+        # both keep the spike, min-max keeps every extreme exactly
+        _, full = data.system_energy()
+        for mode in [DownsampleMode.LTTB, DownsampleMode.MIN_MAX]:
+            t, energy = data.system_energy(points=500, mode=mode)
+            self.assertTrue(len(t) <= 500)
+            self.assertEqual(len(t), len(energy))
+            self.assertEqual(energy.max(), full.max())
+            self.assertTrue(energy.min() - full.min() <
+                            1e-3 * (full.max() - full.min()))
+        self.assertEqual(energy.min(), full.min())
+
+        t, energy = data.energy('body', points=500)
+        self.assertTrue(np.all(energy == 2.0))
+
+    def test_render(self):
+        """
+        Compares the time to draw and save a million samples of energy with
+        the time for the samples that would be plotted
+        """
+        t, energy = self.create_energy(10**6)
+        cases = {'Every sample': np.arange(len(t)),
+                 'LTTB': lttb(t, energy, 4000),
+                 'Min-max': min_max([energy], 4000)}
+        for name, indices in cases.items():
+            filename = f'data/tests/downsample_{name}.png'
+            start = time.perf_counter()
+            plt.plot(t[indices], energy[indices], linewidth=0.5)
+            plt.savefig(filename, dpi=300, bbox_inches='tight')
+            plt.clf()
+            elapsed = time.perf_counter() - start
+            self.df[name] = [len(indices), f"{elapsed * 1e3:.0f}",
+                             f"{os.path.getsize(filename) / 1024:.0f}"]
+            os.remove(filename)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        cls.df.index = [
+            'Points',
+            'Draw and save (ms)',
+            'PNG size (KiB)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/downsample.tex')
@@ -0,0 +1,196 @@
+import sys
+sys.path.append('src')
+from utils.json_stream import iter_states
+from utils.plots.prep_data import SimData
+from utils.trajectory import Trajectory, convert
+import numpy as np
+import unittest
+import pandas as pd
+import tracemalloc
+import tempfile
+import shutil
+import json
+import time
+import os
+
+
+class TestJsonStream(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.directory = tempfile.TemporaryDirectory()
+
+    def create_data(self, states: int, bodies: int) -> dict:
+        """
+        Args:
+            states (int): number of logged states
+            bodies (int): number of bodies
+        Returns:
+            (dict): random states in the format the simulations log them
+        """
+        rng = np.random.default_rng(3)
+        data = {}
+        for k in range(states):
+            state = {}
+            for body in range(bodies):
+                velocity = rng.normal(size=3)
+                state[str(body)] = {
+                    'position': rng.normal(size=3).tolist(),
+                    'velocity': velocity.tolist(),
+                    'acceleration': rng.normal(size=3).tolist(),
+                    'ke': float(rng.random()),
+                    'pe': float(rng.random()),
+                    'momentum': (2.0 * velocity).tolist(),
+                    'name': f'body {{"{body}"}}',
+                    'mass': 2.0,
+                }
+            state['system_info'] = {'energy': float(rng.random()),
+                                    'momentum': rng.normal(size=3).tolist()}
+            data[1e3 * k + 0.25] = state
+        return data
+
+    def write_run(self, data: dict, name: str, indent: int | None = 4) -> str:
+        """
+        Args:
+            data (dict): the states
+            name (str): the name of the run
+            indent (int | None): the indent of the json
+        Returns:
+            (str): a json file of the states
+        """
+        folder = self.directory.name
+        filename = f'{folder}/{name}.json'
+        for path in [f'{folder}/{name}.traj',
+                     f'{folder}/{name}.json.cache.traj']:
+            shutil.rmtree(path, ignore_errors=True)
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=indent)
+        return filename
+
+    def test_states(self):
+        """
+        Tests that the states read one at a time are those json.load reads,
+        in order, whatever the chunks they are split across
+        """
+        data = self.create_data(20, 3)
+        for indent in [4, None]:
+            filename = self.write_run(data, 'states', indent)
+            with open(filename, 'r') as f:
+                loaded = json.load(f)
+            for chunk_size in [1, 7, 1 << 20]:
+                states = list(iter_states(filename, chunk_size=chunk_size))
+                self.assertEqual(states, [(float(key), state) for key, state
+                                          in loaded.items()])
+
+        filename = self.write_run({}, 'empty')
+        self.assertEqual(list(iter_states(filename)), [])
+        with open(filename, 'w') as f:
+            f.write(json.dumps({'0.0': {'0': {'mass': 1.0}}})[:-3])
+        with self.assertRaises(ValueError):
+            list(iter_states(filename, chunk_size=4))
+
+    def test_select(self):
+        """
+        Tests that only the bodies and quantities asked for are kept, while
+        reading and in a converted run
+        """
+        data = self.create_data(50, 4)
+        filename = self.write_run(data, 'select')
+        for _, state in iter_states(filename, ['1', '3'], ['position']):
+            self.assertEqual(list(state), ['1', '3', 'system_info'])
+            self.assertEqual(set(state['1']), {'position', 'name', 'mass'})
+
+        sim_data = SimData(filename, objects=['1', '3'], fields=['position'])
+        self.assertEqual(sim_data.obj_list, ['1', '3'])
+        self.assertEqual(set(sim_data.trajectory.arrays),
+                         {'position', 'mass', 'energy', 'momentum'})
+        x, _, _ = sim_data.position('3')
+        self.assertTrue(np.array_equal(
+            x, [state['3']['position'][0] for state in data.values()]))
+        _, energy = sim_data.system_energy()
+        self.assertEqual(energy[0], data[0.25]['system_info']['energy'])
+
+        path = convert(filename, objects=['1', '3'], fields=['position'])
+        trajectory = Trajectory.load(path)
+        self.assertEqual(trajectory.names, ['1', '3'])
+        self.assertEqual(trajectory.labels, ['body {"1"}', 'body {"3"}'])
+        self.assertTrue(np.array_equal(trajectory.position,
+                                       sim_data.trajectory.position))
+        self.assertEqual(set(trajectory.state(0)['1']),
+                         {'position', 'name', 'mass'})
+
+    def test_convert(self):
+        """
+        Tests that a run is converted as json.load would, including one
+        with a body that joins later and one out of time order
+        """
+        data = self.create_data(300, 3)
+        times = list(data)
+        del data[times[0]]['2']
+        shuffled = {key: data[key] for key in times[150:] + times[:150]}
+        for name, run in [('in_order', dict(list(data.items())[1:])),
+                          ('joined', data), ('shuffled', shuffled)]:
+            filename = self.write_run(run, name)
+            trajectory = Trajectory.load(convert(filename))
+            expected = Trajectory.from_dict(run).sorted()
+            self.assertEqual(trajectory.names, expected.names)
+            self.assertTrue(np.array_equal(trajectory.time, expected.time))
+            for key, value in expected.arrays.items():
+                self.assertTrue(np.array_equal(getattr(trajectory, key),
+                                               value, equal_nan=True))
+            self.assertEqual(trajectory.meta['title'], name)
+
+    def test_memory(self):
+        """
+        Compares the peak memory and time of reading a run with json.load
+        and reading it one state at a time, and of the json cache
+        """
+        filename = self.write_run(self.create_data(2000, 16), 'memory')
+        size = os.path.getsize(filename)
+
+        def measure(load) -> tuple[int, float]:
+            tracemalloc.start()
+            begin = time.perf_counter()
+            load()
+            elapsed = time.perf_counter() - begin
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak, elapsed
+
+        def load_json() -> None:
+            with open(filename, 'r') as f:
+                Trajectory.from_dict(json.load(f))
+
+        cases = {
+            'json.load': load_json,
+            'Streamed into memory':
+                lambda: SimData(filename, cache=False).position('0'),
+            'Streamed into the cache':
+                lambda: SimData(filename).position('0'),
+        }
+        peaks = {}
+        for name, load in cases.items():
+            peaks[name], elapsed = measure(load)
+            self.df[name] = [f"{size / 2 ** 20:.1f}",
+                             f"{peaks[name] / 2 ** 20:.1f}",
+                             f"{elapsed * 1e3:.0f}"]
+
+        # the arrays of the run are a few MiB, its json several times that
+        self.assertTrue(peaks['Streamed into memory'] <
+                        peaks['json.load'] / 3)
+        self.assertTrue(peaks['Streamed into the cache'] <
+                        peaks['json.load'] / 3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        # a run of 16 bodies and 2000 states
+        cls.df.index = [
+            'Json (MiB)',
+            'Peak memory (MiB)',
+            'Time (ms)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/json_stream.tex')
@@ -149,6 +149,18 @@ class TestProjectile(unittest.TestCase):
         """
         self.run_sim(UpdateMethod.VERLET)
 
+    def test_wisdom_holman(self):
+        """
+        Tests that the Wisdom-Holman method, which needs a central body, is
+        refused rather than failing on the first step
+        """
+        config = Config().projectile
+        config.method = UpdateMethod.WISDOM_HOLMAN
+        with self.assertRaises(ValueError):
+            ProjectileSim(config)
+        with self.assertRaises(ValueError):
+            self.sim.set_method(UpdateMethod.WISDOM_HOLMAN)
+
     def tearDown(self):
         # change row names to velcoity, position, etc.
         self.df.index = [
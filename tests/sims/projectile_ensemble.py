@@ -0,0 +1,115 @@
+import sys
+sys.path.append('src')
+from models.particle import UpdateMethod
+from sims.projectile import ProjectileSim, ProjectileEnsemble
+from utils.config import ProjectileConfig
+from utils.plots.prep_data import SimData
+import numpy as np
+import unittest
+import pandas as pd
+import time
+import os
+
+
+class TestProjectileEnsemble(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+
+    def create_config(self, method: UpdateMethod, steps: int = 100000,
+                      deltaT: float = 0.0001) -> ProjectileConfig:
+        """
+        Args:
+            method (UpdateMethod): update method
+            steps (int): number of steps
+            deltaT (float): time step
+        Returns:
+            (ProjectileConfig): config for a projectile launched upwards
+        """
+        return ProjectileConfig({
+            'deltaT': deltaT,
+            'method': method.name.lower(),
+            'steps': steps,
+            'log_interval': 100,
+            'gravity': -9.81,
+            'mass': 1.0,
+            'position': [0.0, 0.0, 0.0],
+            'velocity': [20.0, 50.0, 0.0],
+        })
+
+    def test_matches_single_runs(self):
+        """
+        Tests that each member follows the same steps as a ProjectileSim
+        """
+        velocities = np.array([[20.0, 50.0, 0.0], [5.0, 10.0, 1.0],
+                               [0.0, 30.0, 0.0]])
+        gravity = np.array([-9.81, -1.62, -3.71])
+        for method in [UpdateMethod.EULER, UpdateMethod.EULER_CROMER,
+                       UpdateMethod.VERLET, UpdateMethod.YOSHIDA4]:
+            config = self.create_config(method, steps=5000, deltaT=0.01)
+            ensemble = ProjectileEnsemble(config, velocity=velocities,
+                                          gravity=gravity)
+            _, ensemble_data = ensemble.run()
+
+            for member in range(len(velocities)):
+                config.velocity = velocities[member]
+                config.gravity = gravity[member]
+                sim = ProjectileSim(config)
+                sim.save = lambda: sim.output_file
+                _, data = sim.run()
+
+                self.assertEqual(list(data.keys()),
+                                 list(ensemble_data[member].keys()))
+                last = list(data.keys())[-1]
+                self.assertTrue(np.allclose(
+                    data[last]['projectile']['position'],
+                    ensemble_data[member][last]['projectile']['position'],
+                    rtol=1e-12))
+
+                # SimData reads each member like a single run
+                sim_data = SimData(f'member_{member}.json',
+                                   ensemble_data[member])
+                self.assertEqual(sim_data.obj_list, ['projectile'])
+
+    def test_sweep(self):
+        """
+        Tests that a sweep of a thousand launch angles takes about as long
+        as one run, and that the ranges match the analytical ones
+        """
+        members = 1000
+        config = self.create_config(UpdateMethod.VERLET)
+
+        single = ProjectileSim(config)
+        single.save = lambda: single.output_file
+        start = time.process_time()
+        single.run()
+        single_time = time.process_time() - start
+
+        angles = np.linspace(0.1, np.pi / 3, members)
+        velocity = 50.0 * np.column_stack([np.cos(angles), np.sin(angles),
+                                           np.zeros(members)])
+        ensemble = ProjectileEnsemble(config, velocity=velocity)
+        start = time.process_time()
+        ensemble.run()
+        ensemble_time = time.process_time() - start
+
+        # each landing is found within its step, and Verlet steps are
+        # exact under constant gravity
+        ranges = ensemble.landing_position[:, 0]
+        expected = 50.0**2 * np.sin(2 * angles) / 9.81
+        self.assertTrue(np.allclose(ranges, expected, rtol=1e-9))
+        self.assertTrue(ensemble_time < 10 * single_time)
+
+        self.df['Single run'] = [1, f"{single_time:.2f}"]
+        self.df['Ensemble'] = [members, f"{ensemble_time:.2f}"]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.df.index = [
+            'Members',
+            'CPU time (s)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/projectile_ensemble.tex')
@@ -0,0 +1,199 @@
+import sys
+sys.path.append('src')
+from utils.plots.prep_data import SimData
+from utils.trajectory import cache_path
+from datetime import datetime
+from unittest import mock
+import numpy as np
+import unittest
+import pandas as pd
+import tempfile
+import shutil
+import json
+import time
+import os
+
+
+class TestSimData(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.directory = tempfile.TemporaryDirectory()
+
+    def create_data(self, states: int, bodies: int) -> dict:
+        """
+        Args:
+            states (int): number of logged states
+            bodies (int): number of bodies
+        Returns:
+            (dict): random states in the format the simulations log them
+        """
+        rng = np.random.default_rng(2)
+        data = {}
+        for k in range(states):
+            state = {}
+            for body in range(bodies):
+                velocity = rng.normal(size=3)
+                state[str(body)] = {
+                    'position': rng.normal(size=3).tolist(),
+                    'velocity': velocity.tolist(),
+                    'acceleration': rng.normal(size=3).tolist(),
+                    'ke': float(rng.random()),
+                    'pe': float(rng.random()),
+                    'momentum': (2.0 * velocity).tolist(),
+                    'name': f'body {body}',
+                    'mass': 2.0,
+                }
+            state['system_info'] = {'energy': float(rng.random()),
+                                    'momentum': rng.normal(size=3).tolist()}
+            data[100.0 * k] = state
+        return data
+
+    def plot_series(self, data: SimData) -> None:
+        """
+        Args:
+            data (SimData): the run
+        Returns:
+            None
+
+        Asks for the series Plot2DSol plots, each body once for each plot
+        """
+        for obj in data.obj_list:
+            data.position(obj)
+            data.velocity(obj)
+            data.ke(obj)
+            data.pe(obj)
+            data.ke(obj)
+            data.pe(obj)
+        data.system_energy()
+        data.system_momentum()
+
+    def test_series(self):
+        """
+        Tests that the series are the ones in the logged states, in time
+        order, and that a body that leaves is only in the states it is in
+        """
+        data = self.create_data(50, 3)
+        keys = list(data.keys())
+        del data[keys[40]]['2']
+        shuffled = {key: data[key] for key in keys[25:] + keys[:25]}
+        sim_data = SimData('series.json', shuffled)
+
+        self.assertEqual(sim_data.obj_list, ['0', '1', '2'])
+        self.assertTrue(np.array_equal(sim_data.times(), keys))
+        x, y, z = sim_data.position('0')
+        self.assertTrue(np.array_equal(
+            np.column_stack([x, y, z]),
+            [data[key]['0']['position'] for key in keys]))
+        t, ke = sim_data.ke('2')
+        self.assertEqual(len(t), 49)
+        self.assertEqual(t[0], datetime.fromtimestamp(0.0))
+        self.assertTrue(np.array_equal(
+            ke, [data[key]['2']['ke'] for key in keys if key != keys[40]]))
+        px, _, _ = sim_data.momentum('1')
+        self.assertTrue(np.allclose(
+            px, [data[key]['1']['momentum'][0] for key in keys]))
+
+    def test_memoized(self):
+        """
+        Tests that each series is made once and shares the columns
+        """
+        sim_data = SimData('memoized.json', self.create_data(20, 2))
+        x, y, _ = sim_data.position('0')
+        self.assertIs(sim_data.position('0')[0], x)
+        self.assertTrue(np.shares_memory(x, sim_data.trajectory.position))
+        self.assertTrue(np.shares_memory(y, sim_data.trajectory.position))
+        self.assertIs(sim_data.ke('1'), sim_data.ke('1'))
+        with self.assertRaises(ValueError):
+            x[0] = 1.0
+
+    def test_plot_time(self):
+        """
+        Compares the time to make the series of a 16 body run with the time
+        to read them from the states for each plot
+        """
+        data = self.create_data(2000, 16)
+
+        start = time.perf_counter()
+        self.plot_series(SimData('plot.json', data))
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for obj in [str(body) for body in range(16)]:
+            for _ in range(5):
+                [datetime.fromtimestamp(float(ts)) for ts in data]
+                [np.array(state[obj]['position']) for state in data.values()]
+        rescan = time.perf_counter() - start
+
+        self.df['Series for every plot'] = [f"{elapsed * 1e3:.0f}",
+                                            f"{rescan * 1e3:.0f}"]
+        self.assertTrue(elapsed < rescan)
+
+    def write_run(self, data: dict) -> str:
+        """
+        Args:
+            data (dict): the states
+        Returns:
+            (str): a json file of the states with no cache beside it
+        """
+        filename = f'{self.directory.name}/run.json'
+        shutil.rmtree(cache_path(filename), ignore_errors=True)
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=4)
+        return filename
+
+    def test_cache(self):
+        """
+        Tests that a json run is parsed once and then read from its cache
+        until it changes, and compares the time of the loads
+        """
+        data = self.create_data(2000, 16)
+        filename = self.write_run(data)
+
+        start = time.perf_counter()
+        first = SimData(filename)
+        first.position('3')
+        parse = time.perf_counter() - start
+        self.assertTrue(os.path.isdir(cache_path(filename)))
+
+        # the cache is read without parsing the json
+        with mock.patch('utils.trajectory.iter_states',
+                        side_effect=AssertionError):
+            start = time.perf_counter()
+            cached = SimData(filename)
+            x, _, _ = cached.position('3')
+            load = time.perf_counter() - start
+        self.assertIsInstance(cached.trajectory.position, np.memmap)
+        self.assertTrue(np.array_equal(x, first.position('3')[0]))
+
+        # touching the json does not change its contents
+        os.utime(filename, ns=(0, 0))
+        with mock.patch('utils.trajectory.iter_states',
+                        side_effect=AssertionError):
+            SimData(filename)
+
+        # an edited json is read again
+        data[0.0]['3']['position'] = [1.0, 2.0, 3.0]
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.utime(filename, ns=(0, 0))
+        edited = SimData(filename)
+        self.assertEqual(edited.position('3')[0][0], 1.0)
+        self.assertEqual(SimData(filename).position('3')[0][0], 1.0)
+
+        self.df['Loading the json again'] = [f"{load * 1e3:.0f}",
+                                             f"{parse * 1e3:.0f}"]
+        self.assertTrue(load < parse)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        # a run of 16 bodies and 2000 states
+        cls.df.index = [
+            'Columnar (ms)',
+            'Reading the states each time (ms)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/sim_data.tex')
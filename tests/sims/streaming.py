@@ -0,0 +1,153 @@
+import sys
+sys.path.append('src')
+from sims.earth_orbit import EarthOrbit
+from utils.config import EarthOrbitConfig
+from utils.trajectory import Trajectory, TrajectoryWriter
+import numpy as np
+import unittest
+import pandas as pd
+import tracemalloc
+import tempfile
+import time
+import os
+
+
+class TestStreaming(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.folder = cls.directory.name
+
+    def create_config(self, deltaT: float) -> EarthOrbitConfig:
+        """
+        Args:
+            deltaT (float): time step, which sets the number of steps of
+            one orbit
+        Returns:
+            (EarthOrbitConfig): an orbit logging every step
+        """
+        return EarthOrbitConfig({'radius': 1e7, 'deltaT': deltaT,
+                                 'method': 'verlet', 'log_interval': 1})
+
+    def measure_run(self, deltaT: float) -> tuple[int, int, float]:
+        """
+        Args:
+            deltaT (float): time step
+        Returns:
+            (tuple[int, int, float]): the states logged, the peak memory of
+            the run (bytes) and the time to save once the steps are done (s)
+        """
+        sim = EarthOrbit(self.create_config(deltaT), 'streaming_test')
+        run = sim._run
+        closed = []
+
+        def run_and_time(start: float) -> None:
+            run(start)
+            closed.append(time.perf_counter())
+
+        sim._run = run_and_time
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        _, data = sim.run()
+        saved = time.perf_counter() - closed[0]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(data), peak - start, saved
+
+    def test_memory(self):
+        """
+        Tests that the memory of a run does not grow with the number of
+        states logged, and compares it to holding every state
+        """
+        rows = []
+        for deltaT in [10.0, 1.0]:
+            logged, peak, saved = self.measure_run(deltaT)
+            states = Trajectory.load(
+                'data/sims/earth_orbit/streaming_test').to_dict()
+
+            # what the run held before its states were streamed
+            tracemalloc.start()
+            start, _ = tracemalloc.get_traced_memory()
+            copy = {key: {name: dict(body) for name, body in state.items()}
+                    for key, state in states.items()}
+            held, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del copy
+
+            start_time = time.perf_counter()
+            Trajectory.from_dict(states).save(
+                f'{self.folder}/streaming_copy')
+            save_all = time.perf_counter() - start_time
+
+            rows.append(peak)
+            self.df[f'{logged} states'] = [
+                f"{peak / 1024:.0f}", f"{(held - start) / 1024:.0f}",
+                f"{saved * 1e3:.1f}", f"{save_all * 1e3:.1f}"]
+            print(f'{logged} states: {peak / 1024:.0f} KiB streamed, '
+                  f'{(held - start) / 1024:.0f} KiB held')
+
+        # ten times the states, about the same memory
+        self.assertTrue(rows[1] < 2 * rows[0])
+
+    def test_interrupt(self):
+        """
+        Tests that the states logged before a run is interrupted are on
+        disk and the same as those of a run that was not
+        """
+        _, expected = EarthOrbit(self.create_config(10.0),
+                                 'streaming_reference').run()
+
+        sim = EarthOrbit(self.create_config(10.0), 'streaming_interrupt')
+        get_state = sim.get_state
+        logged = []
+
+        def get_state_and_stop() -> dict:
+            if len(logged) == 300:
+                raise KeyboardInterrupt
+            logged.append(None)
+            return get_state()
+
+        sim.get_state = get_state_and_stop
+        with self.assertRaises(KeyboardInterrupt):
+            sim.run()
+
+        trajectory = Trajectory.load('data/sims/earth_orbit/'
+                                     'streaming_interrupt')
+        self.assertEqual(len(trajectory), 300)
+        states = trajectory.to_dict()
+        self.assertEqual(states, {key: expected[key] for key in
+                                  list(expected.keys())[:300]})
+
+    def test_new_body(self):
+        """
+        Tests that an error in the writer's thread is raised in the caller
+        """
+        state = {'a': {'position': [0.0] * 3, 'velocity': [0.0] * 3,
+                       'acceleration': [0.0] * 3, 'ke': 0.0, 'pe': 0.0,
+                       'momentum': [0.0] * 3, 'name': 'a', 'mass': 1.0}}
+        writer = TrajectoryWriter(f'{self.folder}/streaming_error',
+                                  chunk=4)
+        writer[0.0] = state
+        writer[1.0] = {'b': state['a']}
+        with self.assertRaises(ValueError):
+            writer.close()
+
+        # the states before the error are kept
+        trajectory = Trajectory.load(f'{self.folder}/streaming_error')
+        self.assertEqual(len(trajectory), 1)
+        self.assertTrue(np.array_equal(trajectory.position[0, 0], np.zeros(3)))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        cls.df.index = [
+            'Peak memory, streamed (KiB)',
+            'Memory of every state (KiB)',
+            'Save after the steps, streamed (ms)',
+            'Save of every state at once (ms)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/streaming.tex')
@@ -0,0 +1,120 @@
+import sys
+sys.path.append('src')
+from sims.earth_orbit import EarthOrbit
+from utils.config import EarthOrbitConfig
+from utils.plots.prep_data import SimData
+from utils.trajectory import Trajectory, convert_all, is_trajectory
+import numpy as np
+import unittest
+import pandas as pd
+import tempfile
+import json
+import time
+import os
+
+
+class TestTrajectory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        raw = {'radius': 1e7, 'deltaT': 10.0, 'method': 'verlet',
+               'log_interval': 1}
+        _, data = EarthOrbit(EarthOrbitConfig(raw), 'trajectory_test').run()
+        cls.data = dict(data)
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.folder = cls.directory.name
+
+    def merged_data(self) -> dict:
+        """
+        Returns:
+            (dict): the orbit's data with the satellite removed halfway, as
+            a merge removes a body
+        """
+        data = {}
+        for k, (key, state) in enumerate(self.data.items()):
+            if k > len(self.data) // 2:
+                state = {name: body for name, body in state.items()
+                         if name != 'satellite'}
+            data[key] = state
+        return data
+
+    def test_round_trip(self):
+        """
+        Tests that the states are the same after being saved as arrays,
+        including a body that is missing from the later states
+        """
+        for data in [self.data, self.merged_data()]:
+            trajectory = Trajectory.from_dict(data)
+            self.assertEqual(trajectory.to_dict(), data)
+
+            trajectory.save(f'{self.folder}/round_trip')
+            loaded = Trajectory.load(f'{self.folder}/round_trip.json')
+            self.assertIsInstance(loaded.position, np.memmap)
+            self.assertEqual(loaded.position.shape, (len(data), 2, 3))
+            self.assertEqual(loaded.to_dict(), data)
+
+        index = loaded.index('satellite')
+        self.assertTrue(np.isnan(loaded.mass[-1, index]))
+
+    def test_sim_data(self):
+        """
+        Tests that a trajectory and the json it was converted from plot the
+        same and compares their size and the time to read them
+        """
+        filename = f'{self.folder}/orbit.json'
+        start = time.perf_counter()
+        with open(filename, 'w') as f:
+            json.dump(self.data, f, indent=4)
+        json_write = time.perf_counter() - start
+        json_size = os.path.getsize(filename)
+
+        start = time.perf_counter()
+        from_json = SimData(filename, cache=False)
+        json_read = time.perf_counter() - start
+        self.assertFalse(is_trajectory(filename))
+
+        start = time.perf_counter()
+        self.assertEqual(len(convert_all(self.folder)), 1)
+        convert_time = time.perf_counter() - start
+        self.assertTrue(is_trajectory(filename))
+        path = f'{self.folder}/orbit.traj'
+        traj_size = sum(os.path.getsize(f'{path}/{name}')
+                        for name in os.listdir(path))
+
+        start = time.perf_counter()
+        from_traj = SimData(filename)
+        traj_read = time.perf_counter() - start
+
+        self.assertEqual(from_json.obj_list, from_traj.obj_list)
+        for obj in from_json.obj_list:
+            for series in ['position', 'velocity', 'momentum', 'ke', 'pe']:
+                for expected, value in zip(getattr(from_json, series)(obj),
+                                           getattr(from_traj, series)(obj)):
+                    self.assertTrue(np.array_equal(expected, value))
+        for series in ['system_energy', 'system_momentum']:
+            for expected, value in zip(getattr(from_json, series)(),
+                                       getattr(from_traj, series)()):
+                self.assertTrue(np.array_equal(expected, value))
+
+        self.df['JSON'] = [f"{json_size / 1024:.0f}",
+                           f"{json_write * 1e3:.1f}",
+                           f"{json_read * 1e3:.1f}"]
+        self.df['Trajectory'] = [f"{traj_size / 1024:.0f}",
+                                 f"{convert_time * 1e3:.1f}",
+                                 f"{traj_read * 1e3:.1f}"]
+
+        # float64 arrays hold the numbers without their digits as text
+        self.assertTrue(traj_size < json_size / 2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        cls.df.index = [
+            'Size (KiB)',
+            'Write time (ms)',
+            'Load time (ms)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/trajectory.tex')
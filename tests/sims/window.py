@@ -0,0 +1,146 @@
+import sys
+sys.path.append('src')
+from utils.codec import Codec, KEYFRAME
+from utils.plots.prep_data import SimData
+from utils.trajectory import Trajectory
+from unittest import mock
+import numpy as np
+import unittest
+import pandas as pd
+import tempfile
+import time
+import os
+
+
+class TestWindow(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.DataFrame()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.folder = cls.directory.name
+
+    def create_trajectory(self, n: int, bodies: int) -> Trajectory:
+        """
+        Args:
+            n (int): number of states, logged once an hour
+            bodies (int): number of bodies
+        Returns:
+            (Trajectory): bodies on circles, the last merged away half way
+            through
+        """
+        t = 1.7e9 + 3600.0 * np.arange(n)
+        angle = 2 * np.pi * t[:, np.newaxis] / 3.15e7 / \
+            np.arange(1, bodies + 1)
+        position = np.stack([1.5e11 * np.cos(angle), 1.5e11 * np.sin(angle),
+                             np.zeros_like(angle)], axis=2)
+        arrays = {'position': position, 'velocity': position * 1e-7,
+                  'acceleration': position * -1e-14}
+        arrays.update({key: np.ones((n, bodies)) for key in
+                       ['mass', 'ke', 'pe']})
+        for key in arrays:
+            arrays[key][n // 2:, -1] = np.nan
+        arrays['energy'] = np.zeros(n)
+        arrays['momentum'] = np.zeros((n, 3))
+        return Trajectory([str(k) for k in range(bodies)], t, arrays)
+
+    def test_window(self):
+        """
+        Tests that a window holds the states from its first to its last
+        time, and that at gives the last state logged by a time
+        """
+        trajectory = self.create_trajectory(1000, 3)
+        t = trajectory.time
+        for start, end in [(t[10], t[20]), (t[10] + 1, t[20] - 1),
+                           (None, t[5]), (t[-3], None), (t[-1] + 1, None),
+                           (t[20], t[10])]:
+            window = trajectory.window(start, end)
+            mask = (t >= (-np.inf if start is None else start)) & \
+                (t <= (np.inf if end is None else end))
+            self.assertTrue(np.array_equal(window.time, t[mask]))
+            self.assertTrue(np.array_equal(window.position,
+                                           trajectory.position[mask],
+                                           equal_nan=True))
+
+        data = SimData('window.json', trajectory.to_dict())
+        self.assertEqual(data.at(t[7] + 10.0), trajectory.state(7))
+        self.assertEqual(data.at(t[7]), trajectory.state(7))
+        self.assertNotIn('2', data.at(t[-1]))
+        with self.assertRaises(ValueError):
+            data.at(t[0] - 1.0)
+
+        windowed = data.window(t[100], t[199])
+        self.assertTrue(np.array_equal(windowed.times(), t[100:200]))
+        x, _, _ = windowed.position('0')
+        self.assertTrue(np.shares_memory(x, data.trajectory.position))
+
+    def test_keyframes(self):
+        """
+        Tests that a window of a saved trajectory reads only its rows,
+        mapping them or decoding only the keyframes holding them
+        """
+        trajectory = self.create_trajectory(5 * KEYFRAME, 2)
+        t = trajectory.time
+        start, end = t[KEYFRAME + 10], t[2 * KEYFRAME + 10]
+
+        path = trajectory.save(f'{self.folder}/plain')
+        data = SimData(path, window=(start, end))
+        self.assertIsInstance(data.trajectory.position, np.memmap)
+        self.assertTrue(np.array_equal(
+            data.position('0')[0],
+            trajectory.position[KEYFRAME + 10:2 * KEYFRAME + 11, 0, 0]))
+
+        path = trajectory.save(f'{self.folder}/encoded', Codec())
+        with mock.patch.object(Codec, '_decompress', autospec=True,
+                               side_effect=Codec._decompress) as decompress:
+            data = SimData(path, window=(start, end))
+        # every keyframe of the times, two of each other array
+        arrays = len(trajectory.arrays)
+        self.assertEqual(decompress.call_count, 5 + 2 * arrays)
+        self.assertTrue(np.array_equal(data.times(),
+                                       t[KEYFRAME + 10:2 * KEYFRAME + 11]))
+        self.assertTrue(np.array_equal(
+            data.trajectory.mass,
+            trajectory.mass[KEYFRAME + 10:2 * KEYFRAME + 11], equal_nan=True))
+        self.assertEqual(data.at(start), trajectory.state(KEYFRAME + 10))
+
+    def test_month(self):
+        """
+        Compares the time to plot a month of ten years of hourly states with
+        the time to load all of them and take the month
+        """
+        trajectory = self.create_trajectory(24 * 3653, 9)
+        start = trajectory.time[24 * 365 * 5]
+        end = start + 30 * 24 * 3600.0
+        for name, codec in [('npy', None), ('Encoded', Codec())]:
+            path = trajectory.save(f'{self.folder}/month_{name}', codec)
+
+            begin = time.perf_counter()
+            full = SimData(path)
+            full.position('0')
+            full = full.window(start, end)
+            full.position('0')
+            whole = time.perf_counter() - begin
+
+            begin = time.perf_counter()
+            month = SimData(path, window=(start, end))
+            x, _, _ = month.position('0')
+            window = time.perf_counter() - begin
+
+            self.assertTrue(np.array_equal(x, full.position('0')[0]))
+            self.assertEqual(len(x), 30 * 24 + 1)
+            self.df[name] = [f"{whole * 1e3:.1f}", f"{window * 1e3:.1f}"]
+            if codec is not None:
+                self.assertTrue(window < whole)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        # a month of ten years of hourly states of nine bodies
+        cls.df.index = [
+            'Whole run (ms)',
+            'Window (ms)',
+        ]
+        print(cls.df.T)
+
+        os.makedirs('data/tests', exist_ok=True)
+        cls.df.T.to_latex('data/tests/window.tex')